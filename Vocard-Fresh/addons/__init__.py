@@ -1,3 +1,5 @@
+from .botstats import BotStats
 from .lyrics import LYRICS_PLATFORMS
 from .placeholders import Placeholders
+from .ratelimit import CooldownMap, RateLimiter
 from .settings import Settings
\ No newline at end of file
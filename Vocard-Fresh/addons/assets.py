@@ -0,0 +1,244 @@
+"""MIT License
+
+Copyright (c) 2023 - present Vocard Development
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import aiohttp
+import asyncio
+import hashlib
+import logging
+import os
+import time
+
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+logger = logging.getLogger("vocard")
+
+class AssetCache:
+    """Two-tier cache for downloaded images.
+
+    Contents are stored by their SHA-256 digest, both in a bounded in-memory LRU
+    and on disk under `objects/`. A URL only maps to a digest (`urls/`, whose
+    file time is the fetch time), so the same image behind several URLs is kept
+    once. URL mappings expire after `ttl` seconds; the disk store is trimmed to
+    `max_disk` bytes, least recently used first. Concurrent fetches of the same
+    URL share one download.
+    """
+    def __init__(
+        self,
+        directory: str,
+        *,
+        max_memory: int = 32 * 1024 * 1024,
+        max_disk: int = 256 * 1024 * 1024,
+        max_asset: int = 8 * 1024 * 1024,
+        ttl: float = 24 * 60 * 60,
+        timeout: float = 10.0
+    ) -> None:
+        self.directory: str = directory
+        self.max_memory: int = max_memory
+        self.max_disk: int = max_disk
+        self.max_asset: int = max_asset
+        self.ttl: float = ttl
+        self.timeout: float = timeout
+
+        self._memory: OrderedDict[str, bytes] = OrderedDict()  # digest -> content
+        self._memory_size: int = 0
+        self._urls: OrderedDict[str, Tuple[str, float]] = OrderedDict()  # url -> (digest, fetched at)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._disk_size: Optional[int] = None
+
+        self.hits: int = 0
+        self.disk_hits: int = 0
+        self.misses: int = 0
+
+    @staticmethod
+    def _url_key(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "objects", digest)
+
+    def _url_path(self, url: str) -> str:
+        return os.path.join(self.directory, "urls", self._url_key(url))
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_bytes": self._memory_size,
+            "memory_items": len(self._memory)
+        }
+
+    def _remember(self, url: str, digest: str, data: bytes, fetched_at: float) -> None:
+        self._urls[url] = (digest, fetched_at)
+        self._urls.move_to_end(url)
+        while len(self._urls) > 10_000:
+            self._urls.popitem(last=False)
+
+        if digest not in self._memory:
+            self._memory[digest] = data
+            self._memory_size += len(data)
+        self._memory.move_to_end(digest)
+        while self._memory_size > self.max_memory and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    # ========== DISK ==========
+
+    @staticmethod
+    def _unlink(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _read_disk(self, url: str) -> Optional[Tuple[str, bytes, float]]:
+        url_path = self._url_path(url)
+        try:
+            fetched_at = os.path.getmtime(url_path)
+            if time.time() - fetched_at > self.ttl:
+                self._unlink(url_path)
+                return None
+
+            with open(url_path, encoding="utf-8") as f:
+                digest = f.read().strip()
+        except OSError:
+            return None
+
+        try:
+            object_path = self._object_path(digest)
+            with open(object_path, "rb") as f:
+                data = f.read()
+            os.utime(object_path)  # marks it as recently used for eviction
+            return digest, data, fetched_at
+        except FileNotFoundError:
+            # The object was trimmed, the mapping is of no use anymore
+            self._unlink(url_path)
+        except OSError:
+            pass
+        return None
+
+    def _write_disk(self, url: str, digest: str, data: bytes) -> None:
+        try:
+            os.makedirs(os.path.join(self.directory, "objects"), exist_ok=True)
+            os.makedirs(os.path.join(self.directory, "urls"), exist_ok=True)
+
+            object_path = self._object_path(digest)
+            if not os.path.exists(object_path):
+                temp_path = f"{object_path}.{os.getpid()}.tmp"
+                with open(temp_path, "wb") as f:
+                    f.write(data)
+                os.replace(temp_path, object_path)
+                if self._disk_size is not None:
+                    self._disk_size += len(data)
+
+            with open(self._url_path(url), "w", encoding="utf-8") as f:
+                f.write(digest)
+
+            if self._disk_size is None or self._disk_size > self.max_disk:
+                self._trim_disk()
+        except OSError as e:
+            logger.debug(f"Failed to write image cache entry: {e}")
+
+    def _trim_disk(self) -> None:
+        objects_dir = os.path.join(self.directory, "objects")
+        entries = []
+        for entry in os.scandir(objects_dir):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        kept = {os.path.basename(path) for _, _, path in entries}
+        # Trim to 90% so the next few writes don't trigger another scan
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk * 0.9:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                kept.discard(os.path.basename(path))
+            except OSError:
+                pass
+        self._disk_size = total
+        self._sweep_urls(kept)
+
+    def _sweep_urls(self, digests: Set[str]) -> None:
+        """Removes URL mappings that expired or point at an object no longer on disk."""
+        expired_before = time.time() - self.ttl
+        for entry in os.scandir(os.path.join(self.directory, "urls")):
+            try:
+                if entry.stat().st_mtime >= expired_before:
+                    with open(entry.path, encoding="utf-8") as f:
+                        if f.read().strip() in digests:
+                            continue
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    # ========== FETCH ==========
+
+    async def _download(self, session: aiohttp.ClientSession, url: str) -> Optional[bytes]:
+        try:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=self.timeout)) as resp:
+                if resp.status != 200:
+                    return None
+                if (resp.content_length or 0) > self.max_asset:
+                    return None
+                data = await resp.content.read(self.max_asset + 1)
+                return data if len(data) <= self.max_asset else None
+        except Exception as e:
+            logger.debug(f"Failed to download image: {e}")
+            return None
+
+    async def _load(self, session: aiohttp.ClientSession, url: str) -> Optional[bytes]:
+        if cached := await asyncio.to_thread(self._read_disk, url):
+            digest, data, fetched_at = cached
+            self.disk_hits += 1
+            self._remember(url, digest, data, fetched_at)
+            return data
+
+        self.misses += 1
+        if not (data := await self._download(session, url)):
+            return None
+
+        digest = hashlib.sha256(data).hexdigest()
+        self._remember(url, digest, data, time.time())
+        await asyncio.to_thread(self._write_disk, url, digest, data)
+        return data
+
+    async def fetch(self, session: aiohttp.ClientSession, url: str) -> Optional[bytes]:
+        """Returns the content behind `url`, or None if it could not be downloaded."""
+        if entry := self._urls.get(url):
+            digest, fetched_at = entry
+            if time.time() - fetched_at <= self.ttl and (data := self._memory.get(digest)):
+                self.hits += 1
+                self._urls.move_to_end(url)
+                self._memory.move_to_end(digest)
+                return data
+
+        if not (task := self._inflight.get(url)):
+            task = self._inflight[url] = asyncio.create_task(self._load(session, url))
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        return await asyncio.shield(task)
@@ -0,0 +1,107 @@
+"""MIT License
+
+Copyright (c) 2023 - present Vocard Development
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import discord
+
+from discord.ext import commands
+from typing import Dict, Optional, Set
+
+class BotStats:
+    """Bot-wide counters kept up to date from gateway events and player lifecycle hooks.
+
+    Reading any counter is O(1), so the dashboard, the presence rotation and the
+    player stats broadcast no longer have to scan every guild.
+    """
+    def __init__(self) -> None:
+        self._member_counts: Dict[int, int] = {}
+        self._user_count: int = 0
+        self._active_players: Set[int] = set()
+        self._command_count: Optional[int] = None
+        self._bot: Optional[commands.Bot] = None
+
+    def attach(self, bot: commands.Bot) -> None:
+        """Registers the gateway listeners that feed the counters."""
+        self._bot = bot
+        bot.add_listener(self._on_guild_add, "on_guild_available")
+        bot.add_listener(self._on_guild_add, "on_guild_join")
+        bot.add_listener(self._on_guild_remove, "on_guild_remove")
+        bot.add_listener(self._on_member_join, "on_member_join")
+        bot.add_listener(self._on_member_remove, "on_member_remove")
+
+    def _set_member_count(self, guild_id: int, count: int) -> None:
+        self._user_count += count - self._member_counts.get(guild_id, 0)
+        self._member_counts[guild_id] = count
+
+    async def _on_guild_add(self, guild: discord.Guild) -> None:
+        self._set_member_count(guild.id, guild.member_count or 0)
+
+    async def _on_guild_remove(self, guild: discord.Guild) -> None:
+        self._user_count -= self._member_counts.pop(guild.id, 0)
+        self._active_players.discard(guild.id)
+
+    async def _on_member_join(self, member: discord.Member) -> None:
+        if member.guild.id in self._member_counts:
+            self._set_member_count(member.guild.id, self._member_counts[member.guild.id] + 1)
+
+    async def _on_member_remove(self, member: discord.Member) -> None:
+        if member.guild.id in self._member_counts:
+            self._set_member_count(member.guild.id, max(self._member_counts[member.guild.id] - 1, 0))
+
+    def set_player_active(self, guild_id: int, active: bool) -> None:
+        """Called by the player whenever it starts or stops playing a track."""
+        if active:
+            self._active_players.add(guild_id)
+        else:
+            self._active_players.discard(guild_id)
+
+    def invalidate_commands(self) -> None:
+        """Forces the command count to be recomputed, e.g. after cogs are reloaded."""
+        self._command_count = None
+
+    @property
+    def server_count(self) -> int:
+        return len(self._member_counts)
+
+    @property
+    def user_count(self) -> int:
+        return self._user_count
+
+    @property
+    def active_players(self) -> int:
+        return len(self._active_players)
+
+    @property
+    def command_count(self) -> int:
+        if self._command_count is None:
+            if not self._bot:
+                return 0
+            self._command_count = sum(1 for _ in self._bot.tree.walk_commands())
+        return self._command_count
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "serverCount": self.server_count,
+            "userCount": self.user_count,
+            "commandCount": self.command_count,
+            "activePlayers": self.active_players
+        }
@@ -0,0 +1,226 @@
+"""MIT License
+
+Copyright (c) 2023 - present Vocard Development
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import json
+import logging
+import os
+
+from typing import Any, Dict, List, Optional, TextIO
+
+logger = logging.getLogger("vocard")
+
+class PlayerJournal:
+    """An append-only local journal of player session changes.
+
+    Every change is a single JSON line: a full `put` of a player's state, a partial
+    `set` of some fields, or a `delete`. Lines are buffered and written with one
+    fsync per `flush_interval`, so a hard crash loses at most that much history.
+    Once the log holds `compact_records` lines and outweighs the snapshot
+    `compact_ratio` times, or grows past `compact_bytes`, the materialized state
+    is written to a snapshot and the log is truncated. Weighing the log against
+    the snapshot keeps the small position updates every player writes from
+    rewriting a large snapshot over and over.
+
+    Restoring reads the snapshot and replays the log on top of it. Replaying the
+    same log twice yields the same state, so a crash between writing the snapshot
+    and truncating the log is harmless.
+    """
+    def __init__(
+        self,
+        directory: str,
+        *,
+        flush_interval: float = 1.0,
+        compact_records: int = 10_000,
+        compact_ratio: float = 2.0,
+        compact_bytes: int = 8 * 1024 * 1024
+    ) -> None:
+        self.directory: str = directory
+        self.snapshot_path: str = os.path.join(directory, "snapshot.json")
+        self.log_path: str = os.path.join(directory, "journal.log")
+
+        self.flush_interval: float = flush_interval
+        self.compact_records: int = compact_records
+        self.compact_ratio: float = compact_ratio
+        self.compact_bytes: int = compact_bytes
+
+        self._state: Dict[int, Dict[str, Any]] = {}
+        self._pending: List[str] = []
+        self._log_records: int = 0
+        self._log_bytes: int = 0
+        self._snapshot_bytes: int = 0
+
+        self._file: Optional[TextIO] = None
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def sessions(self) -> Dict[int, Dict[str, Any]]:
+        """The current materialized state, keyed by guild id."""
+        return self._state
+
+    @staticmethod
+    def _apply(state: Dict[int, Dict[str, Any]], record: Dict[str, Any]) -> None:
+        guild_id, op = record["guild"], record["op"]
+        if op == "put":
+            state[guild_id] = dict(record["data"])
+        elif op == "set":
+            if guild_id in state:
+                state[guild_id].update(record["fields"])
+        elif op == "delete":
+            state.pop(guild_id, None)
+
+    def load(self) -> Dict[int, Dict[str, Any]]:
+        """Rebuilds the state from the snapshot plus the log tail."""
+        state: Dict[int, Dict[str, Any]] = {}
+        snapshot_size = 0
+        try:
+            with open(self.snapshot_path, "rb") as file:
+                content = file.read()
+            snapshot_size = len(content)
+            for data in json.loads(content):
+                state[data["guild_id"]] = data
+        except FileNotFoundError:
+            pass
+        except ValueError as e:
+            logger.error("The player journal snapshot is corrupted, ignoring it.", exc_info=e)
+
+        records = size = 0
+        try:
+            with open(self.log_path, "rb") as file:
+                for line in file:
+                    if not line.endswith(b"\n"):
+                        # Torn by a crash mid-write, always the last line
+                        logger.warning("Dropped an incomplete last line from the player journal.")
+                        break
+
+                    size += len(line)
+                    try:
+                        self._apply(state, json.loads(line))
+                        records += 1
+                    except (ValueError, KeyError):
+                        logger.warning("Skipped an unreadable line in the player journal.")
+
+            # Cut the torn line off, or the next record appended would be glued onto it
+            if size != os.path.getsize(self.log_path):
+                os.truncate(self.log_path, size)
+        except FileNotFoundError:
+            pass
+
+        self._state, self._log_records, self._log_bytes = state, records, size
+        self._snapshot_bytes = snapshot_size
+        return state
+
+    async def start(self) -> Dict[int, Dict[str, Any]]:
+        """Loads the existing journal and starts the background flush task."""
+        os.makedirs(self.directory, exist_ok=True)
+        state = await asyncio.to_thread(self.load)
+        self._file = open(self.log_path, "a", encoding="utf8")
+        self._task = asyncio.create_task(self._flush_loop())
+        return state
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+        await self.flush()
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        self._apply(self._state, record)
+        self._pending.append(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def put(self, guild_id: int, data: Dict[str, Any]) -> None:
+        self._append({"op": "put", "guild": guild_id, "data": data})
+
+    def update(self, guild_id: int, fields: Dict[str, Any]) -> None:
+        self._append({"op": "set", "guild": guild_id, "fields": fields})
+
+    def delete(self, guild_id: int) -> None:
+        if guild_id in self._state:
+            self._append({"op": "delete", "guild": guild_id})
+
+    def _write(self, lines: List[str]) -> int:
+        data = "".join(lines)
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return len(data.encode())
+
+    async def flush(self) -> None:
+        """Writes the buffered records with a single fsync, compacting the log when it grows too large."""
+        async with self._lock:
+            if not self._pending or not self._file:
+                return
+
+            lines, self._pending = self._pending, []
+            self._log_bytes += await asyncio.to_thread(self._write, lines)
+            self._log_records += len(lines)
+
+            if self._should_compact():
+                await self._compact()
+
+    def _should_compact(self) -> bool:
+        if self._log_bytes >= self.compact_bytes:
+            return True
+        # Compacting rewrites every session, only worth it once the log outweighs the snapshot
+        return self._log_records >= self.compact_records and self._log_bytes >= self._snapshot_bytes * self.compact_ratio
+
+    async def compact(self) -> None:
+        async with self._lock:
+            if self._pending and self._file:
+                lines, self._pending = self._pending, []
+                await asyncio.to_thread(self._write, lines)
+            await self._compact()
+
+    def _write_snapshot(self, sessions: List[Dict[str, Any]]) -> int:
+        content = json.dumps(sessions, separators=(",", ":")).encode()
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, "wb") as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+
+        self._file.close()
+        self._file = open(self.log_path, "w", encoding="utf8")
+        os.fsync(self._file.fileno())
+        return len(content)
+
+    async def _compact(self) -> None:
+        # The state is copied on the loop thread so the writer never sees it mid-update
+        sessions = [dict(data) for data in self._state.values()]
+        self._snapshot_bytes = await asyncio.to_thread(self._write_snapshot, sessions)
+        logger.debug(f"Compacted the player journal into a snapshot of {len(sessions)} session(s).")
+        self._log_records = self._log_bytes = 0
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Failed to flush the player journal.", exc_info=e)
@@ -0,0 +1,103 @@
+"""MIT License
+
+Copyright (c) 2023 - present Vocard Development
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+
+from sortedcontainers import SortedList
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+class RankedList:
+    """Members ordered by score, highest first.
+
+    Entries are kept as `(-score, member_id)` in a SortedList, so a score change
+    and a rank lookup are O(log n) and the top N is a slice.
+    """
+    def __init__(self, scores: Iterable[Tuple[int, int]] = ()) -> None:
+        self._scores: Dict[int, int] = dict(scores)
+        self._order: SortedList = SortedList((-score, member_id) for member_id, score in self._scores.items())
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, member_id: int) -> bool:
+        return member_id in self._scores
+
+    def score(self, member_id: int) -> Optional[int]:
+        return self._scores.get(member_id)
+
+    def set(self, member_id: int, score: int) -> None:
+        if (old := self._scores.get(member_id)) is not None:
+            if old == score:
+                return
+            self._order.remove((-old, member_id))
+
+        self._scores[member_id] = score
+        self._order.add((-score, member_id))
+
+    def remove(self, member_id: int) -> None:
+        if (old := self._scores.pop(member_id, None)) is not None:
+            self._order.remove((-old, member_id))
+
+    def rank(self, score: int) -> int:
+        """1-based rank of a score: one more than the number of members scoring strictly higher."""
+        return self._order.bisect_left((-score,)) + 1
+
+    def top(self, limit: int) -> List[Tuple[int, int]]:
+        return [(member_id, -negative) for negative, member_id in self._order.islice(0, limit)]
+
+class Leaderboards:
+    """Per-guild ranked lists, built from the database the first time a guild is used."""
+    def __init__(self) -> None:
+        self._boards: Dict[int, RankedList] = {}
+        self._building: Dict[int, asyncio.Task] = {}
+
+    def get(self, guild_id: int) -> Optional[RankedList]:
+        return self._boards.get(guild_id)
+
+    async def ensure(self, guild_id: int, load: Callable[[], Awaitable[Iterable[Tuple[int, int]]]]) -> RankedList:
+        """Returns the guild's list, building it with `load` once, however many callers wait on it."""
+        if board := self._boards.get(guild_id):
+            return board
+
+        if not (task := self._building.get(guild_id)):
+            async def build() -> RankedList:
+                board = self._boards[guild_id] = RankedList(await load())
+                return board
+
+            task = self._building[guild_id] = asyncio.create_task(build())
+            task.add_done_callback(lambda _: self._building.pop(guild_id, None))
+        return await asyncio.shield(task)
+
+    def update(self, guild_id: int, member_id: int, score: int) -> None:
+        """Keeps an already built list in sync; guilds that were never built are ignored."""
+        if board := self._boards.get(guild_id):
+            if score > 0:
+                board.set(member_id, score)
+            else:
+                board.remove(member_id)
+
+    def invalidate(self, guild_id: Optional[int] = None) -> None:
+        if guild_id is None:
+            self._boards.clear()
+        else:
+            self._boards.pop(guild_id, None)
@@ -0,0 +1,99 @@
+"""MIT License
+
+Copyright (c) 2023 - present Vocard Development
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import time
+
+from typing import Dict, Iterable, Set, Tuple
+
+ListenerKey = Tuple[int, int]  # (user id, guild id)
+
+class ListeningTracker:
+    """Accumulates listening time per (user, guild) from state changes instead of polling.
+
+    Callers report who is currently listening in a guild whenever something that
+    could change it happens (voice moves, track start/end, pause). Each listener has
+    an open interval while listening; closing or checkpointing it moves the elapsed
+    seconds into a pending counter that is drained in whole minutes by the flush.
+    """
+    def __init__(self) -> None:
+        self._open: Dict[ListenerKey, float] = {}
+        self._pending: Dict[ListenerKey, float] = {}
+        self._guilds: Dict[int, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._open)
+
+    @property
+    def guild_ids(self) -> Set[int]:
+        return set(self._guilds)
+
+    def _close(self, key: ListenerKey, now: float) -> None:
+        if (started_at := self._open.pop(key, None)) is not None:
+            self._pending[key] = self._pending.get(key, 0.0) + now - started_at
+
+    def set_listeners(self, guild_id: int, user_ids: Iterable[int]) -> None:
+        """Reconciles the open intervals of a guild with the users listening right now."""
+        now = time.monotonic()
+        current = set(user_ids)
+        previous = self._guilds.get(guild_id, set())
+
+        for user_id in previous - current:
+            self._close((user_id, guild_id), now)
+        for user_id in current - previous:
+            self._open[(user_id, guild_id)] = now
+
+        if current:
+            self._guilds[guild_id] = current
+        else:
+            self._guilds.pop(guild_id, None)
+
+    def checkpoint(self) -> None:
+        """Moves the time elapsed in every open interval into the pending counters."""
+        now = time.monotonic()
+        for key, started_at in self._open.items():
+            self._pending[key] = self._pending.get(key, 0.0) + now - started_at
+            self._open[key] = now
+
+    def drain(self, *, final: bool = False) -> Dict[ListenerKey, int]:
+        """Takes the whole minutes out of the pending counters.
+
+        Sub-minute remainders stay pending for the next flush. A final drain rounds
+        them to the nearest minute instead.
+        """
+        self.checkpoint()
+        minutes: Dict[ListenerKey, int] = {}
+        for key, seconds in list(self._pending.items()):
+            whole = round(seconds / 60) if final else int(seconds // 60)
+            if whole:
+                minutes[key] = whole
+            remainder = 0.0 if final else seconds - whole * 60
+            if remainder > 0:
+                self._pending[key] = remainder
+            else:
+                del self._pending[key]
+        return minutes
+
+    def restore(self, minutes: Dict[ListenerKey, int]) -> None:
+        """Puts drained minutes back, e.g. after a failed write."""
+        for key, amount in minutes.items():
+            self._pending[key] = self._pending.get(key, 0.0) + amount * 60
@@ -22,21 +22,30 @@ SOFTWARE.
 """
 
 import aiohttp
+import asyncio
+import logging
 import random
 import re
 import hmac
 import hashlib
 import base64
 import json
+import time
 import urllib.parse
 import function as func
 
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from abc import ABC, abstractmethod
 from urllib.parse import quote
 from math import floor
 from importlib import import_module
-from typing import Optional, Type
+from collections import OrderedDict
+from pymongo import ReplaceOne
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Type
+
+logger = logging.getLogger("vocard")
+
+SYNCED_KEY = "synced"  # providers return time-synced (LRC) lyrics under this key, next to the display sections
 
 userAgents = '''Mozilla/5.0 (Windows NT 6.1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/41.0.2228.0 Safari/537.36
 Mozilla/5.0 (Macintosh; Intel Mac OS X 10_10_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/41.0.2227.1 Safari/537.36
@@ -79,28 +88,51 @@ Mozilla/5.0 (Macintosh; U; Intel Mac OS X 10_5_6; en-US) AppleWebKit/530.9 (KHTM
 Mozilla/5.0 (Macintosh; U; Intel Mac OS X 10_5_6; en-US) AppleWebKit/530.6 (KHTML, like Gecko) Chrome/ Safari/530.6
 Mozilla/5.0 (Macintosh; U; Intel Mac OS X 10_5_6; en-US) AppleWebKit/530.5 (KHTML, like Gecko) Chrome/ Safari/530.5'''
 
+class LyricsResult(NamedTuple):
+    platform: str
+    lyrics: Dict[str, str]
+    synced: Optional[str] = None
+
 class LyricsPlatform(ABC):
+    _session: Optional[aiohttp.ClientSession] = None
+
+    @staticmethod
+    def session() -> aiohttp.ClientSession:
+        """Keep-alive session shared by every provider."""
+        if not LyricsPlatform._session or LyricsPlatform._session.closed:
+            LyricsPlatform._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, limit_per_host=8, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=15)
+            )
+        return LyricsPlatform._session
+
+    @staticmethod
+    async def close_session() -> None:
+        if LyricsPlatform._session and not LyricsPlatform._session.closed:
+            await LyricsPlatform._session.close()
+        LyricsPlatform._session = None
+
     @abstractmethod
-    async def get_lyrics(self, title: str, artist: str) -> Optional[dict[str, str]]:
+    async def get_lyrics(self, title: str, artist: str, isrc: Optional[str] = None) -> Optional[dict[str, str]]:
         ...
 
 class A_ZLyrics(LyricsPlatform):
-    async def get(self, url) -> str:
-        try:
-            async with aiohttp.ClientSession() as session:
-                resp = await session.get(url=url, headers={'User-Agent': random.choice(userAgents)})
-                if resp.status != 200:
-                    return None
-                return await resp.text()
-        except:
-            return ""
-
-    async def get_lyrics(self, title: str, artist: str) -> dict[str, str]:
+    async def get(self, url) -> Optional[str]:
+        """Returns the page, None if it does not exist; any other failure raises."""
+        async with self.session().get(url=url, headers={'User-Agent': random.choice(userAgents)}) as resp:
+            if resp.status == 404:
+                return None
+            if resp.status != 200:
+                raise Exception(f"HTTP Error: {resp.status} for URL: {url}")
+            return await resp.text()
+
+    async def get_lyrics(self, title: str, artist: str, isrc: Optional[str] = None) -> Optional[dict[str, str]]:
         link = await self.googleGet(title=title, artist=artist)
         if not link:
-            return 0
+            return None
 
-        page = await self.get(link)
+        if not (page := await self.get(link)):
+            return None
         metadata = [elm.text for elm in self.htmlFindAll(page)('b')]
         
         if not metadata:
@@ -125,7 +157,7 @@ class A_ZLyrics(LyricsPlatform):
                     del lyrics_parts[count-1]
                 return {lyrics_parts[i].replace("[", "").replace(":]", ""): self.clearText(lyrics_parts[i + 1]) for i in range(0, len(lyrics_parts), 2)}
             return {"default": self.clearText(lyrics_parts[0])}
-        except:
+        except Exception:
             return None
 
     async def googleGet(self, acc = 0.6, artist='', title='') -> Optional[str]:
@@ -133,12 +165,11 @@ class A_ZLyrics(LyricsPlatform):
         encoded_data = quote(data.replace(' ', '+'))
 
         google_page = await self.get('{}{}+site%3Aazlyrics.com'.format('https://duckduckgo.com/html/?q=', encoded_data))
-
-        try:
-            results = re.findall(r'(azlyrics\.com\/lyrics\/[a-z0-9]+\/(\w+).html)', google_page)
-        except:
+        if not google_page:
             return None
-            
+
+        results = re.findall(r'(azlyrics\.com\/lyrics\/[a-z0-9]+\/(\w+).html)', google_page)
+
         if len(results):
             jaro_artist = 1.0
             jaro_title = 1.0
@@ -190,7 +221,7 @@ class A_ZLyrics(LyricsPlatform):
         return (match/ len1 + match / len2 + (match - t + 1) / match)/ 3.0
 
     def htmlFindAll(self, page) -> list:
-        soup = bs4.BeautifulSoup(page, "html.parser")
+        soup = import_module("bs4").BeautifulSoup(page, "html.parser")
         return soup.findAll
 
     def clearText(self, text: str) -> str:
@@ -204,49 +235,46 @@ class Genius(LyricsPlatform):
         self.module = import_module("lyricsgenius")
         self.genius = self.module.Genius(func.settings.genius_token)
 
-    async def get_lyrics(self, title: str, artist: str) -> Optional[dict[str, str]]:
-        song = self.genius.search_song(title=title, artist=artist)
+    async def get_lyrics(self, title: str, artist: str, isrc: Optional[str] = None) -> Optional[dict[str, str]]:
+        # lyricsgenius is blocking, keep it off the event loop
+        song = await asyncio.to_thread(self.genius.search_song, title=title, artist=artist)
         if not song:
             return None
-        
+
         return {"default": song.lyrics}
 
 class Lyrist(LyricsPlatform):
     def __init__(self):
         self.base_url: str = "https://lyrist.vercel.app/api/"
 
-    async def get_lyrics(self, title: str, artist: str) -> Optional[dict[str, str]]:
-        try:
-            request_url = self.base_url + title + "/" + artist
-            async with aiohttp.ClientSession() as session:
-                resp = await session.get(url=request_url, headers={'User-Agent': random.choice(userAgents)})
-                if resp.status != 200:
-                    return None
-                
-                data = await resp.json()
-                return {"default": data["lyrics"]}
-        except:
-            return None
+    async def get_lyrics(self, title: str, artist: str, isrc: Optional[str] = None) -> Optional[dict[str, str]]:
+        request_url = self.base_url + title + "/" + artist
+        async with self.session().get(url=request_url, headers={'User-Agent': random.choice(userAgents)}) as resp:
+            if resp.status == 404:
+                return None
+            if resp.status != 200:
+                raise Exception(f"HTTP Error: {resp.status} for URL: {request_url}")
+
+            data = await resp.json()
+            return {"default": data["lyrics"]} if data.get("lyrics") else None
 
 class Lrclib(LyricsPlatform):
     def __init__(self):
         self.base_url: str = "https://lrclib.net/api/"
 
     async def get(self, url, params: dict = None) -> list[dict]:
-        try:
-            async with aiohttp.ClientSession() as session:
-                resp = await session.get(url=url, headers={'User-Agent': random.choice(userAgents)}, params=params)
-                if resp.status != 200:
-                    return None
-                return await resp.json()
-        except:
-            return []
-        
-    async def get_lyrics(self, title: str, artist: str) -> Optional[dict[str, str]]:
+        async with self.session().get(url=url, headers={'User-Agent': random.choice(userAgents)}, params=params) as resp:
+            if resp.status != 200:
+                raise Exception(f"HTTP Error: {resp.status} for URL: {url}")
+            return await resp.json()
+
+    async def get_lyrics(self, title: str, artist: str, isrc: Optional[str] = None) -> Optional[dict[str, str]]:
         params = {"q": title}
         result = await self.get(self.base_url + "search", params)
         if result:
-            return {"default": result[0].get("plainLyrics", "")}
+            synced = result[0].get("syncedLyrics") or ""
+            plain = result[0].get("plainLyrics") or re.sub(r"^\[[\d:.]+\] ?", "", synced, flags=re.M)
+            return {"default": plain, SYNCED_KEY: synced}
 
 """
 Strvm/musicxmatch-api: a reverse engineered API wrapper for MusicXMatch  
@@ -271,10 +299,31 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 class MusixMatch(LyricsPlatform):
+    """Signs requests the way the Musixmatch web app does.
+
+    The signing secret is scraped from the web app's `_app` bundle, which takes
+    two requests, so it is shared by every instance and kept for `SECRET_TTL`.
+    An expired secret keeps being used while a single background refresh runs;
+    the bundle is only downloaded again when its URL (the app version) changed.
+    A rejected signature triggers the same refresh, so a lookup normally costs
+    the API requests alone.
+    """
+    SECRET_TTL: float = 24 * 60 * 60
+    REFRESH_COOLDOWN: float = 60.0  # refresh attempts, successful or not, are never started more often than this
+    MAX_SIGNATURES: int = 256
+
+    _secret: Optional[str] = None
+    _app_url: Optional[str] = None
+    _fetched_at: float = 0.0
+    _attempted_at: float = float("-inf")  # start of the last refresh, whether or not it succeeded
+    _hmac: Optional[hmac.HMAC] = None
+    _refresh_task: Optional[asyncio.Task] = None
+    _signatures: OrderedDict[str, str] = OrderedDict()  # unsigned url -> signature params, for the current day
+    _signature_day: str = ""
+
     def __init__(self):
         self.base_url = "https://www.musixmatch.com/ws/1.1/"
         self.headers = {'User-Agent': random.choice(userAgents)}
-        self.secret: Optional[str] = None
 
     async def search_tracks(self, track_query: str, page: int = 1) -> dict:
         url = f"track.search?app_id=web-desktop-app-v1.0&format=json&q={urllib.parse.quote(track_query)}&f_has_lyrics=true&page_size=5&page={page}"
@@ -287,81 +336,155 @@ class MusixMatch(LyricsPlatform):
         url = f"track.lyrics.get?app_id=web-desktop-app-v1.0&format=json&{param}"
         return await self.make_request(url)
 
+    async def match_lyrics(self, title: str, artist: str) -> dict:
+        url = f"matcher.lyrics.get?app_id=web-desktop-app-v1.0&format=json&q_track={urllib.parse.quote(title)}&q_artist={urllib.parse.quote(artist)}"
+        return await self.make_request(url)
+
     async def get_latest_app(self):
         url = "https://www.musixmatch.com/search"
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers={**self.headers, "Cookie": "mxm_bab=AB"}) as response:
-                html_content = await response.text()
-                pattern = r'src="([^"]*/_next/static/chunks/pages/_app-[^"]+\.js)"'
-                matches = re.findall(pattern, html_content)
+        async with self.session().get(url, headers={**self.headers, "Cookie": "mxm_bab=AB"}) as response:
+            html_content = await response.text()
+            pattern = r'src="([^"]*/_next/static/chunks/pages/_app-[^"]+\.js)"'
+            matches = re.findall(pattern, html_content)
 
-                if not matches:
-                    raise Exception("_app URL not found in the HTML content.")
-                
-                return matches[-1]
+            if not matches:
+                raise Exception("_app URL not found in the HTML content.")
 
-    async def get_secret(self) -> str:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(await self.get_latest_app(), headers=self.headers, timeout=5) as response:
-                javascript_code = await response.text()
+            return matches[-1]
 
-                pattern = r'from\(\s*"(.*?)"\s*\.split'
-                match = re.search(pattern, javascript_code)
+    async def get_secret(self, app_url: Optional[str] = None) -> str:
+        async with self.session().get(app_url or await self.get_latest_app(), headers=self.headers, timeout=aiohttp.ClientTimeout(total=5)) as response:
+            javascript_code = await response.text()
 
-                if match:
-                    encoded_string = match.group(1)
-                    reversed_string = encoded_string[::-1]
+            pattern = r'from\(\s*"(.*?)"\s*\.split'
+            match = re.search(pattern, javascript_code)
 
-                    decoded_bytes = base64.b64decode(reversed_string)
-                    return decoded_bytes.decode("utf-8")
-                else:
-                    raise Exception("Encoded string not found in the JavaScript code.")
+            if match:
+                encoded_string = match.group(1)
+                reversed_string = encoded_string[::-1]
+
+                decoded_bytes = base64.b64decode(reversed_string)
+                return decoded_bytes.decode("utf-8")
+            else:
+                raise Exception("Encoded string not found in the JavaScript code.")
+
+    @classmethod
+    def _set_secret(cls, secret: str, app_url: str) -> None:
+        if secret != cls._secret:
+            cls._secret = secret
+            cls._hmac = hmac.new(secret.encode(), digestmod=hashlib.sha256)
+            cls._signatures.clear()
+        cls._app_url = app_url
+        cls._fetched_at = time.monotonic()
+
+    async def _refresh_secret(self) -> None:
+        try:
+            app_url = await self.get_latest_app()
+            # The bundle only changes with a new app version, skip the download when it is the same one
+            secret = MusixMatch._secret if app_url == MusixMatch._app_url and MusixMatch._secret else await self.get_secret(app_url)
+            MusixMatch._set_secret(secret, app_url)
+        except Exception as e:
+            logger.debug(f"Failed to refresh the MusixMatch secret: {e}")
+            raise
+
+    def refresh_secret(self, *, force: bool = False) -> Optional[asyncio.Task]:
+        """Starts a refresh unless one is running or the last one started within `REFRESH_COOLDOWN`.
+
+        `force` refetches the bundle even when the app version is unchanged. Returns
+        the running refresh, or None when the cooldown holds it back.
+        """
+        if (task := MusixMatch._refresh_task) and not task.done():
+            return task
+        # Measured from the last attempt, so a broken scrape can't cost two requests on every lookup
+        if time.monotonic() - MusixMatch._attempted_at < self.REFRESH_COOLDOWN:
+            return None
+
+        if force:
+            MusixMatch._app_url = None
+        MusixMatch._attempted_at = time.monotonic()
+        task = MusixMatch._refresh_task = asyncio.create_task(self._refresh_secret())
+        task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return task
+
+    async def ensure_secret(self) -> None:
+        if not MusixMatch._secret:
+            if not (task := self.refresh_secret()):
+                raise Exception("No MusixMatch secret, the last refresh failed less than a minute ago.")
+            await asyncio.shield(task)
+        elif time.monotonic() - MusixMatch._fetched_at > self.SECRET_TTL:
+            self.refresh_secret()  # keep signing with the current secret meanwhile
 
     async def generate_signature(self, url: str) -> str:
+        await self.ensure_secret()
+
         current_date = datetime.now()
         date_str = f"{current_date.year}{str(current_date.month).zfill(2)}{str(current_date.day).zfill(2)}"
-        message = (url + date_str).encode()
+        if date_str != MusixMatch._signature_day:
+            MusixMatch._signature_day = date_str
+            MusixMatch._signatures.clear()
 
-        if not self.secret:
-            self.secret = await self.get_secret()
+        if signature := MusixMatch._signatures.get(url):
+            MusixMatch._signatures.move_to_end(url)
+            return signature
 
-        key = self.secret.encode()
-        hash_output = hmac.new(key, message, hashlib.sha256).digest()
+        mac = MusixMatch._hmac.copy()
+        mac.update((url + date_str).encode())
         signature = (
             "&signature="
-            + urllib.parse.quote(base64.b64encode(hash_output).decode())
+            + urllib.parse.quote(base64.b64encode(mac.digest()).decode())
             + "&signature_protocol=sha256"
         )
+
+        MusixMatch._signatures[url] = signature
+        while len(MusixMatch._signatures) > self.MAX_SIGNATURES:
+            MusixMatch._signatures.popitem(last=False)
         return signature
-    
+
     async def make_request(self, url: str) -> dict:
         url = url.replace("%20", "+").replace(" ", "+")
         url = self.base_url + url
         signed_url = url + await self.generate_signature(url)
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(signed_url, headers=self.headers, timeout=5) as response:
-                if response.status != 200:
-                    raise Exception(f"HTTP Error: {response.status} for URL: {signed_url}")
-
-                try:
-                    text_data = await response.text()
-                    return json.loads(text_data)
-                except json.JSONDecodeError:
-                    raise Exception(f"Failed to parse JSON. Response: {text_data}")
+        async with self.session().get(signed_url, headers=self.headers, timeout=aiohttp.ClientTimeout(total=5)) as response:
+            if response.status == 401:
+                self.refresh_secret(force=True)
+            if response.status != 200:
+                raise Exception(f"HTTP Error: {response.status} for URL: {signed_url}")
 
-    async def get_lyrics(self, title: str, artist: str, isrc: str = None) -> Optional[dict[str, str]]:
+            try:
+                text_data = await response.text()
+                data = json.loads(text_data)
+            except json.JSONDecodeError:
+                raise Exception(f"Failed to parse JSON. Response: {text_data}")
+
+        # The API answers 200 and reports a rejected signature in the body
+        if data.get("message", {}).get("header", {}).get("status_code") == 401:
+            self.refresh_secret(force=True)
+            raise Exception("MusixMatch rejected the request signature.")
+        return data
+
+    @staticmethod
+    def _lyrics_body(data: dict) -> str:
+        return data.get("message", {}).get("body", {}).get("lyrics", {}).get("lyrics_body", "")
+
+    async def get_lyrics(self, title: str, artist: str, isrc: Optional[str] = None) -> Optional[dict[str, str]]:
         # Try ISRC-based lookup first (more accurate for famous songs)
         if isrc:
             try:
-                lyric = await self.get_track_lyrics(track_isrc=isrc)
-                lyrics_body = lyric.get("message", {}).get("body", {}).get("lyrics", {}).get("lyrics_body", "")
-                if lyrics_body:
+                if lyrics_body := self._lyrics_body(await self.get_track_lyrics(track_isrc=isrc)):
                     return {"default": lyrics_body}
-            except:
+            except Exception:
                 pass  # Fall through to title/artist search
-        
+
+        # The matcher answers in one request, the search below takes two
+        if artist:
+            try:
+                if lyrics_body := self._lyrics_body(await self.match_lyrics(title, artist)):
+                    return {"default": lyrics_body}
+            except Exception:
+                pass
+
         # Fallback to title/artist search
         results = await self.search_tracks(track_query=f"{artist} {title}" if artist else title)
 
@@ -370,9 +493,7 @@ class MusixMatch(LyricsPlatform):
             return None
 
         track_id = track_list[0]["track"]["track_id"]
-        lyric = await self.get_track_lyrics(track_id=track_id)
-
-        lyrics_body = lyric.get("message", {}).get("body", {}).get("lyrics", {}).get("lyrics_body", "")
+        lyrics_body = self._lyrics_body(await self.get_track_lyrics(track_id=track_id))
         if not lyrics_body:
             return None
 
@@ -384,4 +505,329 @@ LYRICS_PLATFORMS: dict[str, Type[LyricsPlatform]] = {
     "lyrist": Lyrist,
     "lrclib": Lrclib,
     "musixmatch": MusixMatch
-}
\ No newline at end of file
+}
+class ProviderStats:
+    """Outcome counters for one provider, used to see which sources are worth asking."""
+    # Failures in a row after which a provider counts as down
+    DOWN_AFTER: int = 3
+
+    def __init__(self) -> None:
+        self.attempts: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.errors: int = 0
+        self.timeouts: int = 0
+        self.cancelled: int = 0
+        self.latency: float = 0.0  # moving average of finished lookups, in seconds
+        self.failing: int = 0  # errors and timeouts since the last answer
+
+    @property
+    def is_down(self) -> bool:
+        return self.failing >= self.DOWN_AFTER
+
+    @property
+    def success_rate(self) -> float:
+        finished = self.hits + self.misses + self.errors + self.timeouts
+        return self.hits / finished if finished else 0.0
+
+    def record_latency(self, elapsed: float) -> None:
+        self.latency = elapsed if not self.latency else self.latency * 0.8 + elapsed * 0.2
+
+    def to_dict(self) -> dict:
+        return {
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+            "failing": self.failing,
+            "success_rate": round(self.success_rate, 3),
+            "latency_ms": round(self.latency * 1000, 1)
+        }
+
+class LyricsCache:
+    """Two-tier cache of resolved lyrics.
+
+    Entries live in a bounded in-memory LRU and, when a collection is given, in
+    MongoDB where a TTL index on `expires_at` removes them. A track is stored
+    under its ISRC and under its normalized title and artist, so a lookup without
+    an ISRC (e.g. from the dashboard) still finds it. Tracks no provider has
+    lyrics for are remembered for `negative_ttl`, much shorter than `ttl`.
+    """
+    BRACKETS = re.compile(r"[\(\[][^\)\]]*[\)\]]")
+    FEATURING = re.compile(r"\s+(?:feat\.?|ft\.?|featuring)\s.*$")
+    SEPARATORS = re.compile(r"[^\w]+")
+
+    def __init__(
+        self,
+        collection = None,
+        *,
+        max_items: int = 512,
+        ttl: float = 30 * 24 * 60 * 60,
+        negative_ttl: float = 6 * 60 * 60
+    ) -> None:
+        self.collection = collection
+        self.max_items: int = max_items
+        self.ttl: float = ttl
+        self.negative_ttl: float = negative_ttl
+
+        self._memory: OrderedDict[str, Tuple[float, Optional[LyricsResult]]] = OrderedDict()  # key -> (expires at, result)
+        self._writes: set[asyncio.Task] = set()
+
+        self.hits: int = 0
+        self.db_hits: int = 0
+        self.misses: int = 0
+
+    @property
+    def stats(self) -> dict:
+        return {"hits": self.hits, "db_hits": self.db_hits, "misses": self.misses, "memory_items": len(self._memory)}
+
+    @classmethod
+    def normalize(cls, text: str) -> str:
+        text = cls.BRACKETS.sub(" ", text.casefold())
+        text = cls.FEATURING.sub("", text)
+        return cls.SEPARATORS.sub(" ", text).strip()
+
+    @classmethod
+    def keys(cls, title: str, artist: str, isrc: Optional[str] = None, platform: Optional[str] = None) -> List[str]:
+        """Cache keys for a track, most specific first. `platform` scopes them to lookups that prefer that provider."""
+        keys = [f"q:{cls.normalize(artist)}|{cls.normalize(title)}"]
+        if isrc:
+            keys.insert(0, f"isrc:{isrc.strip().upper()}")
+        return [f"{key}@{platform}" for key in keys] if platform else keys
+
+    def _remember(self, key: str, expires_at: float, result: Optional[LyricsResult]) -> None:
+        self._memory[key] = (expires_at, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    async def get(self, keys: List[str]) -> Tuple[bool, Optional[LyricsResult]]:
+        """Returns `(found, result)`, where a found None is a cached miss."""
+        now = time.time()
+        for key in keys:
+            if (entry := self._memory.get(key)) and entry[0] > now:
+                self.hits += 1
+                self._memory.move_to_end(key)
+                return True, entry[1]
+
+        if self.collection is not None:
+            try:
+                docs = {doc["_id"]: doc async for doc in self.collection.find({"_id": {"$in": keys}})}
+            except Exception as e:
+                logger.debug(f"Failed to read the lyrics cache: {e}")
+                docs = {}
+
+            for key in keys:
+                if not (doc := docs.get(key)):
+                    continue
+                expires_at = doc["expires_at"]
+                if expires_at.tzinfo is None:
+                    expires_at = expires_at.replace(tzinfo=timezone.utc)
+                if (expires_at := expires_at.timestamp()) <= now:
+                    continue  # the TTL monitor only runs once a minute
+
+                result = LyricsResult(doc["platform"], doc["lyrics"], doc.get("synced")) if doc.get("lyrics") else None
+                for cache_key in keys:
+                    self._remember(cache_key, expires_at, result)
+                self.db_hits += 1
+                return True, result
+
+        self.misses += 1
+        return False, None
+
+    def put(self, keys: List[str], result: Optional[LyricsResult]) -> None:
+        ttl = self.ttl if result else self.negative_ttl
+        expires_at = time.time() + ttl
+        for key in keys:
+            self._remember(key, expires_at, result)
+
+        if self.collection is not None:
+            task = asyncio.create_task(self._write(keys, result, ttl))
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+
+    async def _write(self, keys: List[str], result: Optional[LyricsResult], ttl: float) -> None:
+        doc = {
+            "platform": result.platform if result else None,
+            "lyrics": result.lyrics if result else None,
+            "synced": result.synced if result else None,
+            "expires_at": datetime.now(timezone.utc) + timedelta(seconds=ttl)  # removed by the TTL index
+        }
+        try:
+            await self.collection.bulk_write([ReplaceOne({"_id": key}, doc, upsert=True) for key in keys], ordered=False)
+        except Exception as e:
+            logger.debug(f"Failed to write the lyrics cache: {e}")
+
+class LyricsResolver:
+    """Looks up lyrics from several providers at once.
+
+    Providers are started in priority order, each one `hedge_delay` seconds after
+    the previous (or right away once everything before it has missed), so a slow
+    or dead source no longer holds up the ones behind it. The result of the
+    highest priority provider that has lyrics wins; it is only accepted once every
+    provider ahead of it has missed, and the remaining lookups are cancelled.
+    A `hedge_delay` of 0 asks every provider at once.
+
+    Results go through `cache`, per preferred platform when that changes the
+    order, and concurrent lookups of the same track share one race.
+    """
+    DEFAULT_ORDER: Tuple[str, ...] = ("lrclib", "genius", "lyrist", "musixmatch", "a_zlyrics")
+
+    def __init__(
+        self,
+        *,
+        order: Optional[Iterable[str]] = None,
+        hedge_delay: float = 0.4,
+        timeout: float = 8.0,
+        timeouts: Optional[Dict[str, float]] = None,
+        prefetch: bool = True,
+        cache: Optional[LyricsCache] = None
+    ) -> None:
+        self.order: List[str] = [name for name in (order or self.DEFAULT_ORDER) if name in LYRICS_PLATFORMS]
+        self.hedge_delay: float = max(0.0, hedge_delay)
+        self.timeout: float = timeout
+        self.timeouts: Dict[str, float] = timeouts or {}
+        self.prefetch_enabled: bool = prefetch
+        self.cache: LyricsCache = cache or LyricsCache()
+
+        self._providers: Dict[str, LyricsPlatform] = {}
+        self._stats: Dict[str, ProviderStats] = {name: ProviderStats() for name in LYRICS_PLATFORMS}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cache": self.cache.stats,
+            "providers": {name: stats.to_dict() for name, stats in self._stats.items() if stats.attempts}
+        }
+
+    def order_for(self, preferred: Optional[str] = None) -> List[str]:
+        if preferred in LYRICS_PLATFORMS:
+            return [preferred] + [name for name in self.order if name != preferred]
+        return list(self.order)
+
+    def _provider(self, name: str) -> LyricsPlatform:
+        if not (provider := self._providers.get(name)):
+            provider = self._providers[name] = LYRICS_PLATFORMS[name]()
+        return provider
+
+    async def _attempt(self, name: str, title: str, artist: str, isrc: Optional[str]) -> Optional[LyricsResult]:
+        """Returns the provider's lyrics (empty on a miss), or None if it failed or timed out."""
+        stats = self._stats[name]
+        stats.attempts += 1
+        started_at = time.perf_counter()
+        try:
+            lyrics = await asyncio.wait_for(
+                self._provider(name).get_lyrics(title, artist, isrc=isrc),
+                timeout=self.timeouts.get(name, self.timeout)
+            )
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            stats.failing += 1
+            return None
+        except asyncio.CancelledError:
+            stats.cancelled += 1
+            raise
+        except Exception as e:
+            stats.errors += 1
+            stats.failing += 1
+            logger.debug(f"Lyrics platform {name} failed: {e}")
+            return None
+
+        stats.failing = 0
+        stats.record_latency(time.perf_counter() - started_at)
+        lyrics = {key: value for key, value in (lyrics or {}).items() if isinstance(value, str) and value.strip()}
+        synced = lyrics.pop(SYNCED_KEY, None)
+        if not lyrics:
+            stats.misses += 1
+            return LyricsResult(name, {})
+
+        stats.hits += 1
+        return LyricsResult(name, lyrics, synced)
+
+    async def _race(self, title: str, artist: str, isrc: Optional[str], order: List[str]) -> Tuple[Optional[LyricsResult], bool]:
+        """Returns the winning result and whether the providers' answers settle a miss.
+
+        A provider that failed or timed out may still have the lyrics, unless it has
+        been failing in a row (a bad token, a source that went away), then waiting
+        on it would keep every miss from being cached. At least one provider has to
+        answer, so an outage on our side is never taken for a miss.
+        """
+        pending = object()
+        results: List[Any] = [pending] * len(order)
+        tasks: Dict[asyncio.Task, int] = {}
+        loop = asyncio.get_running_loop()
+        next_index, next_start = 0, loop.time()
+
+        try:
+            while True:
+                for index, result in enumerate(results):
+                    if result is pending:
+                        break
+                    if result and result.lyrics:
+                        return result, True
+                else:
+                    answered = [result is not None for result in results]
+                    return None, any(answered) and all(
+                        done or self._stats[name].is_down for name, done in zip(order, answered)
+                    )
+
+                # Providers behind one that already has lyrics can never win
+                limit = next((index for index, result in enumerate(results) if result is not pending and result and result.lyrics), len(order))
+                if next_index < limit and (not tasks or loop.time() >= next_start):
+                    task = asyncio.create_task(self._attempt(order[next_index], title, artist, isrc))
+                    tasks[task] = next_index
+                    next_index += 1
+                    next_start = loop.time() + self.hedge_delay
+                    continue
+
+                timeout = max(0.0, next_start - loop.time()) if next_index < limit else None
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    results[tasks.pop(task)] = task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _lookup(self, keys: List[str], title: str, artist: str, isrc: Optional[str], preferred: Optional[str]) -> Optional[LyricsResult]:
+        found, result = await self.cache.get(keys)
+        if found:
+            return result
+
+        result, answered = await self._race(title, artist, isrc, self.order_for(preferred))
+        # A miss is only remembered when the providers settled it, see _race
+        if result or answered:
+            self.cache.put(keys, result)
+        return result
+
+    def _start(self, title: str, artist: str, isrc: Optional[str], preferred: Optional[str]) -> asyncio.Task:
+        # A preferred platform that changes the order gets its own entries, so it is never answered from another provider's
+        scope = preferred if preferred in LYRICS_PLATFORMS and self.order_for(preferred) != self.order else None
+        keys = self.cache.keys(title, artist, isrc, scope)
+        inflight_key = keys[0]
+        if not (task := self._inflight.get(inflight_key)):
+            task = self._inflight[inflight_key] = asyncio.create_task(self._lookup(keys, title, artist, isrc, preferred))
+            task.add_done_callback(lambda _: self._inflight.pop(inflight_key, None))
+        return task
+
+    async def resolve(
+        self,
+        title: str,
+        artist: str,
+        *,
+        isrc: Optional[str] = None,
+        preferred: Optional[str] = None
+    ) -> Optional[LyricsResult]:
+        """Returns the lyrics from the best provider that has them, or None."""
+        return await asyncio.shield(self._start(title, artist, isrc, preferred))
+
+    def prefetch(self, title: str, artist: str, *, isrc: Optional[str] = None) -> None:
+        """Warms the cache for a track in the background, e.g. the next one in the queue."""
+        if self.prefetch_enabled:
+            task = self._start(title, artist, isrc, None)
+            task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    async def close(self) -> None:
+        await LyricsPlatform.close_session()
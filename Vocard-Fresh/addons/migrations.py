@@ -0,0 +1,165 @@
+"""MIT License
+
+Copyright (c) 2023 - present Vocard Development
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import logging
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("vocard")
+
+SESSION_TTL = 24 * 60 * 60  # Sessions are only restored within minutes, a day leaves plenty of margin
+DAILY_QUEST_TTL = 7 * 24 * 60 * 60
+
+# Error codes returned when an index with the same name or keys exists with different options
+INDEX_CONFLICT_CODES = (85, 86)
+
+# collection -> indexes it needs
+INDEXES: Dict[str, List[IndexModel]] = {
+    "user_levels": [
+        IndexModel([("guild_id", ASCENDING), ("user_id", ASCENDING)], name="guild_user"),
+        IndexModel([("guild_id", ASCENDING), ("xp", DESCENDING)], name="guild_xp"),
+    ],
+    "daily_quests": [
+        IndexModel([("guild_id", ASCENDING), ("user_id", ASCENDING), ("date", ASCENDING)], name="guild_user_date"),
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=DAILY_QUEST_TTL),
+    ],
+    "daily_rewards": [
+        IndexModel([("guild_id", ASCENDING), ("user_id", ASCENDING)], name="guild_user"),
+    ],
+    "game_stats": [
+        IndexModel([("guild_id", ASCENDING), ("user_id", ASCENDING)], name="guild_user"),
+        IndexModel([("guild_id", ASCENDING), ("akinator_losses", DESCENDING)], name="guild_akinator_losses"),
+    ],
+    "sessions": [
+        IndexModel([("updated_at", ASCENDING)], name="updated_at_ttl", expireAfterSeconds=SESSION_TTL),
+    ],
+    "lyrics_cache": [
+        # Each entry carries its own expiry, found lyrics are kept longer than misses
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+# Query shapes the bot runs, checked with `explain` in benchmark mode
+QUERY_SHAPES: List[Dict[str, Any]] = [
+    {"collection": "user_levels", "filter": {"guild_id": "0", "user_id": "0"}},
+    {"collection": "user_levels", "filter": {"guild_id": "0", "xp": {"$gt": 0}}},
+    {"collection": "user_levels", "filter": {"guild_id": "0"}, "sort": {"xp": -1}, "limit": 10},
+    {"collection": "daily_quests", "filter": {"guild_id": "0", "user_id": "0", "date": "1970-01-01"}},
+    {"collection": "daily_rewards", "filter": {"guild_id": "0", "user_id": "0"}},
+    {"collection": "game_stats", "filter": {"guild_id": "0", "user_id": "0"}},
+    {"collection": "game_stats", "filter": {"guild_id": "0"}, "sort": {"akinator_losses": -1}, "limit": 10},
+    {"collection": "lyrics_cache", "filter": {"_id": {"$in": ["isrc:0", "q:0|0"]}}},
+]
+
+async def _create_indexes(collection, indexes: List[IndexModel]) -> List[str]:
+    created = []
+    for index in indexes:
+        try:
+            created.extend(await collection.create_indexes([index]))
+        except OperationFailure as e:
+            if e.code not in INDEX_CONFLICT_CODES:
+                raise
+
+            # The declaration changed (e.g. a new TTL), replace the old index
+            name = index.document["name"]
+            logger.info(f"Recreating index {collection.name}.{name} with its new options.")
+            try:
+                await collection.drop_index(name)
+            except OperationFailure:
+                # Same keys under another name
+                await collection.drop_index(list(index.document["key"].items()))
+            created.extend(await collection.create_indexes([index]))
+    return created
+
+async def _backfill(db) -> None:
+    # TTL indexes only expire documents with a date field, older documents only have the ISO day
+    await db["daily_quests"].update_many(
+        {"created_at": {"$exists": False}},
+        [{"$set": {"created_at": {"$dateFromString": {"dateString": "$date"}}}}]
+    )
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """Creates every declared index and returns the names per collection.
+
+    Safe to run on every start: existing indexes with the same definition are left
+    untouched, and a collection that fails does not stop the others.
+    """
+    report: Dict[str, List[str]] = {}
+    for name, indexes in INDEXES.items():
+        try:
+            report[name] = await _create_indexes(db[name], indexes)
+        except Exception as e:
+            logger.error(f"Failed to create the indexes of the {name} collection.", exc_info=e)
+
+    try:
+        await _backfill(db)
+    except Exception as e:
+        logger.error("Failed to backfill the daily quest dates.", exc_info=e)
+
+    return report
+
+def _stages(plan: Dict[str, Any]) -> List[str]:
+    stages = [plan.get("stage", "")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_stages(child))
+    return stages
+
+async def explain_queries(db, shapes: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """Runs `explain` on the registered query shapes and flags the risky ones.
+
+    A shape is risky when its winning plan scans the whole collection or sorts
+    in memory instead of reading an index in order.
+    """
+    results = []
+    for shape in shapes or QUERY_SHAPES:
+        command = {"find": shape["collection"], "filter": shape["filter"]}
+        if "sort" in shape:
+            command["sort"] = shape["sort"]
+        if "limit" in shape:
+            command["limit"] = shape["limit"]
+
+        explained = await db.command({"explain": command, "verbosity": "executionStats"})
+        stages = _stages(explained["queryPlanner"]["winningPlan"])
+        stats = explained.get("executionStats", {})
+
+        risks = []
+        if "COLLSCAN" in stages:
+            risks.append("collection scan")
+        if "SORT" in stages:
+            risks.append("in-memory sort")
+
+        results.append({
+            **shape,
+            "stages": stages,
+            "docs_examined": stats.get("totalDocsExamined", 0),
+            "keys_examined": stats.get("totalKeysExamined", 0),
+            "returned": stats.get("nReturned", 0),
+            "time_ms": stats.get("executionTimeMillis", 0),
+            "risks": risks
+        })
+    return results
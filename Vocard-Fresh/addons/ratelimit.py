@@ -0,0 +1,128 @@
+"""MIT License
+
+Copyright (c) 2023 - present Vocard Development
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import time
+
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float) -> None:
+        self.tokens: float = tokens
+        self.updated: float = updated
+
+class RateLimiter:
+    """A keyed token bucket rate limiter with bounded, self-pruning state.
+
+    Each key gets `capacity` tokens which refill continuously over `per` seconds.
+    Buckets are kept in least-recently-used order, so buckets that have been idle
+    long enough to be full again are dropped from the front on every access and the
+    number of tracked keys never exceeds `max_keys`.
+    """
+    def __init__(self, capacity: float, per: float, *, max_keys: int = 10_000) -> None:
+        self.capacity: float = capacity
+        self.per: float = per
+        self.rate: float = capacity / per
+        self.max_keys: int = max_keys
+
+        self._buckets: OrderedDict[Hashable, TokenBucket] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _refill(self, bucket: TokenBucket, now: float) -> None:
+        bucket.tokens = min(self.capacity, bucket.tokens + (now - bucket.updated) * self.rate)
+        bucket.updated = now
+
+    def _prune(self, now: float) -> None:
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if len(self._buckets) <= self.max_keys and now - bucket.updated < self.per:
+                break
+            del self._buckets[key]
+
+    def check(self, key: Hashable, cost: float = 1) -> float:
+        """Returns how many seconds the key has to wait before `cost` tokens are available, without consuming them."""
+        if cost <= 0 or not (bucket := self._buckets.get(key)):
+            return 0.0
+
+        tokens = min(self.capacity, bucket.tokens + (time.time() - bucket.updated) * self.rate)
+        return 0.0 if tokens >= cost else (cost - tokens) / self.rate
+
+    def hit(self, key: Hashable, cost: float = 1) -> float:
+        """Consumes `cost` tokens for the key.
+
+        Returns 0 when the request is allowed, otherwise the number of seconds to wait.
+        """
+        if cost <= 0:
+            return 0.0
+
+        now = time.time()
+        bucket = self._buckets.get(key)
+        if bucket:
+            self._refill(bucket, now)
+            self._buckets.move_to_end(key)
+        else:
+            bucket = self._buckets[key] = TokenBucket(self.capacity, now)
+            self._prune(now)
+
+        if bucket.tokens < cost:
+            return (cost - bucket.tokens) / self.rate
+
+        bucket.tokens -= cost
+        return 0.0
+
+    def reset(self, key: Optional[Hashable] = None) -> None:
+        """Resets a single key, or every key when none is given."""
+        if key is None:
+            self._buckets.clear()
+        else:
+            self._buckets.pop(key, None)
+
+class CooldownMap:
+    """Per-key cooldowns that forget keys once their cooldown is over.
+
+    Expired keys are dropped by `sweep`, which callers run periodically, so the map
+    only ever holds keys that are still cooling down.
+    """
+    def __init__(self) -> None:
+        self._expires: Dict[Hashable, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+    def hit(self, key: Hashable, seconds: float) -> bool:
+        """Starts a cooldown for the key. Returns False if it is still cooling down."""
+        now = time.monotonic()
+        if self._expires.get(key, 0.0) > now:
+            return False
+
+        self._expires[key] = now + seconds
+        return True
+
+    def sweep(self) -> None:
+        now = time.monotonic()
+        for key in [key for key, expires_at in self._expires.items() if expires_at <= now]:
+            del self._expires[key]
@@ -0,0 +1,412 @@
+"""MIT License
+
+Copyright (c) 2023 - present Vocard Development
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import multiprocessing
+
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from PIL import Image, ImageDraw, ImageFont
+from functools import lru_cache
+from typing import Any, Callable, Deque, Hashable, Optional, Tuple, Union
+
+logger = logging.getLogger("vocard")
+
+# ========== RENDER FUNCTIONS ==========
+# These run in the worker processes: they take plain values and raw image bytes
+# and return the encoded image, so nothing but bytes crosses the process boundary.
+
+FONT_SIZES = (18, 22, 24, 32, 48)
+MAX_DECODED_BYTES = 24 * 1024 * 1024  # per worker
+
+# (content digest, size, circular) -> decoded image, shared by every render in this process.
+# Cached images are never drawn on, callers paste them or derive new images from them.
+_decoded: OrderedDict[Tuple[bytes, Any, bool], Image.Image] = OrderedDict()
+_decoded_size: int = 0
+
+# Pre-rendered welcome card backgrounds, see render_welcome_card
+MAX_WELCOME_BASES = 16
+_welcome_bases: OrderedDict[Hashable, Image.Image] = OrderedDict()
+
+@lru_cache(maxsize=None)
+def _font(size: int) -> ImageFont.ImageFont:
+    try:
+        return ImageFont.truetype("arial.ttf", size)
+    except Exception:
+        return ImageFont.load_default()
+
+def _fonts(*sizes: int) -> Tuple[ImageFont.ImageFont, ...]:
+    return tuple(_font(size) for size in sizes)
+
+def preload_fonts() -> None:
+    """Loads every font size used by the cards, run once in each worker."""
+    for size in FONT_SIZES:
+        _font(size)
+
+def _decode(data: bytes, size: Optional[Tuple[int, int]]) -> Optional[Image.Image]:
+    try:
+        image = Image.open(io.BytesIO(data)).convert("RGBA")
+    except Exception:
+        return None
+    return image.resize(size, Image.Resampling.LANCZOS) if size else image
+
+def _open(data: Optional[bytes], size: Union[int, Tuple[int, int], None] = None, circle: bool = False) -> Optional[Image.Image]:
+    """Decodes an image, resized and optionally cut to a circle, reusing earlier results for the same content."""
+    global _decoded_size
+    if not data:
+        return None
+
+    if isinstance(size, int):
+        size = (size, size)
+    key = (hashlib.blake2b(data, digest_size=16).digest(), size, circle)
+    if (image := _decoded.get(key)) is not None:
+        _decoded.move_to_end(key)
+        return image
+
+    if (image := _decode(data, size)) is None:
+        return None
+    if circle:
+        image = _circle(image, image.width)
+
+    _decoded[key] = image
+    _decoded_size += image.width * image.height * 4
+    while _decoded_size > MAX_DECODED_BYTES and len(_decoded) > 1:
+        _, evicted = _decoded.popitem(last=False)
+        _decoded_size -= evicted.width * evicted.height * 4
+    return image
+
+def _circle(image: Image.Image, size: int) -> Image.Image:
+    if image.size != (size, size):
+        image = image.resize((size, size), Image.Resampling.LANCZOS)
+
+    mask = Image.new("L", (size, size), 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, size, size), fill=255)
+
+    output = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    output.paste(image, (0, 0), mask)
+    return output
+
+def _draw_centered(draw: ImageDraw.ImageDraw, width: int, y: int, text: str, font: ImageFont.ImageFont, fill: Any) -> None:
+    bbox = draw.textbbox((0, 0), text, font=font)
+    draw.text(((width - (bbox[2] - bbox[0])) // 2, y), text, fill=fill, font=font)
+
+def render_rank_card(avatar: Optional[bytes], name: str, xp: int, level: int, rank: int, current_xp: int, next_xp: int) -> bytes:
+    """Renders the /rank card as JPEG."""
+    width, height = 800, 250
+
+    # Dark background
+    card = Image.new("RGB", (width, height), (32, 34, 37))
+    draw = ImageDraw.Draw(card)
+
+    # Draw accent bar at top
+    draw.rectangle([(0, 0), (width, 8)], fill=(88, 101, 242))  # Discord blurple
+
+    if circular_avatar := _open(avatar, 120, circle=True):
+        card.paste(circular_avatar, (30, 65), circular_avatar)
+
+    name_font, level_font, small_font = _fonts(32, 24, 18)
+
+    # Username
+    draw.text((170, 60), name[:20], fill="white", font=name_font)
+
+    # Rank and Level badges
+    draw.text((170, 100), f"Rank #{rank}", fill=(180, 180, 180), font=level_font)
+    draw.text((320, 100), f"Level {level}", fill=(88, 101, 242), font=level_font)
+
+    # XP Progress
+    progress = current_xp / next_xp if next_xp > 0 else 0
+    bar_x, bar_y = 170, 160
+    bar_width, bar_height = 580, 30
+    draw.rounded_rectangle([(bar_x, bar_y), (bar_x + bar_width, bar_y + bar_height)], radius=15, fill=(64, 68, 75))
+
+    fill_width = int(bar_width * progress)
+    if fill_width > 0:
+        draw.rounded_rectangle([(bar_x, bar_y), (bar_x + fill_width, bar_y + bar_height)], radius=15, fill=(88, 101, 242))
+
+    # XP text
+    xp_text = f"{current_xp:,} / {next_xp:,} XP"
+    bbox = draw.textbbox((0, 0), xp_text, font=small_font)
+    draw.text((bar_x + bar_width - (bbox[2] - bbox[0]), bar_y + bar_height + 8), xp_text, fill=(180, 180, 180), font=small_font)
+
+    # Total XP
+    draw.text((bar_x, bar_y + bar_height + 8), f"Total: {xp:,} XP", fill=(120, 120, 120), font=small_font)
+
+    buffer = io.BytesIO()
+    card.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+def _welcome_base(background: Optional[bytes], key: Optional[Hashable]) -> Image.Image:
+    """The part of the welcome card that is the same for every member of a guild."""
+    if key is not None and (base := _welcome_bases.get(key)) is not None:
+        _welcome_bases.move_to_end(key)
+        return base
+
+    width, height = 800, 350
+
+    image = _open(background, (width, height))
+
+    # Fallback plain background
+    base = image or Image.new("RGBA", (width, height), (47, 49, 54, 255))
+
+    # Darken for text visibility
+    base = Image.alpha_composite(base, Image.new("RGBA", (width, height), (0, 0, 0, 100)))
+    _draw_centered(ImageDraw.Draw(base), width, 210, "Welcome!", _font(48), "white")
+
+    # A failed download only gets the fallback for this card, not for the whole guild
+    if key is not None and image is not None:
+        _welcome_bases[key] = base
+        while len(_welcome_bases) > MAX_WELCOME_BASES:
+            _welcome_bases.popitem(last=False)
+    return base
+
+def render_welcome_card(background: Optional[bytes], avatar: Optional[bytes], username: str, sub_text: str, base_key: Optional[Hashable] = None) -> bytes:
+    """Renders the welcome card as JPEG.
+
+    With a `base_key`, the background layer is built once per key and reused, so
+    each join only adds the avatar and text. The key must change whenever the
+    background or the card settings do.
+    """
+    width = 800
+    card = _welcome_base(background, base_key).copy()
+
+    if circular_avatar := _open(avatar, 150, circle=True):
+        # Add border
+        border_size = circular_avatar.width + 10
+        bordered = Image.new("RGBA", (border_size, border_size), (0, 0, 0, 0))
+        ImageDraw.Draw(bordered).ellipse((0, 0, border_size, border_size), fill=(47, 49, 54, 255))
+        bordered.paste(circular_avatar, (5, 5), circular_avatar)
+
+        # Center avatar horizontally
+        card.paste(bordered, ((width - bordered.width) // 2, 30), bordered)
+
+    draw = ImageDraw.Draw(card)
+    name_font, sub_font = _fonts(32, 22)
+
+    _draw_centered(draw, width, 270, username[:25], name_font, "white")
+    if len(sub_text) > 50:
+        sub_text = sub_text[:47] + "..."
+    _draw_centered(draw, width, 310, sub_text, sub_font, (180, 180, 180))
+
+    buffer = io.BytesIO()
+    card.convert("RGB").save(buffer, format="JPEG", quality=85, optimize=True)
+    return buffer.getvalue()
+
+def render_bonk_image(bonker_avatar: bytes, bonked_avatar: bytes, bonker_name: str, bonked_name: str) -> Optional[bytes]:
+    """Renders the bonk scene as PNG."""
+    bonker_circle, bonked_resized = _open(bonker_avatar, 150, circle=True), _open(bonked_avatar, (140, 100))
+    if not bonker_circle or not bonked_resized:
+        return None
+
+    width, height = 600, 300
+    canvas = Image.new("RGBA", (width, height), (54, 57, 63, 255))  # Discord dark bg
+
+    # Bonker on the left, larger
+    canvas.paste(bonker_circle, (50, 80), bonker_circle)
+
+    # Bonked on the right, with squished effect
+    bonked_circle = _circle(bonked_resized.resize((140, 140)), 140)
+    canvas.paste(bonked_circle, (380, 100), bonked_circle)
+
+    draw = ImageDraw.Draw(canvas)
+    font, font_small = _fonts(48, 24)
+
+    # Main BONK text
+    draw.text((250, 30), "BONK!", fill=(255, 255, 0), font=font, stroke_width=3, stroke_fill=(0, 0, 0))
+
+    # Bat and impact
+    draw.line([(180, 100), (350, 150)], fill=(139, 90, 43), width=12)
+    draw.ellipse([(340, 140), (370, 170)], fill=(255, 100, 100))
+
+    # Names
+    draw.text((60, 240), bonker_name[:15], fill=(255, 255, 255), font=font_small)
+    draw.text((400, 250), bonked_name[:15], fill=(255, 255, 255), font=font_small)
+
+    buffer = io.BytesIO()
+    canvas.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def _warm_up() -> None:
+    pass
+
+# ========== RENDERER ==========
+
+class RendererBusy(Exception):
+    """Raised when the render queue, or a guild's share of it, is full."""
+    def __init__(self) -> None:
+        super().__init__("Too many images are being rendered right now, try again in a moment.")
+
+# (function, args, caller's future, pool failures so far)
+Job = Tuple[Callable[..., Any], Tuple[Any, ...], asyncio.Future, int]
+
+# A job whose pool broke under it is retried once on the replacement pool
+MAX_POOL_FAILURES = 1
+
+class ImageRenderer:
+    """Runs render functions in a pool of worker processes.
+
+    Jobs are queued per guild and handed to the pool round-robin across guilds,
+    so a member-join burst in one server can't starve `/rank` everywhere else.
+    The number of queued jobs is capped overall and per guild; past that,
+    `render` raises `RendererBusy` instead of letting the backlog grow.
+    """
+    def __init__(
+        self,
+        *,
+        workers: int = 2,
+        max_pending: int = 64,
+        max_per_guild: int = 8,
+        processes: bool = True
+    ) -> None:
+        self.workers: int = max(1, workers)
+        self.max_pending: int = max_pending
+        self.max_per_guild: int = max_per_guild
+        self.processes: bool = processes
+
+        self._executor: Optional[Executor] = None
+        self._queues: OrderedDict[int, Deque[Job]] = OrderedDict()
+        self._pending: int = 0
+        self._running: int = 0
+
+    def _create_executor(self, rebuild: bool = False) -> Executor:
+        if not self.processes:
+            return ThreadPoolExecutor(self.workers, thread_name_prefix="renderer")
+
+        # Forking keeps the workers light, spawning would re-import the whole bot in each of them.
+        # A rebuilt pool is created while the bot's threads are running, where forking is unsafe,
+        # so it pays for a clean interpreter instead.
+        methods = multiprocessing.get_all_start_methods()
+        if rebuild:
+            method = "forkserver" if "forkserver" in methods else "spawn"
+        else:
+            method = "fork" if "fork" in methods else None
+        return ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(method), initializer=preload_fonts)
+
+    def start(self) -> None:
+        """Starts the workers now rather than on the first render."""
+        if self._executor is None:
+            self._executor = self._create_executor()
+            self._executor.submit(_warm_up)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+        # Nothing will pick up the queued jobs anymore
+        for queue in self._queues.values():
+            for _, _, future, _ in queue:
+                if not future.done():
+                    future.set_exception(RendererBusy())
+        self._queues.clear()
+        self._pending = 0
+
+    @property
+    def stats(self) -> dict:
+        return {"running": self._running, "pending": self._pending, "guilds": len(self._queues)}
+
+    async def render(self, guild_id: int, function: Callable[..., Any], *args: Any) -> Any:
+        """Runs `function(*args)` in the pool and returns its result."""
+        queue = self._queues.get(guild_id)
+        if self._pending >= self.max_pending or (queue and len(queue) >= self.max_per_guild):
+            raise RendererBusy()
+
+        if queue is None:
+            queue = self._queues[guild_id] = deque()
+
+        future = asyncio.get_running_loop().create_future()
+        queue.append((function, args, future, 0))
+        self._pending += 1
+        self._dispatch()
+        return await future
+
+    def _dispatch(self) -> None:
+        if not self._queues:
+            return
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        while self._running < self.workers and self._queues:
+            # Take one job from the guild at the front, then send that guild to the back
+            guild_id, queue = next(iter(self._queues.items()))
+            function, args, future, failures = queue.popleft()
+            if queue:
+                self._queues.move_to_end(guild_id)
+            else:
+                del self._queues[guild_id]
+            self._pending -= 1
+
+            if future.cancelled():
+                continue
+
+            executor = self._executor
+            try:
+                job = loop.run_in_executor(executor, function, *args)
+            except BrokenProcessPool:
+                self._replace(executor)
+                executor = self._executor
+                job = loop.run_in_executor(executor, function, *args)
+
+            self._running += 1
+            job.add_done_callback(
+                lambda job, guild_id=guild_id, entry=(function, args, future, failures), executor=executor:
+                    self._finish(job, guild_id, entry, executor)
+            )
+
+    def _replace(self, executor: Executor) -> None:
+        """Replaces the pool if `executor` is still the current one.
+
+        Jobs of a broken pool fail one by one, only the first failure rebuilds it,
+        later ones must not tear down the replacement and the jobs queued on it.
+        """
+        if executor is not self._executor:
+            return
+
+        # A worker died (e.g. killed for memory), its pool can't take new jobs
+        logger.warning("Image renderer pool broke, restarting it.")
+        executor.shutdown(wait=False)
+        self._executor = self._create_executor(rebuild=True)
+
+    def _finish(self, job: asyncio.Future, guild_id: int, entry: Job, executor: Executor) -> None:
+        self._running -= 1
+        function, args, future, failures = entry
+        if not future.cancelled():
+            # Only a pool going away cancels a job, treat it like the pool breaking
+            if job.cancelled() or isinstance(job.exception(), BrokenProcessPool):
+                if self._executor is None:
+                    future.set_exception(RendererBusy())
+                elif failures < MAX_POOL_FAILURES:
+                    self._replace(executor)
+                    # Back to the front of its guild's queue, it already waited its turn
+                    self._queues.setdefault(guild_id, deque()).appendleft((function, args, future, failures + 1))
+                    self._pending += 1
+                else:
+                    future.set_exception(RendererBusy())
+            elif (error := job.exception()) is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(job.result())
+        self._dispatch()
@@ -0,0 +1,136 @@
+"""MIT License
+
+Copyright (c) 2023 - present Vocard Development
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import logging
+import time
+import voicelink
+
+from discord import VoiceChannel
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("vocard")
+
+class RestoreReport:
+    def __init__(self) -> None:
+        self.restored: int = 0
+        self.failed: int = 0
+        self.skipped: int = 0
+        self.elapsed: float = 0.0
+
+    def __str__(self) -> str:
+        return f"restored {self.restored}, failed {self.failed}, skipped {self.skipped} session(s) in {self.elapsed:.2f}s"
+
+class SessionRestorer:
+    """Restores saved player sessions concurrently.
+
+    Sessions whose voice channel has the most listeners are started first, and at
+    most `per_node` restorations run at the same time for each connected Lavalink
+    node. Every track id across all sessions is decoded once, in bulk, off the event
+    loop before any player is created.
+    """
+    def __init__(self, *, per_node: int = 4, node_timeout: float = 30.0) -> None:
+        self.per_node: int = per_node
+        self.node_timeout: float = node_timeout
+
+    @staticmethod
+    def listeners(channel: VoiceChannel) -> int:
+        """Counts the members in the channel who can actually hear the music."""
+        return sum(1 for member in channel.members if not member.bot and not (member.voice and member.voice.self_deaf))
+
+    @staticmethod
+    def _decode_all(track_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        decoded = {}
+        for track_id in track_ids:
+            try:
+                decoded[track_id] = voicelink.decode(track_id)
+            except Exception:
+                continue
+        return decoded
+
+    async def decode_tracks(self, track_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Decodes every unique track id in a worker thread."""
+        return await asyncio.to_thread(self._decode_all, list(dict.fromkeys(track_ids)))
+
+    async def _wait_for_nodes(self) -> int:
+        deadline = time.monotonic() + self.node_timeout
+        while True:
+            connected = sum(1 for node in voicelink.NodePool._nodes.values() if node.is_connected)
+            if connected or time.monotonic() >= deadline:
+                return connected
+            await asyncio.sleep(1)
+
+    async def run(
+        self,
+        sessions: List[Dict[str, Any]],
+        *,
+        get_channel: Callable[[Dict[str, Any]], Optional[VoiceChannel]],
+        get_track_ids: Callable[[Dict[str, Any]], Iterable[str]],
+        restore: Callable[[Dict[str, Any], VoiceChannel, Dict[str, Dict[str, Any]]], Awaitable[bool]]
+    ) -> RestoreReport:
+        """Restores the given sessions and reports how many succeeded.
+
+        `restore` receives the session, its voice channel and the shared map of
+        decoded tracks, and returns whether the player was restored.
+        """
+        report = RestoreReport()
+        started_at = time.perf_counter()
+
+        jobs: List[Tuple[int, Dict[str, Any], VoiceChannel]] = []
+        for data in sessions:
+            channel = get_channel(data)
+            if not channel or not (listeners := self.listeners(channel)):
+                report.skipped += 1
+                continue
+            jobs.append((listeners, data, channel))
+
+        if not jobs:
+            report.elapsed = time.perf_counter() - started_at
+            return report
+
+        jobs.sort(key=lambda job: job[0], reverse=True)
+        decoded = await self.decode_tracks(track_id for _, data, _ in jobs for track_id in get_track_ids(data))
+
+        nodes = await self._wait_for_nodes()
+        if not nodes:
+            logger.warning("No Lavalink node connected, sessions will be restored one at a time.")
+        semaphore = asyncio.Semaphore(max(1, nodes * self.per_node))
+
+        async def worker(data: Dict[str, Any], channel: VoiceChannel) -> None:
+            async with semaphore:
+                try:
+                    success = await restore(data, channel, decoded)
+                except Exception as e:
+                    logger.error(f"Error encountered while restoring a player for channel ID {channel.id}.", exc_info=e)
+                    success = False
+
+            if success:
+                report.restored += 1
+            else:
+                report.failed += 1
+
+        # Tasks are created in priority order, so the semaphore hands out slots to the busiest channels first
+        await asyncio.gather(*[worker(data, channel) for _, data, channel in jobs])
+
+        report.elapsed = time.perf_counter() - started_at
+        return report
@@ -87,6 +87,8 @@ class Settings:
         self.voice_status_template: str = settings.get("default_voice_status_template", "")
         self.lyrics_platform: str = settings.get("lyrics_platform", "A_ZLyrics").lower()
         self.ipc_client: Dict[str, Union[str, bool, int]] = settings.get("ipc_client", {})
+        self.image_renderer: Dict[str, Union[bool, int]] = settings.get("image_renderer", {})
+        self.lyrics_resolver: Dict[str, Any] = settings.get("lyrics_resolver", {})
         self.version: str = settings.get("version", "")
 
     def _load_nodes(self, fallback_nodes: Dict) -> Dict[str, Dict[str, Union[str, int, bool]]]:
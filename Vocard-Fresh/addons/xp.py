@@ -0,0 +1,196 @@
+"""MIT License
+
+Copyright (c) 2023 - present Vocard Development
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import logging
+
+from collections import OrderedDict
+from pymongo import UpdateOne
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger("vocard")
+
+XPKey = Tuple[int, int]  # (guild id, user id)
+LevelUpCallback = Callable[[int, int], Awaitable[None]]  # (old level, new level)
+UpdateCallback = Callable[[XPKey, "XPRecord"], None]
+
+class XPRecord:
+    __slots__ = ("xp", "level", "messages")
+
+    def __init__(self, xp: int = 0, level: int = 0, messages: int = 0) -> None:
+        self.xp: int = xp
+        self.level: int = level
+        self.messages: int = messages
+
+class XPEngine:
+    """Write-behind XP store for the leveling system.
+
+    Records of active users are kept in memory and awarded XP is applied to them
+    right away, so level-ups are computed locally. The increments are collected per
+    user and written to Mongo as one bulk `$inc` per flush. A user that is not cached
+    yet is loaded in the background; the award is kept pending meanwhile, so handling
+    a message never waits on the database.
+    """
+    def __init__(
+        self,
+        get_collection: Callable[[], Any],
+        level_for: Callable[[int], int],
+        *,
+        max_cached: int = 50_000
+    ) -> None:
+        self._get_collection: Callable[[], Any] = get_collection
+        self._level_for: Callable[[int], int] = level_for
+        self.max_cached: int = max_cached
+
+        self._records: OrderedDict[XPKey, XPRecord] = OrderedDict()
+        self._pending: Dict[XPKey, XPRecord] = {}
+        self._flushing: Dict[XPKey, XPRecord] = {}  # increments of the bulk write in flight
+        self._loading: Dict[XPKey, asyncio.Task] = {}
+        self._flush_lock: asyncio.Lock = asyncio.Lock()
+
+        # Called whenever the XP of a record changes, e.g. to keep leaderboards in sync
+        self.on_update: Optional[UpdateCallback] = None
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @staticmethod
+    def _filter(key: XPKey) -> Dict[str, str]:
+        return {"guild_id": str(key[0]), "user_id": str(key[1])}
+
+    def _cache(self, key: XPKey, record: XPRecord) -> None:
+        self._records[key] = record
+        self._records.move_to_end(key)
+
+        # Only records without unwritten increments can be dropped
+        while len(self._records) > self.max_cached:
+            for old_key in self._records:
+                if old_key not in self._pending and old_key not in self._flushing and old_key not in self._loading:
+                    del self._records[old_key]
+                    break
+            else:
+                break
+
+    async def _load(self, key: XPKey) -> XPRecord:
+        # A read racing the bulk write may or may not see its increment, so let it land first
+        if key in self._flushing:
+            async with self._flush_lock:
+                pass
+
+        data = await self._get_collection().find_one(self._filter(key)) or {}
+        record = XPRecord(data.get("xp", 0), data.get("level", 0), data.get("messages", 0))
+
+        # Awards made while loading are not in the database yet, apply them on top
+        if pending := self._pending.get(key):
+            record.xp += pending.xp
+            record.messages += pending.messages
+        self._cache(key, record)
+        return record
+
+    async def get(self, guild_id: int, user_id: int) -> XPRecord:
+        """Returns the up-to-date record of a user, loading it if needed."""
+        key = (guild_id, user_id)
+        if record := self._records.get(key):
+            self._records.move_to_end(key)
+            return record
+
+        if not (task := self._loading.get(key)):
+            task = self._loading[key] = asyncio.create_task(self._load(key))
+            task.add_done_callback(lambda _: self._loading.pop(key, None))
+        return await asyncio.shield(task)
+
+    def cached(self, guild_id: int) -> Iterator[Tuple[int, XPRecord]]:
+        """Yields the cached records of a guild as `(user_id, record)`."""
+        for (record_guild_id, user_id), record in list(self._records.items()):
+            if record_guild_id == guild_id:
+                yield user_id, record
+
+    def _update_level(self, key: XPKey, record: XPRecord, on_level_up: Optional[LevelUpCallback]) -> None:
+        if self.on_update:
+            self.on_update(key, record)
+
+        old_level = record.level
+        record.level = self._level_for(record.xp)
+        if record.level > old_level and on_level_up:
+            asyncio.create_task(on_level_up(old_level, record.level))
+
+    def award(self, guild_id: int, user_id: int, xp: int, *, messages: int = 0, on_level_up: Optional[LevelUpCallback] = None) -> None:
+        """Adds XP without waiting for the database; `on_level_up` runs as a task if the level goes up."""
+        key = (guild_id, user_id)
+        pending = self._pending.setdefault(key, XPRecord())
+        pending.xp += xp
+        pending.messages += messages
+
+        if record := self._records.get(key):
+            record.xp += xp
+            record.messages += messages
+            self._records.move_to_end(key)
+            return self._update_level(key, record, on_level_up)
+
+        async def load_then_apply() -> None:
+            try:
+                record = await self.get(guild_id, user_id)
+            except Exception as e:
+                return logger.error(f"Failed to load the XP of user {user_id} in guild {guild_id}.", exc_info=e)
+            self._update_level(key, record, on_level_up)
+
+        asyncio.create_task(load_then_apply())
+
+    async def write(self, guild_id: int, user_id: int, update: Dict[str, Any]) -> None:
+        """Writes an arbitrary update straight to the database, e.g. an admin setting a level."""
+        key = (guild_id, user_id)
+        await self.flush(key)
+        await self._get_collection().update_one(self._filter(key), update, upsert=True)
+        self._records.pop(key, None)
+
+        if self.on_update:
+            self.on_update(key, await self.get(guild_id, user_id))
+
+    async def flush(self, only: Optional[XPKey] = None) -> int:
+        """Writes the pending increments as one bulk write and returns how many users were written."""
+        async with self._flush_lock:
+            keys = [key for key in self._pending if key not in self._loading and (only is None or key == only)]
+            if not keys:
+                return 0
+
+            batch = self._flushing = {key: self._pending.pop(key) for key in keys}
+            operations = []
+            for key, delta in batch.items():
+                update = {"$inc": {"xp": delta.xp, "messages": delta.messages}}
+                if record := self._records.get(key):
+                    update["$set"] = {"level": record.level}
+                operations.append(UpdateOne(self._filter(key), update, upsert=True))
+
+            try:
+                await self._get_collection().bulk_write(operations, ordered=False)
+            except Exception as e:
+                logger.error(f"Failed to write the XP of {len(batch)} user(s).", exc_info=e)
+                for key, delta in batch.items():
+                    pending = self._pending.setdefault(key, XPRecord())
+                    pending.xp += delta.xp
+                    pending.messages += delta.messages
+                return 0
+            finally:
+                self._flushing = {}
+
+            return len(batch)
@@ -22,6 +22,7 @@ SOFTWARE.
 """
 
 import discord, voicelink, re
+import function as func
 
 from io import StringIO
 from discord import app_commands
@@ -41,7 +42,6 @@ from function import (
 )
 
 from voicelink import SearchType, LoopType
-from addons import LYRICS_PLATFORMS
 from views import SearchView, ListView, LinkView, LyricsView, HelpView
 from validators import url
 
@@ -604,34 +604,15 @@ class Basic(commands.Cog):
             
             title = player.current.title
             artist = player.current.author
-       
-        # Import lyrics providers
-        from addons.lyrics import LYRICS_PLATFORMS
-        
-        # Define fallback order (try all sources)
-        fallback_order = ["lrclib", "genius", "lyrist", "musixmatch", "a_zlyrics"]
-        
-        lyrics_result = None
-        successful_platform = None
-        
-        # Try each lyrics platform in order until one succeeds
-        for platform_name in fallback_order:
-            try:
-                lyrics_platform = LYRICS_PLATFORMS.get(platform_name)
-                if not lyrics_platform:
-                    continue
-                
-                lyrics_result = await lyrics_platform().get_lyrics(title, artist)
-                if lyrics_result:
-                    successful_platform = platform_name
-                    break
-            except Exception as e:
-                # Log error but continue to next platform
-                logger.debug(f"Lyrics platform {platform_name} failed: {e}")
-                continue
-        
+            isrc = player.current.info.get("isrc")
+        else:
+            isrc = None
+
+        # Ask every source in parallel, the best one that has lyrics wins
+        resolved = await func.LYRICS.resolve(title, artist, isrc=isrc)
+
         # If all platforms failed, send sad Cheems GIF
-        if not lyrics_result:
+        if not resolved:
             import aiohttp
             tenor_api_key = getattr(settings, 'tenor_key', None)
             
@@ -660,10 +641,9 @@ class Basic(commands.Cog):
             return await send(ctx, "lyricsNotFound", ephemeral=True)
         
         # Display lyrics with view
-        from views.lyrics import LyricsView
         view = LyricsView(
-            name=f"{title} (via {successful_platform.title()})", 
-            source={_: re.findall(r'.*\n(?:.*\n){,22}', v or "") for _, v in lyrics_result.items()}, 
+            name=f"{title} (via {resolved.platform.title()})",
+            source={_: re.findall(r'.*\n(?:.*\n){,22}', v or "") for _, v in resolved.lyrics.items()},
             author=ctx.author
         )
         view.response = await send(ctx, view.build_embed(), view=view)
@@ -682,6 +662,7 @@ class Basic(commands.Cog):
 
         check = not player.settings.get("autoplay", False)
         player.settings['autoplay'] = check
+        player.mark_dirty()
         await send(ctx, "autoplay", await get_lang(ctx.guild.id, "enabled" if check else "disabled"))
 
         if not player.is_playing:
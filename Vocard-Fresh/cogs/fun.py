@@ -21,9 +21,10 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import asyncio
 import discord
 import aiohttp
-
+import io
 import random
 import function as func
 
@@ -31,6 +32,7 @@ from discord import app_commands
 from discord.ext import commands
 
 from typing import Optional
+from addons.renderer import render_bonk_image
 from cogs.cheems import CheemsProcessor
 
 class Fun(commands.Cog):
@@ -416,11 +418,7 @@ class Fun(commands.Cog):
     async def get_avatar(self, user: discord.User) -> bytes:
         """Download user's avatar."""
         session = await self.get_session()
-        avatar_url = user.display_avatar.with_size(256).url
-        async with session.get(avatar_url) as resp:
-            if resp.status == 200:
-                return await resp.read()
-        return None
+        return await func.ASSETS.fetch(session, user.display_avatar.with_size(256).url)
     
     async def fetch_tenor_gif(self, search_term: str, limit: int = 20) -> str:
         """Fetch a random GIF from Tenor API."""
@@ -462,69 +460,18 @@ class Fun(commands.Cog):
         
         return None
     
-    async def create_bonk_image(self, bonker: discord.User, bonked: discord.User):
+    async def create_bonk_image(self, bonker: discord.User, bonked: discord.User, guild_id: int = 0):
         """Create a bonk image with two users."""
         try:
-            # Get avatars
-            bonker_avatar = await self.get_avatar(bonker)
-            bonked_avatar = await self.get_avatar(bonked)
-            
+            bonker_avatar, bonked_avatar = await asyncio.gather(self.get_avatar(bonker), self.get_avatar(bonked))
             if not bonker_avatar or not bonked_avatar:
                 return None
             
-            # Load avatars as PIL images
-            bonker_img = Image.open(io.BytesIO(bonker_avatar)).convert("RGBA")
-            bonked_img = Image.open(io.BytesIO(bonked_avatar)).convert("RGBA")
-            
-            # Create circular mask
-            def make_circle(img, size):
-                img = img.resize((size, size), Image.Resampling.LANCZOS)
-                mask = Image.new("L", (size, size), 0)
-                draw = ImageDraw.Draw(mask)
-                draw.ellipse((0, 0, size, size), fill=255)
-                output = Image.new("RGBA", (size, size), (0, 0, 0, 0))
-                output.paste(img, mask=mask)
-                return output
-            
-            # Create the bonk scene
-            width, height = 600, 300
-            canvas = Image.new("RGBA", (width, height), (54, 57, 63, 255))  # Discord dark bg
-            
-            # Add bonker (Cheems with bat) on left - larger
-            bonker_circle = make_circle(bonker_img, 150)
-            canvas.paste(bonker_circle, (50, 80), bonker_circle)
-            
-            # Add bonked (victim) on right - with squished effect
-            bonked_resized = bonked_img.resize((140, 100), Image.Resampling.LANCZOS)
-            bonked_circle = make_circle(bonked_resized.resize((140, 140)), 140)
-            canvas.paste(bonked_circle, (380, 100), bonked_circle)
-            
-            # Add "BONK!" text
-            draw = ImageDraw.Draw(canvas)
-            try:
-                font = ImageFont.truetype("arial.ttf", 48)
-                font_small = ImageFont.truetype("arial.ttf", 24)
-            except:
-                font = ImageFont.load_default()
-                font_small = font
-            
-            # Main BONK text
-            draw.text((250, 30), "BONK!", fill=(255, 255, 0), font=font, stroke_width=3, stroke_fill=(0, 0, 0))
-            
-            # Add bat/stick effect line
-            draw.line([(180, 100), (350, 150)], fill=(139, 90, 43), width=12)
-            draw.ellipse([(340, 140), (370, 170)], fill=(255, 100, 100))  # Impact
-            
-            # Add names
-            draw.text((60, 240), bonker.display_name[:15], fill=(255, 255, 255), font=font_small)
-            draw.text((400, 250), bonked.display_name[:15], fill=(255, 255, 255), font=font_small)
-            
-            # Save to bytes
-            output = io.BytesIO()
-            canvas.save(output, format="PNG")
-            output.seek(0)
-            
-            return output
+            data = await func.RENDERER.render(
+                guild_id, render_bonk_image,
+                bonker_avatar, bonked_avatar, bonker.display_name, bonked.display_name
+            )
+            return io.BytesIO(data) if data else None
             
         except Exception as e:
             func.logger.error(f"[BONK] Error creating image: {e}")
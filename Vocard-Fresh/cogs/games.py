@@ -10,6 +10,7 @@ import asyncio
 from typing import Optional, List
 import function as func
 from datetime import datetime, timedelta
+from pymongo import ReturnDocument
 import random
 
 # Auto-deployment test trigger - Auto-Update Watchdog Test
@@ -50,6 +51,60 @@ ACHIEVEMENTS = {
     "quick_win": {"name": "⚡ Speed Demon", "desc": "Beat Cheems in under 10 questions", "requirement": 10},
 }
 
+# Counter each achievement is unlocked by, None for achievements decided by the game itself
+ACHIEVEMENT_COUNTERS = {
+    "first_game": ("akinator_games", 1),
+    "games_10": ("akinator_games", 10),
+    "games_50": ("akinator_games", 50),
+    "win_5": ("akinator_losses", 5),  # User wins = Cheems losses
+    "win_10": ("akinator_losses", 10),
+    "win_25": ("akinator_losses", 25),
+    "streak_3": ("current_streak", 3),
+    "streak_5": ("current_streak", 5),
+    "quick_win": None,
+}
+
+
+def _field_or_zero(field: str) -> dict:
+    return {"$ifNull": [f"${field}", 0]}
+
+
+def build_stats_update(won: bool, questions: int = 0) -> list:
+    """Build the update pipeline recording one Akinator game.
+    
+    Counters, streaks and achievements are all computed by the server from the
+    stored document, so concurrent games never overwrite each other. Achievements
+    unlocked by this game are stored in `last_unlocked`.
+    """
+    stat_field = "akinator_wins" if won else "akinator_losses"
+    quick_win = not won and questions < 10
+    
+    def unlocked(key: str) -> dict:
+        not_yet = {"$not": [{"$in": [key, {"$ifNull": ["$achievements", []]}]}]}
+        if ACHIEVEMENT_COUNTERS[key] is None:
+            reached = quick_win
+        else:
+            field, requirement = ACHIEVEMENT_COUNTERS[key]
+            reached = {"$gte": [f"${field}", requirement]}
+        return {"$cond": [{"$and": [not_yet, reached]}, [key], []]}
+    
+    return [
+        {"$set": {
+            stat_field: {"$add": [_field_or_zero(stat_field), 1]},
+            "akinator_games": {"$add": [_field_or_zero("akinator_games"), 1]},
+            # User streak, not Cheems
+            "current_streak": 0 if won else {"$add": [_field_or_zero("current_streak"), 1]},
+            "last_played": datetime.now().isoformat()
+        }},
+        {"$set": {
+            "best_streak": {"$max": [_field_or_zero("best_streak"), "$current_streak"]},
+            "last_unlocked": {"$concatArrays": [unlocked(key) for key in ACHIEVEMENT_COUNTERS]}
+        }},
+        {"$set": {
+            "achievements": {"$concatArrays": [{"$ifNull": ["$achievements", []]}, "$last_unlocked"]}
+        }}
+    ]
+
 
 def get_progress_bar(progression: float) -> str:
     """Create a visual progress bar for confidence level"""
@@ -202,62 +257,15 @@ class Games(commands.Cog):
             db = func.MONGO_DB[func.settings.mongodb_name]
             collection = db["game_stats"]
             
-            # Get current stats
-            current = await collection.find_one({
-                "guild_id": str(guild_id),
-                "user_id": str(user_id)
-            }) or {}
-            
-            current_streak = current.get("current_streak", 0)
-            best_streak = current.get("best_streak", 0)
-            wins = current.get("akinator_losses", 0)  # User wins = Cheems losses
-            total = current.get("akinator_games", 0)
-            achievements = current.get("achievements", [])
-            
-            # Update streak (user streak, not Cheems)
-            if not won:  # User won (Cheems lost)
-                new_streak = current_streak + 1
-                wins += 1
-            else:
-                new_streak = 0
-            
-            new_best = max(best_streak, new_streak)
-            total += 1
-            
-            # Check for new achievements
-            def check_achievement(key: str, value: int, requirement: int):
-                if key not in achievements and value >= requirement:
-                    achievements.append(key)
-                    new_achievements.append(ACHIEVEMENTS[key]["name"])
-            
-            # Check all achievements
-            check_achievement("first_game", total, 1)
-            check_achievement("games_10", total, 10)
-            check_achievement("games_50", total, 50)
-            check_achievement("win_5", wins, 5)
-            check_achievement("win_10", wins, 10)
-            check_achievement("win_25", wins, 25)
-            check_achievement("streak_3", new_streak, 3)
-            check_achievement("streak_5", new_streak, 5)
-            if not won and questions < 10:  # Quick win
-                check_achievement("quick_win", 1, 1)
-            
-            # Update database
-            stat_field = "akinator_wins" if won else "akinator_losses"
-            
-            await collection.update_one(
+            # One atomic round trip, the server works out streaks and achievements
+            stats = await collection.find_one_and_update(
                 {"guild_id": str(guild_id), "user_id": str(user_id)},
-                {
-                    "$inc": {stat_field: 1, "akinator_games": 1},
-                    "$set": {
-                        "last_played": datetime.now().isoformat(),
-                        "current_streak": new_streak,
-                        "best_streak": new_best,
-                        "achievements": achievements
-                    }
-                },
-                upsert=True
+                build_stats_update(won, questions),
+                projection={"last_unlocked": 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
             )
+            new_achievements = [ACHIEVEMENTS[key]["name"] for key in stats.get("last_unlocked", [])]
             
         except Exception as e:
             func.logger.error(f"Failed to update game stats: {e}")
@@ -28,10 +28,13 @@ import random
 import function as func
 
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
 from typing import Optional
 from datetime import datetime, timedelta
-from PIL import Image, ImageDraw, ImageFont
+from addons import CooldownMap
+from addons.xp import XPEngine, XPKey, XPRecord
+from addons.leaderboard import Leaderboards
+from addons.renderer import render_rank_card
 
 # Default leveling settings
 DEFAULT_SETTINGS = {
@@ -74,16 +77,30 @@ class Leveling(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.session: Optional[aiohttp.ClientSession] = None
-        self.cooldowns: dict = {}  # {guild_id: {user_id: last_xp_time}}
+        self.cooldowns = CooldownMap()  # (guild_id, user_id) -> XP cooldown
+        self.quest_cooldowns = CooldownMap()  # (guild_id, user_id) -> chatter_box quest cooldown
+        self.xp = XPEngine(lambda: func.MONGO_DB[func.settings.mongodb_name]["user_levels"], level_from_xp)
+        self.leaderboards = Leaderboards()  # guild_id -> users ranked by XP, kept in sync by the XP engine
+        self.xp.on_update = self._on_xp_update
         func.logger.info("Leveling cog loaded!")
     
     async def cog_load(self):
         self.session = aiohttp.ClientSession()
+        self.flush_xp.start()
     
     async def cog_unload(self):
+        self.flush_xp.cancel()
+        await self.xp.flush()
         if self.session:
             await self.session.close()
     
+    @tasks.loop(seconds=10)
+    async def flush_xp(self):
+        """Write the XP gained since the last flush and forget expired cooldowns."""
+        await self.xp.flush()
+        self.cooldowns.sweep()
+        self.quest_cooldowns.sweep()
+    
     # ========== DATABASE HELPERS ==========
     
     async def _get_level_settings(self, guild_id: int) -> dict:
@@ -96,70 +113,51 @@ class Leveling(commands.Cog):
         await func.update_settings(guild_id, {"$set": {"leveling": data}})
     
     async def _get_user_level_data(self, guild_id: int, user_id: int) -> dict:
-        """Get user's level data."""
-        db = func.MONGO_DB[func.settings.mongodb_name]
-        collection = db["user_levels"]
-        data = await collection.find_one({"guild_id": str(guild_id), "user_id": str(user_id)})
-        if not data:
-            return {"xp": 0, "level": 0, "messages": 0}
-        return data
+        """Get user's level data, including XP not written to the database yet."""
+        record = await self.xp.get(guild_id, user_id)
+        return {"xp": record.xp, "level": record.level, "messages": record.messages}
     
     async def _update_user_level_data(self, guild_id: int, user_id: int, update: dict):
         """Update user's level data."""
+        # Plain XP rewards go through the write-behind engine so the level is kept in step
+        if list(update) == ["$inc"] and list(update["$inc"]) == ["xp"]:
+            return self.xp.award(guild_id, user_id, update["$inc"]["xp"])
+        
+        await self.xp.write(guild_id, user_id, update)
+    
+    def _on_xp_update(self, key: XPKey, record: XPRecord) -> None:
+        self.leaderboards.update(key[0], key[1], record.xp)
+    
+    async def _load_leaderboard(self, guild_id: int) -> list:
+        """Read every ranked user of a guild, with XP that is not written yet applied on top."""
         db = func.MONGO_DB[func.settings.mongodb_name]
-        collection = db["user_levels"]
-        await collection.update_one(
-            {"guild_id": str(guild_id), "user_id": str(user_id)},
-            update,
-            upsert=True
-        )
+        cursor = db["user_levels"].find({"guild_id": str(guild_id), "xp": {"$gt": 0}}, {"_id": 0, "user_id": 1, "xp": 1})
+        scores = {int(data["user_id"]): data["xp"] async for data in cursor}
+        scores.update((user_id, record.xp) for user_id, record in self.xp.cached(guild_id))
+        return [(user_id, xp) for user_id, xp in scores.items() if xp > 0]
+    
+    async def _get_ranked_list(self, guild_id: int):
+        return await self.leaderboards.ensure(guild_id, lambda: self._load_leaderboard(guild_id))
     
     async def _get_leaderboard(self, guild_id: int, limit: int = 10) -> list:
         """Get top users by XP."""
-        db = func.MONGO_DB[func.settings.mongodb_name]
-        collection = db["user_levels"]
-        cursor = collection.find({"guild_id": str(guild_id)}).sort("xp", -1).limit(limit)
-        return await cursor.to_list(length=limit)
+        board = await self._get_ranked_list(guild_id)
+        return [
+            {"user_id": str(user_id), "xp": xp, "level": level_from_xp(xp)}
+            for user_id, xp in board.top(limit)
+        ]
     
     async def _get_user_rank(self, guild_id: int, user_id: int) -> int:
         """Get user's rank in the guild."""
-        db = func.MONGO_DB[func.settings.mongodb_name]
-        collection = db["user_levels"]
         user_data = await self._get_user_level_data(guild_id, user_id)
-        user_xp = user_data.get("xp", 0)
-        
-        # Count users with more XP
-        count = await collection.count_documents({
-            "guild_id": str(guild_id),
-            "xp": {"$gt": user_xp}
-        })
-        return count + 1
+        board = await self._get_ranked_list(guild_id)
+        return board.rank(user_data.get("xp", 0))
     
     # ========== RANK CARD GENERATION ==========
     
-    async def _download_image(self, url: str) -> Optional[Image.Image]:
-        """Download image from URL."""
-        try:
-            async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
-                if resp.status == 200:
-                    data = await resp.read()
-                    return Image.open(io.BytesIO(data)).convert("RGBA")
-        except Exception as e:
-            func.logger.debug(f"Failed to download image: {e}")
-        return None
-    
-    def _create_circular_avatar(self, avatar: Image.Image, size: int = 120) -> Image.Image:
-        """Create circular avatar."""
-        avatar = avatar.resize((size, size), Image.Resampling.LANCZOS)
-        
-        mask = Image.new("L", (size, size), 0)
-        draw = ImageDraw.Draw(mask)
-        draw.ellipse((0, 0, size, size), fill=255)
-        
-        output = Image.new("RGBA", (size, size), (0, 0, 0, 0))
-        output.paste(avatar, (0, 0), mask)
-        
-        return output
+    async def _download_image(self, url: str) -> Optional[bytes]:
+        """Download image from URL, through the shared image cache."""
+        return await func.ASSETS.fetch(self.session, url)
     
     async def _generate_rank_card(
         self,
@@ -169,86 +167,16 @@ class Leveling(commands.Cog):
         rank: int
     ) -> io.BytesIO:
         """Generate rank card image."""
-        import gc
-        
-        width, height = 800, 250
-        
-        # Dark background
-        card = Image.new("RGB", (width, height), (32, 34, 37))
-        draw = ImageDraw.Draw(card)
-        
-        # Draw accent bar at top
-        draw.rectangle([(0, 0), (width, 8)], fill=(88, 101, 242))  # Discord blurple
-        
-        # Download and draw avatar
         avatar_url = member.display_avatar.replace(size=128, format="png").url
         avatar = await self._download_image(avatar_url)
-        
-        if avatar:
-            circular_avatar = self._create_circular_avatar(avatar, 120)
-            avatar.close()
-            card.paste(circular_avatar, (30, 65), circular_avatar)
-            circular_avatar.close()
-        
-        # Fonts
-        try:
-            name_font = ImageFont.truetype("arial.ttf", 32)
-            level_font = ImageFont.truetype("arial.ttf", 24)
-            small_font = ImageFont.truetype("arial.ttf", 18)
-        except:
-            name_font = ImageFont.load_default()
-            level_font = ImageFont.load_default()
-            small_font = ImageFont.load_default()
-        
-        # Username
-        username = member.display_name[:20]
-        draw.text((170, 60), username, fill="white", font=name_font)
-        
-        # Rank and Level badges
-        draw.text((170, 100), f"Rank #{rank}", fill=(180, 180, 180), font=level_font)
-        draw.text((320, 100), f"Level {level}", fill=(88, 101, 242), font=level_font)
-        
-        # XP Progress
         current_xp, next_xp = xp_progress(xp, level)
-        progress = current_xp / next_xp if next_xp > 0 else 0
-        
-        # Progress bar background
-        bar_x, bar_y = 170, 160
-        bar_width, bar_height = 580, 30
-        draw.rounded_rectangle(
-            [(bar_x, bar_y), (bar_x + bar_width, bar_y + bar_height)],
-            radius=15,
-            fill=(64, 68, 75)
-        )
         
-        # Progress bar fill
-        fill_width = int(bar_width * progress)
-        if fill_width > 0:
-            draw.rounded_rectangle(
-                [(bar_x, bar_y), (bar_x + fill_width, bar_y + bar_height)],
-                radius=15,
-                fill=(88, 101, 242)
-            )
-        
-        # XP text
-        xp_text = f"{current_xp:,} / {next_xp:,} XP"
-        bbox = draw.textbbox((0, 0), xp_text, font=small_font)
-        text_width = bbox[2] - bbox[0]
-        draw.text((bar_x + bar_width - text_width, bar_y + bar_height + 8), 
-                  xp_text, fill=(180, 180, 180), font=small_font)
-        
-        # Total XP
-        draw.text((bar_x, bar_y + bar_height + 8), 
-                  f"Total: {xp:,} XP", fill=(120, 120, 120), font=small_font)
-        
-        # Save to buffer
-        buffer = io.BytesIO()
-        card.save(buffer, format="JPEG", quality=90)
-        card.close()
-        buffer.seek(0)
-        
-        gc.collect()
-        return buffer
+        # Drawing and encoding happen in the renderer's worker processes
+        data = await func.RENDERER.render(
+            member.guild.id, render_rank_card,
+            avatar, member.display_name, xp, level, rank, current_xp, next_xp
+        )
+        return io.BytesIO(data)
     
     # ========== EVENTS ==========
     
@@ -263,23 +191,11 @@ class Leveling(commands.Cog):
         user_id = message.author.id
         
         # Track chatter_box quest FIRST (independent of leveling settings)
-        # Uses its own faster cooldown to prevent spam
-        try:
-            if not hasattr(self, 'quest_cooldowns'):
-                self.quest_cooldowns = {}
-            
-            now = datetime.utcnow()
-            quest_key = f"{guild_id}_{user_id}"
-            last_quest = self.quest_cooldowns.get(quest_key)
-            
-            # Quest has 5 second cooldown (faster than XP cooldown)
-            if not last_quest or (now - last_quest).total_seconds() >= 5:
-                self.quest_cooldowns[quest_key] = now
-                quests_cog = self.bot.get_cog("DailyQuests")
-                if quests_cog:
-                    await quests_cog.track_quest(guild_id, user_id, "chatter_box")
-        except:
-            pass
+        # Uses its own faster cooldown (5 seconds) to prevent spam, and runs in the background
+        if self.quest_cooldowns.hit((guild_id, user_id), 5):
+            quests_cog = self.bot.get_cog("DailyQuests")
+            if quests_cog:
+                self.bot.loop.create_task(quests_cog.track_quest(guild_id, user_id, "chatter_box"))
         
         # Get settings for XP
         settings = await self._get_level_settings(guild_id)
@@ -291,18 +207,9 @@ class Leveling(commands.Cog):
             return
         
         # Check XP cooldown
-        cooldown = settings.get("cooldown", 60)
-        now = datetime.utcnow()
-        
-        if guild_id not in self.cooldowns:
-            self.cooldowns[guild_id] = {}
-        
-        last_xp = self.cooldowns[guild_id].get(user_id)
-        if last_xp and (now - last_xp).total_seconds() < cooldown:
+        if not self.cooldowns.hit((guild_id, user_id), settings.get("cooldown", 60)):
             return
         
-        self.cooldowns[guild_id][user_id] = now
-        
         # Calculate XP
         xp_min = settings.get("xp_min", 15)
         xp_max = settings.get("xp_max", 25)
@@ -312,23 +219,11 @@ class Leveling(commands.Cog):
         multiplier = settings.get("multipliers", {}).get(str(message.channel.id), 1.0)
         xp_gained = int(xp_gained * multiplier)
         
-        # Get current data
-        user_data = await self._get_user_level_data(guild_id, user_id)
-        old_level = user_data.get("level", 0)
-        old_xp = user_data.get("xp", 0)
-        
-        # Update XP
-        new_xp = old_xp + xp_gained
-        new_level = level_from_xp(new_xp)
-        
-        await self._update_user_level_data(guild_id, user_id, {
-            "$set": {"xp": new_xp, "level": new_level},
-            "$inc": {"messages": 1}
-        })
-        
-        # Level up?
-        if new_level > old_level:
+        # Award XP in memory, the level is computed locally and the increment is written on the next flush
+        async def on_level_up(old_level: int, new_level: int):
             await self._handle_level_up(message, settings, new_level)
+        
+        self.xp.award(guild_id, user_id, xp_gained, messages=1, on_level_up=on_level_up)
     
     async def _handle_level_up(self, message: discord.Message, settings: dict, new_level: int):
         """Handle level up notification and role rewards."""
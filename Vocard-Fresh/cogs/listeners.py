@@ -28,6 +28,8 @@ import voicelink
 import function as func
 
 from discord.ext import commands
+from ipc.voice_index import VOICE_INDEX
+from addons.restore import SessionRestorer
 
 class Listeners(commands.Cog):
     """Music Cog."""
@@ -58,70 +60,13 @@ class Listeners(commands.Cog):
         if not players:
             return
 
-        for data in players:
-            try:
-                channel_id = data.get("channel_id")
-                if not channel_id:
-                    continue
-
-                channel = self.bot.get_channel(channel_id)
-                if not channel:
-                    continue
-                elif not any(False if member.bot or member.voice.self_deaf else True for member in channel.members):
-                    continue
-                    
-                dj_member = channel.guild.get_member(data.get("dj"))
-                if not dj_member:
-                    continue
-
-                # Get the guild settings
-                settings = await func.get_settings(channel.guild.id)
-
-                # Connect to the channel and initialize the player.
-                player: voicelink.Player = await channel.connect(
-                    cls=voicelink.Player(self.bot, channel, func.TempCtx(dj_member, channel), settings)
-                )
-
-                # Restore the queue.
-                queue_data = data.get("queue", {})
-                for track_data in queue_data.get("tracks", []):
-                    track_id = track_data.get("track_id")
-                    if not track_id:
-                        continue
-
-                    decoded_track = voicelink.decode(track_id)
-                    requester = channel.guild.get_member(track_data.get("requester_id"))
-                    track = voicelink.Track(track_id=track_id, info=decoded_track, requester=requester)
-                    player.queue._queue.append(track)
-                
-                # Restore queue settings.
-                player.queue._position = queue_data.get("position", 0) - 1
-                repeat_mode = queue_data.get("repeat_mode", "OFF")
-                try:
-                    loop_mode = voicelink.LoopType[repeat_mode]
-                except KeyError:
-                    loop_mode = voicelink.LoopType.OFF
-                player.queue._repeat.set_mode(loop_mode)
-                player.queue._repeat_position = queue_data.get("repeat_position")
-
-                # Restore player settings
-                player.dj = dj_member
-                player.settings['autoplay'] = data.get('autoplay', False)
-
-                # Resume playback or invoke the controller based on the player's state.
-                if not player.is_playing:
-                    await player.do_next()
-
-                    if is_paused := data.get("is_paused"):
-                        await player.set_pause(is_paused, self.bot.user)
-                    
-                    if position := data.get("position"):
-                        await player.seek(int(position), self.bot.user)
-
-                await asyncio.sleep(5)
-
-            except Exception as e:
-                func.logger.error(f"Error encountered while restoring a player for channel ID {channel_id}.", exc_info=e)
+        report = await SessionRestorer().run(
+            players,
+            get_channel=lambda data: self.bot.get_channel(data.get("channel_id")) if data.get("channel_id") else None,
+            get_track_ids=lambda data: [track.get("track_id") for track in data.get("queue", {}).get("tracks", []) if track.get("track_id")],
+            restore=self.restore_player
+        )
+        func.logger.info(f"Last session restore finished: {report}")
 
         # Delete the last session file if it exists.
         try:
@@ -132,6 +77,70 @@ class Listeners(commands.Cog):
         except Exception as del_error:
             func.logger.error("Failed to remove session file: %s", file_path, exc_info=del_error)
 
+    async def restore_player(self, data: dict, channel: discord.VoiceChannel, decoded: dict) -> bool:
+        """Restore a single player from the last session using the tracks decoded in bulk."""
+        dj_member = channel.guild.get_member(data.get("dj"))
+        if not dj_member:
+            return False
+
+        # Get the guild settings
+        settings = await func.get_settings(channel.guild.id)
+
+        # Connect to the channel and initialize the player.
+        player: voicelink.Player = await channel.connect(
+            cls=voicelink.Player(self.bot, channel, func.TempCtx(dj_member, channel), settings)
+        )
+
+        # Restore the queue.
+        queue_data = data.get("queue", {})
+        for track_data in queue_data.get("tracks", []):
+            track_id = track_data.get("track_id")
+            if track_id not in decoded:
+                continue
+
+            requester = channel.guild.get_member(track_data.get("requester_id"))
+            track = voicelink.Track(track_id=track_id, info=decoded[track_id], requester=requester)
+            player.queue._queue.append(track)
+        
+        # Restore queue settings.
+        player.queue._position = queue_data.get("position", 0) - 1
+        repeat_mode = queue_data.get("repeat_mode", "OFF")
+        try:
+            loop_mode = voicelink.LoopType[repeat_mode]
+        except KeyError:
+            loop_mode = voicelink.LoopType.OFF
+        player.queue._repeat.set_mode(loop_mode)
+        player.queue._repeat_position = queue_data.get("repeat_position")
+
+        # Restore player settings
+        player.dj = dj_member
+        player.settings['autoplay'] = data.get('autoplay', False)
+        player.mark_dirty()
+
+        # Resume playback or invoke the controller based on the player's state.
+        if not player.is_playing:
+            await player.do_next()
+
+            if is_paused := data.get("is_paused"):
+                await player.set_pause(is_paused, self.bot.user)
+            
+            if position := data.get("position"):
+                await player.seek(int(position), self.bot.user)
+
+        return True
+
+    @commands.Cog.listener()
+    async def on_guild_available(self, guild: discord.Guild):
+        VOICE_INDEX.populate(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        VOICE_INDEX.populate(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        VOICE_INDEX.remove_guild(guild.id)
+
     @commands.Cog.listener()
     async def on_voicelink_track_start(self, player: voicelink.Player, track):
         """Update Discord presence and VC channel status when a new track starts playing."""
@@ -142,8 +151,8 @@ class Listeners(commands.Cog):
 
             # Fun facts and status messages to rotate through
             fun_messages = [
-                f"🎶 {len(self.bot.guilds)} servers",
-                f"🎵 {sum(g.member_count for g in self.bot.guilds)} users",
+                f"🎶 {func.BOT_STATS.server_count} servers",
+                f"🎵 {func.BOT_STATS.user_count} users",
                 f"🎧 Music for everyone!",
                 f"🔊 Vibing in {len(self.bot.voice_clients)} VCs",
                 f"✨ /play to jam!",
@@ -160,6 +169,16 @@ class Listeners(commands.Cog):
         except Exception as e:
             func.logger.debug(f"Failed to update presence/status: {e}")
 
+    @commands.Cog.listener("on_voicelink_track_start")
+    async def prefetch_lyrics(self, player: voicelink.Player, track):
+        """Warm the lyrics cache for the next track so its Lyrics button answers at once."""
+        if not func.LYRICS or not (upcoming := player.queue.tracks()):
+            return
+
+        next_track: voicelink.Track = upcoming[0]
+        if not next_track.is_stream:
+            func.LYRICS.prefetch(next_track.title, next_track.author, isrc=next_track.info.get("isrc"))
+
     @commands.Cog.listener()
     async def on_voicelink_track_end(self, player: voicelink.Player, track, _):
         await player.do_next()
@@ -206,6 +225,8 @@ class Listeners(commands.Cog):
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        VOICE_INDEX.update(member, after.channel)
+
         # Handle bot leaving voice channel - clear status
         if member.id == self.bot.user.id:
             if before.channel and not after.channel:
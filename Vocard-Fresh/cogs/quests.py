@@ -21,15 +21,20 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import asyncio
 import discord
 import random
 import function as func
 
+from collections import OrderedDict
 from discord import app_commands
 from discord.ext import commands
-from typing import Optional
+from pymongo import ReturnDocument
+from typing import Dict, Optional, Tuple
 from datetime import datetime, date, timezone
 
+QuestOwner = Tuple[int, int]  # (guild id, user id)
+
 # Quest definitions - VERIFIED working commands with tracking hooks!
 # Only include quests where we have actually implemented tracking
 QUEST_POOL = [
@@ -96,91 +101,125 @@ def get_daily_quests_for_user(user_id: int, guild_id: int, count: int = 3) -> li
 class DailyQuests(commands.Cog):
     """🎯 Daily quests for XP rewards!"""
     
+    MAX_CACHED = 10_000  # users whose quests for today are kept in memory
+    
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self._quests: OrderedDict[QuestOwner, dict] = OrderedDict()  # (guild_id, user_id) -> today's quest document
+        self._loading: Dict[QuestOwner, asyncio.Task] = {}
+        self._batches: Dict[Tuple[int, int, str], list] = {}  # (guild_id, user_id, quest_id) -> [increment, waiters]
         func.logger.info("DailyQuests cog loaded!")
     
     # ========== DATABASE HELPERS ==========
     
-    async def _get_user_quests(self, guild_id: int, user_id: int) -> dict:
-        """Get user's quest data for today."""
-        db = func.MONGO_DB[func.settings.mongodb_name]
-        collection = db["daily_quests"]
-        today = date.today().isoformat()
-        
-        data = await collection.find_one({
-            "guild_id": str(guild_id),
-            "user_id": str(user_id),
-            "date": today
-        })
-        
+    @staticmethod
+    def _collection():
+        return func.MONGO_DB[func.settings.mongodb_name]["daily_quests"]
+    
+    @staticmethod
+    def _filter(guild_id: int, user_id: int) -> dict:
+        return {"guild_id": str(guild_id), "user_id": str(user_id), "date": date.today().isoformat()}
+    
+    def _remember(self, guild_id: int, user_id: int, data: Optional[dict]) -> None:
+        """Caches the latest copy of a quest document, or forgets it when it is unknown."""
+        key = (guild_id, user_id)
         if not data:
-            # Generate new quests for today
-            quests = get_daily_quests_for_user(user_id, guild_id, 3)
-            data = {
-                "guild_id": str(guild_id),
-                "user_id": str(user_id),
-                "date": today,
-                "quests": quests
-            }
-            await collection.insert_one(data)
+            self._quests.pop(key, None)
+            return
         
+        self._quests[key] = data
+        self._quests.move_to_end(key)
+        while len(self._quests) > self.MAX_CACHED:
+            self._quests.popitem(last=False)
+    
+    async def _load_user_quests(self, guild_id: int, user_id: int) -> dict:
+        # Reads today's document, creating it with freshly generated quests if there is none
+        data = await self._collection().find_one_and_update(
+            self._filter(guild_id, user_id),
+            {"$setOnInsert": {
+                "quests": get_daily_quests_for_user(user_id, guild_id, 3),
+                "created_at": datetime.now(timezone.utc)  # expired by the TTL index
+            }},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self._remember(guild_id, user_id, data)
         return data
     
-    async def _update_quest_progress(self, guild_id: int, user_id: int, quest_id: str, increment: int = 1):
-        """Update progress for a specific quest."""
-        db = func.MONGO_DB[func.settings.mongodb_name]
-        collection = db["daily_quests"]
-        today = date.today().isoformat()
-        
-        # First ensure user has quests for today
-        await self._get_user_quests(guild_id, user_id)
-        
-        # Update the specific quest progress
-        await collection.update_one(
-            {
-                "guild_id": str(guild_id),
-                "user_id": str(user_id),
-                "date": today,
-                "quests.id": quest_id
-            },
-            {"$inc": {"quests.$.progress": increment}}
+    async def _get_user_quests(self, guild_id: int, user_id: int) -> dict:
+        """Get user's quest data for today."""
+        key = (guild_id, user_id)
+        data = self._quests.get(key)
+        if data and data["date"] == date.today().isoformat():
+            self._quests.move_to_end(key)
+            return data
+        
+        if not (task := self._loading.get(key)):
+            task = self._loading[key] = asyncio.create_task(self._load_user_quests(guild_id, user_id))
+            task.add_done_callback(lambda _: self._loading.pop(key, None))
+        return await asyncio.shield(task)
+    
+    async def _update_quest_progress(self, guild_id: int, user_id: int, quest_id: str, increment: int = 1) -> Optional[dict]:
+        """Adds progress to an unclaimed quest and returns the updated quest, or None if it could not be updated."""
+        data = await self._collection().find_one_and_update(
+            {**self._filter(guild_id, user_id), "quests": {"$elemMatch": {"id": quest_id, "claimed": False}}},
+            {"$inc": {"quests.$.progress": increment}},
+            return_document=ReturnDocument.AFTER
         )
+        self._remember(guild_id, user_id, data)
+        return next((quest for quest in data["quests"] if quest["id"] == quest_id), None) if data else None
     
     async def _claim_quest(self, guild_id: int, user_id: int, quest_id: str) -> Optional[int]:
         """Claim a completed quest and return XP, or None if not claimable."""
         data = await self._get_user_quests(guild_id, user_id)
         
-        for quest in data.get("quests", []):
-            if quest["id"] == quest_id:
-                if quest["claimed"]:
-                    return None  # Already claimed
-                if quest["progress"] < quest["target"]:
-                    return None  # Not completed
-                
-                # Mark as claimed
-                db = func.MONGO_DB[func.settings.mongodb_name]
-                collection = db["daily_quests"]
-                await collection.update_one(
-                    {
-                        "guild_id": str(guild_id),
-                        "user_id": str(user_id),
-                        "date": date.today().isoformat(),
-                        "quests.id": quest_id
-                    },
-                    {"$set": {"quests.$.claimed": True}}
-                )
-                
-                # Award XP via leveling system
-                leveling_cog = self.bot.get_cog("Leveling")
-                if leveling_cog:
-                    await leveling_cog._update_user_level_data(guild_id, user_id, {
-                        "$inc": {"xp": quest["xp"]}
-                    })
-                
-                return quest["xp"]
-        
-        return None
+        quest = next((quest for quest in data.get("quests", []) if quest["id"] == quest_id), None)
+        if not quest or quest["claimed"] or quest["progress"] < quest["target"]:
+            return None  # Unknown, already claimed or not completed
+        
+        # The filter only matches while the quest is unclaimed, so it can't be claimed twice
+        data = await self._collection().find_one_and_update(
+            {
+                **self._filter(guild_id, user_id),
+                "quests": {"$elemMatch": {"id": quest_id, "claimed": False, "progress": {"$gte": quest["target"]}}}
+            },
+            {"$set": {"quests.$.claimed": True}},
+            return_document=ReturnDocument.AFTER
+        )
+        self._remember(guild_id, user_id, data)
+        if not data:
+            return None
+        
+        # Award XP via leveling system
+        leveling_cog = self.bot.get_cog("Leveling")
+        if leveling_cog:
+            await leveling_cog._update_user_level_data(guild_id, user_id, {
+                "$inc": {"xp": quest["xp"]}
+            })
+        
+        return quest["xp"]
+    
+    async def _apply_batch(self, key: Tuple[int, int, str]) -> None:
+        # Let every event of the current loop iteration join the batch first
+        await asyncio.sleep(0)
+        increment, waiters = self._batches.pop(key)
+        guild_id, user_id, quest_id = key
+        
+        claimed = None
+        try:
+            quest = await self._update_quest_progress(guild_id, user_id, quest_id, increment)
+            if quest and quest["progress"] >= quest["target"]:
+                # Auto-claim!
+                if xp := await self._claim_quest(guild_id, user_id, quest_id):
+                    func.logger.info(f"Quest '{quest_id}' auto-claimed for user {user_id}, +{xp} XP")
+                    claimed = {"name": quest["name"], "xp": xp}
+        except Exception as e:
+            func.logger.error(f"Failed to track quest '{quest_id}' for user {user_id}.", exc_info=e)
+        
+        # Only the first event of the batch reports the claim
+        for index, waiter in enumerate(waiters):
+            if not waiter.done():
+                waiter.set_result(claimed if index == 0 else None)
     
     # ========== QUEST TRACKING HOOKS ==========
     
@@ -189,25 +228,25 @@ class DailyQuests(commands.Cog):
         Track progress for a quest if user has it today.
         Auto-claims the quest when completed and returns claim info, or None.
         Returns: {"name": str, "xp": int} if auto-claimed, None otherwise.
+        
+        Users without this quest today, or who already claimed it, are answered from
+        the cache. Progress for the same quest in the same loop iteration is combined
+        into a single database update.
         """
         data = await self._get_user_quests(guild_id, user_id)
+        if not any(quest["id"] == quest_id and not quest["claimed"] for quest in data.get("quests", [])):
+            return None
+        
+        key = (guild_id, user_id, quest_id)
+        waiter = asyncio.get_running_loop().create_future()
+        if batch := self._batches.get(key):
+            batch[0] += increment
+            batch[1].append(waiter)
+        else:
+            self._batches[key] = [increment, [waiter]]
+            asyncio.create_task(self._apply_batch(key))
         
-        for quest in data.get("quests", []):
-            if quest["id"] == quest_id and not quest["claimed"]:
-                # Update progress
-                await self._update_quest_progress(guild_id, user_id, quest_id, increment)
-                
-                # Check if quest is now complete (progress + increment >= target)
-                new_progress = quest["progress"] + increment
-                if new_progress >= quest["target"]:
-                    # Auto-claim!
-                    xp = await self._claim_quest(guild_id, user_id, quest_id)
-                    if xp:
-                        func.logger.info(f"Quest '{quest_id}' auto-claimed for user {user_id}, +{xp} XP")
-                        return {"name": quest["name"], "xp": xp}
-                break
-        
-        return None
+        return await waiter
     
     # ========== COMMANDS ==========
     
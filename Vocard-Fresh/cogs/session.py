@@ -6,13 +6,21 @@ Session Persistence - Save/Restore player state on restart using MongoDB
 """
 
 import discord
+import os
 import time
 import voicelink
 
+from datetime import datetime, timezone
 from discord.ext import commands, tasks
+from pymongo import DeleteOne, ReplaceOne, UpdateOne
+from typing import Dict, List, Optional, Union
+from addons.journal import PlayerJournal
+from addons.restore import SessionRestorer
 import function as func
 
 SESSION_TIMEOUT = 900  # 15 minutes in seconds
+JOURNAL_DIR = os.path.join(func.ROOT_DIR, "journal")
+STATE_FIELDS = ("voice_channel_id", "text_channel_id", "current_track", "volume", "loop_mode", "autoplay", "is_paused")
 
 
 class Session(commands.Cog):
@@ -20,18 +28,32 @@ class Session(commands.Cog):
         self.bot = bot
         self.sessions_restored = False
         self.sessions_db = None
+        self.journal: Optional[PlayerJournal] = None
+        self._journal_sessions: Dict[int, dict] = {}  # sessions recovered from the journal on startup
+        self._snapshots: Dict[int, dict] = {}  # guild id -> last written state and queue hash
     
     async def cog_load(self):
         """Initialize MongoDB collection and start save loop"""
         # Create sessions collection in MongoDB (MONGO_DB is client, need db_name first)
         db_name = func.settings.mongodb_name
         self.sessions_db = func.MONGO_DB[db_name]["sessions"]
+        
+        # The local journal survives hard crashes, even when the last Mongo write did not go through
+        self.journal = PlayerJournal(JOURNAL_DIR)
+        try:
+            self._journal_sessions = dict(await self.journal.start())
+        except Exception as e:
+            func.logger.error("Failed to open the player journal, continuing without it.", exc_info=e)
+            self.journal = None
+        
         self.save_sessions_loop.start()
     
     async def cog_unload(self):
         """Save sessions one last time before unloading"""
         self.save_sessions_loop.cancel()
-        await self.save_all_sessions()
+        await self.save_all_sessions(force=True)
+        if self.journal:
+            await self.journal.close()
     
     def serialize_track(self, track: voicelink.Track) -> dict:
         """Serialize a track to dict for storage"""
@@ -46,190 +68,262 @@ class Session(commands.Cog):
             "requester_id": track.requester.id if track.requester else None
         }
     
-    def serialize_player(self, player: voicelink.Player) -> dict:
-        """Serialize a player's state to dict"""
-        if not player or not player.channel:
-            return None
-        
-        # Serialize queue
+    def serialize_queue(self, player: voicelink.Player) -> list:
+        """Serialize the upcoming tracks of a player's queue"""
         queue_tracks = []
         for track in player.queue.tracks():
             serialized = self.serialize_track(track)
             if serialized:
                 queue_tracks.append(serialized)
-        
+        return queue_tracks
+    
+    def queue_hash(self, player: voicelink.Player) -> int:
+        """Cheap fingerprint of the queue, used to skip re-serializing unchanged queues"""
+        return hash(tuple(
+            (track.track_id, track.requester.id if track.requester else None)
+            for track in player.queue.tracks()
+        ))
+    
+    def serialize_state(self, player: voicelink.Player) -> dict:
+        """Serialize everything except the queue, position and timestamp"""
+        text_channel = getattr(player, 'text_channel', None)
         return {
-            "_id": player.guild.id,
-            "guild_id": player.guild.id,
             "voice_channel_id": player.channel.id,
-            "text_channel_id": getattr(player, 'text_channel', None).id if getattr(player, 'text_channel', None) else None,
+            "text_channel_id": text_channel.id if text_channel else None,
             "current_track": self.serialize_track(player.current),
-            "position": player.position,
-            "queue": queue_tracks,
             "volume": player.volume,
             "loop_mode": player.queue._repeat.mode.name if player.queue._repeat else "OFF",
             "autoplay": player.settings.get("autoplay", False),
-            "is_paused": player.is_paused,
+            "is_paused": player.is_paused
+        }
+    
+    def serialize_player(self, player: voicelink.Player) -> dict:
+        """Serialize a player's state to dict"""
+        if not player or not player.channel:
+            return None
+        
+        return {
+            "_id": player.guild.id,
+            "guild_id": player.guild.id,
+            **self.serialize_state(player),
+            "position": player.position,
+            "queue": self.serialize_queue(player),
             "timestamp": int(time.time())
         }
     
-    async def save_all_sessions(self):
-        """Save all active player sessions to MongoDB"""
-        if self.sessions_db is None:
+    def build_operation(self, player: voicelink.Player, force: bool = False) -> Union[ReplaceOne, UpdateOne]:
+        """Build the smallest write that brings the stored session up to date with the player"""
+        guild_id = player.guild.id
+        snapshot = self._snapshots.get(guild_id)
+        
+        # Cleared before the write is awaited, so changes made in the meantime are picked up next tick
+        dirty, player.session_dirty = player.session_dirty, False
+        
+        if force or snapshot is None:
+            data = self.serialize_player(player)
+            self._snapshots[guild_id] = {
+                **{key: data[key] for key in STATE_FIELDS},
+                "queue_hash": self.queue_hash(player)
+            }
+            if self.journal:
+                self.journal.put(guild_id, data)
+            # updated_at only goes to Mongo, where the TTL index expires abandoned sessions
+            return ReplaceOne({"_id": guild_id}, {**data, "updated_at": datetime.now(timezone.utc)}, upsert=True)
+        
+        changes = {"position": player.position, "timestamp": int(time.time())}
+        if dirty:
+            for key, value in self.serialize_state(player).items():
+                if snapshot.get(key) != value:
+                    changes[key] = snapshot[key] = value
+            
+            queue_hash = self.queue_hash(player)
+            if queue_hash != snapshot["queue_hash"]:
+                changes["queue"] = self.serialize_queue(player)
+                snapshot["queue_hash"] = queue_hash
+        
+        if self.journal:
+            self.journal.update(guild_id, changes)
+        return UpdateOne({"_id": guild_id}, {"$set": {**changes, "updated_at": datetime.now(timezone.utc)}})
+    
+    async def save_all_sessions(self, force: bool = False):
+        """Save all active player sessions to MongoDB in a single bulk write
+        
+        Only players flagged as dirty are compared against their last snapshot,
+        every other player just gets its position and timestamp refreshed.
+        """
+        if self.sessions_db is None and not self.journal:
             return
         
-        for guild in self.bot.guilds:
-            player = guild.voice_client
-            if player and isinstance(player, voicelink.Player):
-                if player.is_playing or player.is_paused:
-                    data = self.serialize_player(player)
-                    if data:
-                        try:
-                            # Upsert session data
-                            await self.sessions_db.replace_one(
-                                {"_id": guild.id},
-                                data,
-                                upsert=True
-                            )
-                        except Exception as e:
-                            func.logger.error(f"Failed to save session for guild {guild.id}: {e}")
-                else:
-                    # Remove session if not playing
-                    try:
-                        await self.sessions_db.delete_one({"_id": guild.id})
-                    except:
-                        pass
+        operations, saved_players, partial_players, seen = [], [], [], set()
+        for player in self.bot.voice_clients:
+            if not isinstance(player, voicelink.Player) or not player.channel:
+                continue
+            
+            guild_id = player.guild.id
+            seen.add(guild_id)
+            if player.is_playing or player.is_paused:
+                operation = self.build_operation(player, force)
+                operations.append(operation)
+                saved_players.append(player)
+                if isinstance(operation, UpdateOne):
+                    partial_players.append(player)
+            elif self._snapshots.pop(guild_id, None) is not None:
+                # Remove session if not playing
+                operations.append(DeleteOne({"_id": guild_id}))
+                if self.journal:
+                    self.journal.delete(guild_id)
+        
+        # Players that are gone keep their stored session, but will be fully rewritten if they come back
+        for guild_id in self._snapshots.keys() - seen:
+            del self._snapshots[guild_id]
+        
+        if not operations or self.sessions_db is None:
+            return
+        
+        try:
+            result = await self.sessions_db.bulk_write(operations, ordered=False)
+        except Exception as e:
+            func.logger.error(f"Failed to save sessions: {e}")
+            for player in saved_players:
+                self._snapshots.pop(player.guild.id, None)
+            return
+        
+        # Full snapshots either match or upsert, so any shortfall in matches belongs to a partial update
+        replaced = sum(isinstance(operation, ReplaceOne) for operation in operations)
+        if result.matched_count - (replaced - result.upserted_count) < len(partial_players):
+            await self.rewrite_missing_sessions(partial_players)
+    
+    async def rewrite_missing_sessions(self, players: list) -> None:
+        """Write full snapshots for players whose session document is gone
+        
+        A partial update does not upsert, so once a document is removed (dashboard
+        clear/delete, or the TTL index) the session would otherwise never be stored again.
+        """
+        try:
+            stored = {doc["_id"] async for doc in self.sessions_db.find({"_id": {"$in": [player.guild.id for player in players]}}, {"_id": 1})}
+            if missing := [player for player in players if player.guild.id not in stored]:
+                await self.sessions_db.bulk_write([self.build_operation(player, force=True) for player in missing], ordered=False)
+        except Exception as e:
+            func.logger.error(f"Failed to rewrite missing sessions: {e}")
+            for player in players:
+                self._snapshots.pop(player.guild.id, None)
     
     async def load_sessions(self) -> list:
-        """Load all sessions from MongoDB"""
-        if self.sessions_db is None:
-            return []
+        """Load all sessions from MongoDB and the local journal, keeping the newest copy of each"""
+        sessions: Dict[int, dict] = {}
+        if self.sessions_db is not None:
+            try:
+                for data in await self.sessions_db.find({}).to_list(None):
+                    sessions[data["_id"]] = data
+            except Exception as e:
+                func.logger.error(f"Failed to load sessions: {e}")
         
+        for guild_id, data in self._journal_sessions.items():
+            if guild_id not in sessions or data.get("timestamp", 0) > sessions[guild_id].get("timestamp", 0):
+                sessions[guild_id] = data
+        self._journal_sessions = {}
+        
+        return list(sessions.values())
+    
+    async def delete_sessions(self, guild_ids: List[int]) -> None:
+        """Remove stored sessions from MongoDB and the journal in a single write"""
+        if not guild_ids:
+            return
+        
+        for guild_id in guild_ids:
+            # A live player is written in full again instead of updating a document that no longer exists
+            self._snapshots.pop(guild_id, None)
+            if self.journal:
+                self.journal.delete(guild_id)
+        
+        if self.sessions_db is None:
+            return
         try:
-            sessions = await self.sessions_db.find({}).to_list(None)
-            return sessions
+            await self.sessions_db.delete_many({"_id": {"$in": guild_ids}})
         except Exception as e:
-            func.logger.error(f"Failed to load sessions: {e}")
-            return []
+            func.logger.error(f"Failed to delete sessions: {e}")
+    
+    def get_session_channel(self, data: dict) -> Optional[discord.VoiceChannel]:
+        guild = self.bot.get_guild(data["guild_id"])
+        return guild.get_channel(data["voice_channel_id"]) if guild else None
+    
+    def get_session_track_ids(self, data: dict) -> list:
+        tracks = [data.get("current_track") or {}] + data.get("queue", [])
+        return [track["track_id"] for track in tracks if track.get("track_id")]
     
-    async def restore_session(self, data: dict) -> bool:
-        """Restore a single session"""
+    async def restore_session(self, data: dict, voice_channel: discord.VoiceChannel, decoded: Dict[str, dict]) -> bool:
+        """Restore a single session using the tracks decoded in bulk by the restorer"""
+        guild = voice_channel.guild
+        text_channel = guild.get_channel(data["text_channel_id"]) if data.get("text_channel_id") else None
+        
+        current_data = data.get("current_track")
+        if not current_data or current_data.get("track_id") not in decoded:
+            return False
+        
+        # Get a member for requester context (use first non-bot member)
+        requester = next((member for member in voice_channel.members if not member.bot), None)
+        if not requester:
+            func.logger.debug(f"Session restore skipped for {guild.name}: no non-bot members")
+            return False
+        
+        # Get guild settings
+        settings = await func.get_settings(guild.id)
+        
+        # Connect to voice channel with proper player initialization
         try:
-            guild_id = data["guild_id"]
-            guild = self.bot.get_guild(guild_id)
-            if not guild:
-                return False
-            
-            # Get channels
-            voice_channel = guild.get_channel(data["voice_channel_id"])
-            text_channel = guild.get_channel(data["text_channel_id"]) if data.get("text_channel_id") else None
-            
-            if not voice_channel:
-                return False
-            
-            # Check if voice channel has members (don't restore if empty)
-            if len(voice_channel.members) == 0:
-                func.logger.debug(f"Session restore skipped for {guild.name}: voice channel is empty")
-                return False
-            
-            # Get guild settings
-            settings = await func.get_settings(guild.id)
-            
-            # Get a member for requester context (use first non-bot member)
-            requester = None
-            for member in voice_channel.members:
-                if not member.bot:
-                    requester = member
-                    break
-            if not requester:
-                func.logger.debug(f"Session restore skipped for {guild.name}: no non-bot members")
-                return False
-            
-            # Connect to voice channel with proper player initialization
-            try:
-                player = await voice_channel.connect(
-                    cls=voicelink.Player(
-                        self.bot, voice_channel, func.TempCtx(requester, voice_channel), settings
-                    )
+            player = await voice_channel.connect(
+                cls=voicelink.Player(
+                    self.bot, voice_channel, func.TempCtx(requester, voice_channel), settings
                 )
-                player.text_channel = text_channel
-            except Exception as e:
-                func.logger.error(f"Failed to connect for session restore: {e}")
-                return False
-            
+            )
+            player.text_channel = text_channel
+        except Exception as e:
+            func.logger.error(f"Failed to connect for session restore: {e}")
+            return False
+        
+        try:
             # Set volume
             await player.set_volume(data.get("volume", 100))
             
             # Set autoplay
             player.settings["autoplay"] = data.get("autoplay", False)
             
-            # Restore current track
-            current_data = data.get("current_track")
-            if current_data and current_data.get("track_id"):
-                try:
-                    # Decode and create track
-                    track_info = voicelink.decode(current_data["track_id"])
-                    
-                    # Get requester (use first member in channel as fallback)
-                    requester = None
-                    if current_data.get("requester_id"):
-                        requester = guild.get_member(current_data["requester_id"])
-                    if not requester and voice_channel.members:
-                        requester = voice_channel.members[0]
-                    
-                    track = voicelink.Track(
-                        track_id=current_data["track_id"],
-                        info=track_info,
-                        requester=requester
-                    )
-                    
-                    # Add to queue first
-                    await player.add_track(track)
-                    
-                    # Restore queue items
-                    for track_data in data.get("queue", []):
-                        if track_data.get("track_id"):
-                            try:
-                                info = voicelink.decode(track_data["track_id"])
-                                req = guild.get_member(track_data.get("requester_id")) or requester
-                                queue_track = voicelink.Track(
-                                    track_id=track_data["track_id"],
-                                    info=info,
-                                    requester=req
-                                )
-                                await player.add_track(queue_track)
-                            except:
-                                continue
-                    
-                    # Start playing
-                    if not player.is_playing:
-                        await player.do_next()
-                    
-                    # Seek to saved position
-                    saved_position = data.get("position", 0)
-                    if saved_position > 0:
-                        await player.seek(saved_position)
-                    
-                    # Set loop mode
-                    loop_mode = data.get("loop_mode", "OFF")
-                    if loop_mode in voicelink.LoopType.__members__:
-                        await player.set_repeat(voicelink.LoopType[loop_mode])
-                    
-                    # Handle pause state
-                    if data.get("is_paused"):
-                        await player.set_pause(True)
-                    
-                    func.logger.info(f"Session restored for guild {guild.name} ({guild_id})")
-                    return True
-                    
-                except Exception as e:
-                    func.logger.error(f"Failed to restore track: {e}")
-                    return False
+            # Rebuild the current track and the queue, then add them in one go
+            tracks = []
+            for track_data in [current_data] + data.get("queue", []):
+                if (info := decoded.get(track_data.get("track_id"))) is None:
+                    continue
+                
+                tracks.append(voicelink.Track(
+                    track_id=track_data["track_id"],
+                    info=info,
+                    requester=guild.get_member(track_data.get("requester_id")) or requester
+                ))
+            await player.add_track(tracks)
             
-            return False
+            # Start playing
+            if not player.is_playing:
+                await player.do_next()
+            
+            # Seek to saved position
+            saved_position = data.get("position", 0)
+            if saved_position > 0:
+                await player.seek(saved_position)
+            
+            # Set loop mode
+            loop_mode = data.get("loop_mode", "OFF")
+            if loop_mode in voicelink.LoopType.__members__:
+                await player.set_repeat(voicelink.LoopType[loop_mode])
+            
+            # Handle pause state
+            if data.get("is_paused"):
+                await player.set_pause(True)
+            
+            func.logger.info(f"Session restored for guild {guild.name} ({guild.id})")
+            return True
             
         except Exception as e:
-            func.logger.error(f"Session restore failed: {e}")
+            func.logger.error(f"Failed to restore track: {e}")
             return False
     
     @commands.Cog.listener()
@@ -239,39 +333,39 @@ class Session(commands.Cog):
             return
         
         self.sessions_restored = True
-        
-        # Wait a bit for nodes to connect
         await self.bot.wait_until_ready()
-        import asyncio
-        await asyncio.sleep(5)
         
-        sessions = await self.load_sessions()
-        current_time = int(time.time())
-        restored_count = 0
+        sessions, expired, current_time = [], [], int(time.time())
+        for data in await self.load_sessions():
+            if current_time - data.get("timestamp", 0) <= SESSION_TIMEOUT:
+                sessions.append(data)
+            else:
+                expired.append(data["_id"])
+        await self.delete_sessions(expired)
         
-        for data in sessions:
-            # Check if session is within 5 minute window
-            session_time = data.get("timestamp", 0)
-            if current_time - session_time > SESSION_TIMEOUT:
-                # Delete old session
-                try:
-                    await self.sessions_db.delete_one({"_id": data["_id"]})
-                except:
-                    pass
-                continue
-            
-            success = await self.restore_session(data)
-            if success:
-                restored_count += 1
-            
-            # Delete session after restoration attempt
+        if not sessions:
+            return
+        
+        # Each session is consumed by its own restore attempt, whatever its outcome,
+        # so a crash halfway through keeps the sessions that were not tried yet
+        remaining = {data["_id"] for data in sessions}
+        
+        async def restore(data: dict, voice_channel: discord.VoiceChannel, decoded: Dict[str, dict]) -> bool:
             try:
-                await self.sessions_db.delete_one({"_id": data["_id"]})
-            except:
-                pass
+                return await self.restore_session(data, voice_channel, decoded)
+            finally:
+                remaining.discard(data["_id"])
+                await self.delete_sessions([data["_id"]])
         
-        if restored_count > 0:
-            func.logger.info(f"Restored {restored_count} session(s) from last shutdown")
+        report = await SessionRestorer().run(
+            sessions,
+            get_channel=self.get_session_channel,
+            get_track_ids=self.get_session_track_ids,
+            restore=restore
+        )
+        # Sessions the restorer skipped, e.g. for an empty channel
+        await self.delete_sessions(list(remaining))
+        func.logger.info(f"Session restore finished: {report}")
     
     @tasks.loop(seconds=5)
     async def save_sessions_loop(self):
@@ -350,7 +350,7 @@ class Settings(commands.Cog, name="settings"):
             value=f"```• VERSION: {func.settings.version}\n" \
                   f"• LATENCY: {self.bot.latency:.2f}ms\n" \
                   f"• GUILDS:  {len(self.bot.guilds)}\n" \
-                  f"• USERS:   {sum([guild.member_count or 0 for guild in self.bot.guilds])}\n" \
+                  f"• USERS:   {func.BOT_STATS.user_count}\n" \
                   f"• PLAYERS: {len(self.bot.voice_clients)}```",
             inline=False
         )
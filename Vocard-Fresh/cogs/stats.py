@@ -22,12 +22,17 @@ SOFTWARE.
 """
 
 import discord
+import voicelink
 import function as func
 
 from discord import app_commands
 from discord.ext import commands, tasks
 from typing import Optional
 from datetime import datetime
+from addons.listening import ListeningTracker
+
+# Listening time is flushed this often, so a crash loses at most this much plus each listener's sub-minute remainder
+LISTENING_FLUSH_SECONDS = 60
 
 
 class Stats(commands.Cog):
@@ -35,34 +40,73 @@ class Stats(commands.Cog):
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.track_listening_time.start()
+        self.listening = ListeningTracker()
+        self.flush_listening_time.start()
         func.logger.info("Stats cog initialized - tracking listening time with MongoDB!")
     
-    def cog_unload(self):
-        """Stop the background task when cog is unloaded."""
-        self.track_listening_time.cancel()
+    async def cog_unload(self):
+        """Stop the background task and write out the remaining listening time."""
+        self.flush_listening_time.cancel()
+        await self._flush_listening(final=True)
+    
+    def update_listeners(self, guild: discord.Guild) -> None:
+        """Reconcile who is listening in a guild right now: non-bot members in the channel of a playing, unpaused player."""
+        player = guild.voice_client
+        if isinstance(player, voicelink.Player) and player.is_playing and not player.is_paused and player.channel:
+            self.listening.set_listeners(guild.id, (member.id for member in player.channel.members if not member.bot))
+        else:
+            self.listening.set_listeners(guild.id, ())
+    
+    async def _flush_listening(self, final: bool = False) -> None:
+        minutes = self.listening.drain(final=final)
+        if not minutes:
+            return
+        
+        last_active = datetime.now().isoformat()
+        updates = {}
+        for (user_id, guild_id), amount in minutes.items():
+            update = updates.setdefault(user_id, {"$inc": {}, "$set": {}})
+            update["$inc"][f"stats.{guild_id}.listening_minutes"] = amount
+            update["$set"][f"stats.{guild_id}.last_active"] = last_active
+        
+        # Only the users whose write failed get their minutes back, the rest are already counted in Mongo
+        if failed := await func.bulk_update_users(updates):
+            self.listening.restore({key: amount for key, amount in minutes.items() if key[0] in failed})
     
-    @tasks.loop(seconds=60)
-    async def track_listening_time(self):
-        """Track listening minutes for users in voice with active players."""
+    @tasks.loop(seconds=LISTENING_FLUSH_SECONDS)
+    async def flush_listening_time(self):
+        """Write the listening minutes accumulated since the last flush as one bulk $inc."""
         try:
-            for guild in self.bot.guilds:
-                # Check if there's an active player in this guild
-                player = getattr(guild, 'voice_client', None)
-                if player and hasattr(player, 'is_playing') and player.is_playing:
-                    # Get the voice channel
-                    if player.channel:
-                        for member in player.channel.members:
-                            if not member.bot:
-                                await self.add_stat(member.id, guild.id, "listening_minutes", 1)
+            # Catch anything the events missed, only guilds with a player or open intervals are visited
+            guild_ids = {player.guild.id for player in self.bot.voice_clients} | self.listening.guild_ids
+            for guild_id in guild_ids:
+                if guild := self.bot.get_guild(guild_id):
+                    self.update_listeners(guild)
+                else:
+                    self.listening.set_listeners(guild_id, ())
+            
+            await self._flush_listening()
         except Exception as e:
             func.logger.debug(f"Error tracking listening time: {e}")
     
-    @track_listening_time.before_loop
-    async def before_track_listening(self):
+    @flush_listening_time.before_loop
+    async def before_flush_listening(self):
         """Wait for bot to be ready before starting the loop."""
         await self.bot.wait_until_ready()
     
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        if before.channel != after.channel:
+            self.update_listeners(member.guild)
+    
+    @commands.Cog.listener()
+    async def on_voicelink_track_end(self, player, track, _):
+        self.update_listeners(player.guild)
+    
+    @commands.Cog.listener()
+    async def on_voicelink_player_pause(self, player, paused: bool):
+        self.update_listeners(player.guild)
+    
     async def _get_user_stats(self, user_id: int, guild_id: int) -> dict:
         """Get user stats from MongoDB."""
         user_data = await func.get_user(user_id)
@@ -103,6 +147,7 @@ class Stats(commands.Cog):
     @commands.Cog.listener()
     async def on_voicelink_track_start(self, player, track):
         """Track songs played per user."""
+        self.update_listeners(player.guild)
         if hasattr(player, 'context') and player.context:
             try:
                 user_id = player.context.author.id
@@ -174,11 +219,16 @@ class Stats(commands.Cog):
         
         # XP leaderboard uses different collection
         if category == "xp":
-            db = func.MONGO_DB[func.settings.mongodb_name]
-            cursor = db["user_levels"].find(
-                {"guild_id": guild_id}
-            ).sort("xp", -1).limit(10)
-            leaderboard_data = await cursor.to_list(length=10)
+            leveling_cog = self.bot.get_cog("Leveling")
+            if leveling_cog:
+                # Served from the in-memory ranking kept by the leveling cog
+                leaderboard_data = await leveling_cog._get_leaderboard(ctx.guild.id, 10)
+            else:
+                db = func.MONGO_DB[func.settings.mongodb_name]
+                cursor = db["user_levels"].find(
+                    {"guild_id": guild_id}
+                ).sort("xp", -1).limit(10)
+                leaderboard_data = await cursor.to_list(length=10)
             
             embed = discord.Embed(title="🏆 Leaderboard: XP / Level", color=discord.Color.gold())
             
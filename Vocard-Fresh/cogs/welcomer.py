@@ -21,15 +21,18 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import asyncio
 import discord
 import aiohttp
+import hashlib
 import io
+import json
 import function as func
 
 from discord import app_commands
 from discord.ext import commands
 from typing import Optional
-from PIL import Image, ImageDraw, ImageFont, ImageFilter
+from addons.renderer import RendererBusy, render_welcome_card
 
 # Default background
 DEFAULT_BACKGROUND = "https://cdn.discordapp.com/attachments/910400703862833192/910426253947994112/121177.png"
@@ -82,124 +85,41 @@ class Welcomer(commands.Cog):
         """Update goodbye settings."""
         await func.update_settings(guild_id, {"$set": {"goodbye": data}})
     
-    async def _download_image(self, url: str) -> Optional[Image.Image]:
-        """Download image from URL."""
-        try:
-            async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
-                if resp.status == 200:
-                    data = await resp.read()
-                    return Image.open(io.BytesIO(data)).convert("RGBA")
-        except Exception as e:
-            func.logger.debug(f"Failed to download image: {e}")
-        return None
+    async def _download_image(self, url: str) -> Optional[bytes]:
+        """Download image from URL, through the shared image cache."""
+        return await func.ASSETS.fetch(self.session, url)
     
-    def _create_circular_avatar(self, avatar: Image.Image, size: int = 230) -> Image.Image:
-        """Create circular avatar with border."""
-        avatar = avatar.resize((size, size), Image.Resampling.LANCZOS)
-        
-        # Create mask for circular crop
-        mask = Image.new("L", (size, size), 0)
-        draw = ImageDraw.Draw(mask)
-        draw.ellipse((0, 0, size, size), fill=255)
-        
-        # Apply mask
-        output = Image.new("RGBA", (size, size), (0, 0, 0, 0))
-        output.paste(avatar, (0, 0), mask)
-        
-        # Add border
-        border_size = size + 10
-        bordered = Image.new("RGBA", (border_size, border_size), (0, 0, 0, 0))
-        border_draw = ImageDraw.Draw(bordered)
-        border_draw.ellipse((0, 0, border_size, border_size), fill=(47, 49, 54, 255))
-        bordered.paste(output, (5, 5), output)
-        
-        return bordered
+    def _card_base_key(self, guild_id: int, settings: dict) -> tuple:
+        """Key of the guild's pre-rendered card background.
+        
+        It covers every setting that affects the card, so changing the background
+        or message (from a command or the dashboard) makes the renderer build a new one.
+        """
+        card_settings = json.dumps(
+            [settings.get("background_url"), settings.get("message", DEFAULT_WELCOME_MSG)]
+        )
+        return (guild_id, hashlib.sha1(card_settings.encode()).hexdigest())
     
     async def _generate_welcome_card(
         self, 
         member: discord.Member, 
-        background_url: Optional[str] = None
+        settings: dict
     ) -> io.BytesIO:
-        """Generate welcome card image (optimized for low memory)."""
-        import gc
-        
-        # Smaller card dimensions for low memory (512MB server)
-        width, height = 800, 350
-        
-        # Load background
-        bg_url = background_url or DEFAULT_BACKGROUND
-        background = await self._download_image(bg_url)
-        
-        if background:
-            background = background.resize((width, height), Image.Resampling.LANCZOS)
-        else:
-            # Fallback gradient background
-            background = Image.new("RGBA", (width, height), (47, 49, 54, 255))
-        
-        # Apply slight blur/darken for text visibility
-        overlay = Image.new("RGBA", (width, height), (0, 0, 0, 100))
-        background = Image.alpha_composite(background, overlay)
-        overlay.close()  # Free memory
-        
-        # Download avatar (smaller size)
-        avatar_url = member.display_avatar.replace(size=128, format="png").url
-        avatar = await self._download_image(avatar_url)
-        
-        if avatar:
-            circular_avatar = self._create_circular_avatar(avatar, 150)
-            avatar.close()  # Free memory
-            # Center avatar horizontally
-            avatar_x = (width - circular_avatar.width) // 2
-            avatar_y = 30
-            background.paste(circular_avatar, (avatar_x, avatar_y), circular_avatar)
-            circular_avatar.close()  # Free memory
-        
-        # Draw text
-        draw = ImageDraw.Draw(background)
-        
-        # Try to load custom font, fallback to default
-        try:
-            title_font = ImageFont.truetype("arial.ttf", 48)
-            name_font = ImageFont.truetype("arial.ttf", 32)
-            sub_font = ImageFont.truetype("arial.ttf", 22)
-        except:
-            title_font = ImageFont.load_default()
-            name_font = ImageFont.load_default()
-            sub_font = ImageFont.load_default()
-        
-        # Welcome text
-        welcome_text = "Welcome!"
-        bbox = draw.textbbox((0, 0), welcome_text, font=title_font)
-        text_width = bbox[2] - bbox[0]
-        draw.text(((width - text_width) // 2, 210), welcome_text, fill="white", font=title_font)
-        
-        # Username
-        username = member.display_name[:25]  # Limit length
-        bbox = draw.textbbox((0, 0), username, font=name_font)
-        text_width = bbox[2] - bbox[0]
-        draw.text(((width - text_width) // 2, 270), username, fill="white", font=name_font)
-        
-        # Server name + member count
-        sub_text = f"Member #{member.guild.member_count} of {member.guild.name}"
-        if len(sub_text) > 50:
-            sub_text = sub_text[:47] + "..."
-        bbox = draw.textbbox((0, 0), sub_text, font=sub_font)
-        text_width = bbox[2] - bbox[0]
-        draw.text(((width - text_width) // 2, 310), sub_text, fill=(180, 180, 180), font=sub_font)
-        
-        # Save to buffer (use JPEG for smaller size)
-        buffer = io.BytesIO()
-        # Convert to RGB for JPEG (no alpha)
-        rgb_image = background.convert("RGB")
-        background.close()  # Free memory
-        rgb_image.save(buffer, format="JPEG", quality=85, optimize=True)
-        rgb_image.close()  # Free memory
-        buffer.seek(0)
-        
-        # Force garbage collection
-        gc.collect()
+        """Generate welcome card image."""
+        background, avatar = await asyncio.gather(
+            self._download_image(settings.get("background_url") or DEFAULT_BACKGROUND),
+            self._download_image(member.display_avatar.replace(size=128, format="png").url)
+        )
         
-        return buffer
+        # Drawing and encoding happen in the renderer's worker processes,
+        # which keep the background layer of each guild ready to reuse
+        data = await func.RENDERER.render(
+            member.guild.id, render_welcome_card,
+            background, avatar, member.display_name,
+            f"Member #{member.guild.member_count} of {member.guild.name}",
+            self._card_base_key(member.guild.id, settings)
+        )
+        return io.BytesIO(data)
     
     def _format_message(self, template: str, member: discord.Member) -> str:
         """Format message template with member info."""
@@ -234,11 +154,12 @@ class Welcomer(commands.Cog):
             # Generate card if enabled
             files = []
             if settings.get("show_card", True):
-                card_buffer = await self._generate_welcome_card(
-                    member, 
-                    settings.get("background_url")
-                )
-                files.append(discord.File(card_buffer, filename="welcome.jpg"))
+                try:
+                    card_buffer = await self._generate_welcome_card(member, settings)
+                    files.append(discord.File(card_buffer, filename="welcome.jpg"))
+                except RendererBusy:
+                    # Join bursts still get their welcome message, just without a card
+                    pass
             
             # Format message
             message = self._format_message(
@@ -384,10 +305,7 @@ class Welcomer(commands.Cog):
         settings = await self._get_welcomer_settings(interaction.guild.id)
         
         try:
-            card_buffer = await self._generate_welcome_card(
-                interaction.user,
-                settings.get("background_url")
-            )
+            card_buffer = await self._generate_welcome_card(interaction.user, settings)
             
             file = discord.File(card_buffer, filename="welcome_test.jpg")
             
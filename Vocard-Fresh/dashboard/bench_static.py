@@ -0,0 +1,97 @@
+"""
+Static asset benchmark for the dashboard.
+
+Replays the assets referenced by templates/index.html against a running dashboard
+and reports requests per second and bytes on the wire per page view for three
+kinds of visitors: no compression, compression (br/gzip) and a warm browser cache
+revalidating with If-None-Match.
+
+Usage:
+    python bench_static.py --url http://127.0.0.1:5000 --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+
+import aiohttp
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSET_RE = re.compile(r"""(?:asset_url\(|url_for\('static',\s*filename=)'([^']+)'""")
+
+def collect_assets() -> list[str]:
+    """Returns the static paths a browser requests for one page view."""
+    try:
+        with open(os.path.join(ROOT_DIR, "static", "dist", "manifest.json"), encoding="utf-8") as file:
+            manifest = {name: entry["file"] for name, entry in json.load(file).items()}
+    except (FileNotFoundError, ValueError):
+        manifest = {}
+
+    paths = []
+    for template in os.listdir(os.path.join(ROOT_DIR, "templates")):
+        with open(os.path.join(ROOT_DIR, "templates", template), encoding="utf-8") as file:
+            for name in ASSET_RE.findall(file.read()):
+                if (path := f"/static/{manifest.get(name, name)}") not in paths:
+                    paths.append(path)
+    return paths
+
+async def fetch(session: aiohttp.ClientSession, url: str, headers: dict) -> tuple[int, int, str]:
+    async with session.get(url, headers=headers) as resp:
+        body = await resp.read()
+        return resp.status, len(body), resp.headers.get("ETag", "")
+
+async def run_scenario(base_url: str, assets: list[str], total: int, concurrency: int, headers: dict, etags: dict = None) -> dict:
+    # auto_decompress is disabled so the measured bytes are the bytes sent over the wire
+    async with aiohttp.ClientSession(auto_decompress=False) as session:
+        page_bytes = 0
+        for path in assets:
+            _, size, _ = await fetch(session, base_url + path, {**headers, **({"If-None-Match": etags[path]} if etags and etags.get(path) else {})})
+            page_bytes += size
+
+        queue = asyncio.Queue()
+        for index in range(total):
+            queue.put_nowait(assets[index % len(assets)])
+
+        statuses: dict[int, int] = {}
+        async def worker():
+            while not queue.empty():
+                path = queue.get_nowait()
+                request_headers = {**headers, **({"If-None-Match": etags[path]} if etags and etags.get(path) else {})}
+                status, _, _ = await fetch(session, base_url + path, request_headers)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started_at
+
+    return {"rps": total / elapsed, "pageBytes": page_bytes, "statuses": statuses}
+
+async def main(args: argparse.Namespace) -> None:
+    assets = collect_assets()
+    if not assets:
+        return print("No static assets found in the templates.")
+
+    base_url = args.url.rstrip("/")
+    async with aiohttp.ClientSession(auto_decompress=False) as session:
+        etags = {path: (await fetch(session, base_url + path, {"Accept-Encoding": "br, gzip"}))[2] for path in assets}
+
+    scenarios = {
+        "identity": ({"Accept-Encoding": "identity"}, None),
+        "compressed": ({"Accept-Encoding": "br, gzip"}, None),
+        "revalidate": ({"Accept-Encoding": "br, gzip"}, etags),
+    }
+
+    print(f"{len(assets)} assets per page view, {args.requests} requests, concurrency {args.concurrency}\n")
+    print(f"{'scenario':<12} {'req/s':>10} {'bytes/page':>12}  statuses")
+    for name, (headers, scenario_etags) in scenarios.items():
+        result = await run_scenario(base_url, assets, args.requests, args.concurrency, headers, scenario_etags)
+        print(f"{name:<12} {result['rps']:>10.1f} {result['pageBytes']:>12}  {result['statuses']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dashboard static asset serving.")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="Base URL of a running dashboard.")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per scenario.")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent connections.")
+    asyncio.run(main(parser.parse_args()))
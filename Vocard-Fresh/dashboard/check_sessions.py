@@ -0,0 +1,70 @@
+"""
+Shared session check for the dashboard.
+
+Runs two user pools side by side, the way two dashboard workers share sessions,
+on top of an in-memory SessionBackend client. Checks that a user who logged in
+on one worker is resolved by the other, that activity on either worker keeps
+the shared session alive, and that it expires everywhere once the user has been
+idle for longer than the idle timeout.
+
+Usage:
+    python check_sessions.py --idle-timeout 2
+"""
+import argparse
+import asyncio
+import sys
+
+from collections import OrderedDict
+
+from objects import MemorySessionClient, SessionBackend, UserPool
+
+def make_worker(name: str, backend: SessionBackend, idle_timeout: float) -> type:
+    """A UserPool with its own users, as a separate worker process would have."""
+    return type(name, (UserPool,), {
+        "_users": OrderedDict(),
+        "_tokens": {},
+        "_backend": backend,
+        "_last_prune": 0.0,
+        "IDLE_TIMEOUT": idle_timeout
+    })
+
+def check(name: str, passed: bool) -> bool:
+    print(f"{'ok' if passed else 'FAIL':4}  {name}")
+    return passed
+
+async def main(args: argparse.Namespace) -> int:
+    backend = SessionBackend(MemorySessionClient(), ttl=args.idle_timeout)
+    first = make_worker("FirstWorker", backend, args.idle_timeout)
+    second = make_worker("SecondWorker", backend, args.idle_timeout)
+
+    data = {"id": "1", "global_name": "Tester", "avatar": "abc", "access_token": "token"}
+    user = await first.add(data)
+    results = [check("login is stored in the backend", await backend.load("token") == user.to_session())]
+
+    other = await second.fetch("token")
+    results.append(check("second worker resolves the session", other is not None and other.id == user.id))
+    results.append(check("second worker caches the user", second.get(token="token") is other))
+
+    # Activity past half the ttl refreshes the shared session from either worker
+    await asyncio.sleep(args.idle_timeout * 0.6)
+    await second.fetch("token")
+    await asyncio.sleep(args.idle_timeout * 0.6)
+    results.append(check("activity keeps the session alive", await backend.load("token") is not None))
+
+    await asyncio.sleep(args.idle_timeout * 1.1)
+    first.prune(force=True)
+    second.prune(force=True)
+    results.append(check("idle users are evicted on both workers", first.get(token="token") is None and second.get(token="token") is None))
+    results.append(check("idle session expires in the backend", await backend.load("token") is None))
+    results.append(check("expired session is not resolved", await first.fetch("token") is None))
+
+    user = await first.add(data)
+    await first.remove(user)
+    results.append(check("logout removes the shared session", await second.fetch("token") is None))
+
+    return 0 if all(results) else 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check dashboard sessions shared between workers.")
+    parser.add_argument("--idle-timeout", type=int, default=2, help="Seconds a session may stay idle, kept short for the check.")
+    sys.exit(asyncio.run(main(parser.parse_args())))
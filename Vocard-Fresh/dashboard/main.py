@@ -31,13 +31,15 @@ from objects import (
 )
 
 from utils import (
+    DISCORD_API,
     DISCORD_API_BASE_URL,
     ROOT_DIR,
     LANGUAGES,
     get_locale,
     requests_api,
-    process_js_files,
-    compile_scss,
+    build_assets,
+    asset_url,
+    serve_static,
     download_geoip_db,
     check_country_with_ip,
     check_version,
@@ -46,7 +48,8 @@ from utils import (
 
 SETTINGS: Settings = Settings()
 
-app = Quart(__name__)
+# Static files are served by serve_static, which handles precompressed variants and conditional requests
+app = Quart(__name__, static_folder=None)
 app.secret_key = SETTINGS.secret_key
 
 # Session cookie configuration for Railway HTTPS
@@ -58,6 +61,8 @@ app.config['PERMANENT_SESSION_LIFETIME'] = 86400 * 30  # 30 days
 babel = Babel(app)
 babel.init_app(app, locale_selector=get_locale)
 
+app.jinja_env.globals["asset_url"] = asset_url
+
 load_dotenv()
 
 def login_required(func):
@@ -67,12 +72,12 @@ def login_required(func):
         if not token:
             return redirect(url_for('login'))
 
-        user = UserPool.get(token=token)
+        user = await UserPool.fetch(token)
         if not user:
             resp = await requests_api(f'{DISCORD_API_BASE_URL}/users/@me', headers={'Authorization': f'Bearer {token}'})
             if resp:
                 resp["access_token"] = token
-                user = UserPool.add(resp)
+                user = await UserPool.add(resp)
             else:
                 return redirect(url_for('login'))
             
@@ -88,21 +93,37 @@ async def setup():
     for lang_code in lang_codes:
         LANGUAGES[lang_code] = {"name": Locale.parse(lang_code).get_display_name(lang_code).capitalize()}
 
-    process_js_files()
-    compile_scss()
+    UserPool.configure(SETTINGS.sessions)
+    await build_assets()
     await download_geoip_db()
 
+@app.after_serving
+async def shutdown():
+    await DISCORD_API.close()
+
+@app.route("/static/<path:filename>", methods=["GET"], endpoint="static")
+async def static_files(filename: str):
+    return await serve_static(filename)
+
 @app.route("/health", methods=["GET"])
 async def health():
     return jsonify({"status": "ok"}), 200
 
+@app.route("/metrics", methods=["GET"])
+async def metrics():
+    # Without a password configured the metrics stay closed, a missing header would otherwise match None
+    if not SETTINGS.password or request.headers.get("Authorization") != SETTINGS.password:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    return jsonify({"users": UserPool.metrics(), "sessions": UserPool.stats(), "discordApi": DISCORD_API.metrics}), 200
+
 @app.route("/", methods=["GET"])
 async def home():
     token = session.get("discord_token", None)
     if not token:
         return redirect(url_for('login'))
     
-    user = UserPool.get(token=token)
+    user = await UserPool.fetch(token)
 
     forwarded_for = request.headers.get('X-Forwarded-For')
     user_ip = forwarded_for.split(',')[0] if forwarded_for else request.remote_addr
@@ -113,7 +134,7 @@ async def home():
         if resp:
             resp["access_token"] = token
             resp["country"] = country
-            user = UserPool.add(resp)
+            user = await UserPool.add(resp)
         else:
             return redirect(url_for('login'))
 
@@ -141,6 +162,8 @@ async def login():
 @login_required
 async def logout(user: User):
     session.pop("discord_token", None)
+    DISCORD_API.invalidate(f"Bearer {user.access_token}")
+    await UserPool.remove(user)
     
     return redirect(url_for("home"))
 
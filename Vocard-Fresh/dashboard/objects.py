@@ -1,14 +1,20 @@
 import asyncio
+import hashlib
 import json
 import quart
+import time
 import os
 
+from collections import deque, OrderedDict
+
 from babel.languages import get_official_languages
 from geoip2 import records
 
 from typing import (
     Optional,
+    Deque,
     Dict,
+    Tuple,
     Any,
 )
 
@@ -25,18 +31,52 @@ class Asset:
         self.url: str = f"https://cdn.discordapp.com/avatars/{id}/{key}.webp"
 
 class User:
+    # Maximum number of payloads waiting to be written to a single user's socket
+    MAX_PENDING: int = 100
+    # State snapshots where only the latest payload matters, so older pending ones are replaced
+    COLLAPSIBLE_OPS: set[str] = {"playerUpdate", "statsUpdate", "updatePosition", "updateVolume", "updatePause"}
+
     def __init__(self, pool, data: Dict):
         self.id: str = data.get("id")
-        self.name: str = data.get("global_name")
-        self.avatar: Asset = Asset(self.id, data.get("avatar"))
-        self.access_token: str = data.get("access_token")
-        self.country: records.Country = data.get("country") 
+        self.country: records.Country = data.get("country")
+        self.update(data)
+
+        self.last_active: float = time.monotonic()
+        self.synced_at: float = 0.0
         
         self.bot: Optional[Bot] = None
         self.guild: Optional[Guild] = None
         
         self._pool: UserPool = pool
         self._websocket: Optional[quart.Websocket] = None
+
+        self._outbox: Deque[Tuple[Optional[str], str, float]] = deque()
+        self._outbox_event: asyncio.Event = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+
+        self.lag: float = 0.0
+        self.sent: int = 0
+        self.dropped: int = 0
+        self.collapsed: int = 0
+
+    def update(self, data: Dict) -> None:
+        self.name: str = data.get("global_name")
+        self.avatar: Asset = Asset(self.id, data.get("avatar"))
+        self.access_token: str = data.get("access_token")
+        if data.get("country"):
+            self.country = data.get("country")
+
+    def touch(self) -> None:
+        self.last_active = time.monotonic()
+
+    def to_session(self) -> Dict[str, Any]:
+        """The part of the user which can be shared with other dashboard workers."""
+        return {
+            "id": self.id,
+            "global_name": self.name,
+            "avatar": self.avatar.key,
+            "access_token": self.access_token
+        }
     
     async def assign_bot(self, bot) -> None:
         if self.bot:
@@ -89,8 +129,64 @@ class User:
             return await self.bot.send(payload)
     
     async def send(self, payload: Dict) -> None:
-        if self._websocket:
-            await self._websocket.send_json(payload)
+        self.send_raw(payload.get("op"), json.dumps(payload))
+
+    def send_raw(self, op: Optional[str], message: str) -> None:
+        """Queues an already serialized payload without waiting for the socket."""
+        if not self._websocket:
+            return
+
+        enqueued_at = time.monotonic()
+        if op in self.COLLAPSIBLE_OPS:
+            for index, (pending_op, _, pending_at) in enumerate(self._outbox):
+                if pending_op == op:
+                    # The newer snapshot goes to the tail so it never overtakes payloads queued after the old one,
+                    # it keeps the old timestamp so lag still counts from when this state first went stale
+                    del self._outbox[index]
+                    enqueued_at = pending_at
+                    self.collapsed += 1
+                    break
+
+        if len(self._outbox) >= self.MAX_PENDING:
+            # Prefer dropping a state snapshot that a later payload will supersede
+            for index, (pending_op, _, _) in enumerate(self._outbox):
+                if pending_op in self.COLLAPSIBLE_OPS:
+                    del self._outbox[index]
+                    break
+            else:
+                self._outbox.popleft()
+            self.dropped += 1
+
+        self._outbox.append((op, message, enqueued_at))
+        self._outbox_event.set()
+
+    async def _write(self) -> None:
+        while self._websocket:
+            if not self._outbox:
+                self._outbox_event.clear()
+                await self._outbox_event.wait()
+                continue
+
+            _, message, enqueued_at = self._outbox.popleft()
+            try:
+                await self._websocket.send(message)
+            except Exception as e:
+                LOGGER.debug(f"User {self.name}({self.id}) failed to receive a message: {e}")
+                continue
+
+            self.lag = time.monotonic() - enqueued_at
+            self.sent += 1
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._outbox),
+            "lag": round(self.lag, 3),
+            "oldestPending": round(time.monotonic() - min(at for _, _, at in self._outbox), 3) if self._outbox else 0.0,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "collapsed": self.collapsed
+        }
             
     async def _listen(self) -> None:
         while True:
@@ -98,6 +194,7 @@ class User:
                 await BotPool.broadcast({"op": "initBot", "userId": self.id})
 
             data = await self._websocket.receive()
+            self.touch()
             await self.send_to_bot(json.loads(data))
                 
     async def connect(self, websocket: quart.Websocket) -> None:
@@ -105,21 +202,43 @@ class User:
             await self.disconnect()
             
         self._websocket = websocket
+        self._writer = asyncio.create_task(self._write())
                 
         LOGGER.info(f"User {self.name}({self.id}) has been connected!")
         received = asyncio.create_task(self._listen())
-        await asyncio.gather(received)
+        try:
+            await asyncio.gather(received)
+        finally:
+            # Release the socket once it goes away, unless a newer connection has already replaced it
+            if self._websocket is websocket:
+                received.cancel()
+                await self.disconnect()
 
     async def disconnect(self) -> None:
         if self._websocket:
             if self.guild:
                 await self.guild.remove_user(self)
             
-            self.bot = None
-            await self._websocket.close(1004)
-            self._websocket = None
+            if self.bot:
+                self.bot._users.pop(self.id, None)
+                self.bot = None
+
+            if self._writer:
+                self._writer.cancel()
+                self._writer = None
+            self._outbox.clear()
+
+            websocket, self._websocket = self._websocket, None
+            try:
+                await websocket.close(1004)
+            except Exception:
+                pass
+            self.touch()
             LOGGER.info(f"User {self.name}({self.id}) has been disconnected!")
 
+            # A disconnected user becomes evictable, so enforce the pool bounds right away
+            self._pool.prune(force=True)
+
     @property
     def is_connected(self) -> bool:
         return self._websocket
@@ -163,10 +282,13 @@ class Guild:
             del self._users[user_id]
             
     async def broadcast(self, payload: Dict) -> None:
-        skip_users = payload.get("skip_users", [])
+        self.broadcast_raw(payload.get("op"), json.dumps(payload), payload.get("skip_users", []))
+
+    def broadcast_raw(self, op: Optional[str], message: str, skip_users: list[str] = []) -> None:
+        """Fans out a payload serialized once, each user's writer task delivers it independently."""
         for user_id, user in self._users.items():
             if user_id not in skip_users:
-                await user.send(payload)
+                user.send_raw(op, message)
     
     async def send_to_bot(self, data: Dict) -> None:
         data["guildId"] = self.id
@@ -188,8 +310,9 @@ class Bot:
     
     async def broadcast(self, payload: Dict):
         try:
+            op, message, skip_users = payload.get("op"), json.dumps(payload), payload.get("skip_users", [])
             for guild in self._guilds.values():
-                await guild.broadcast(payload)
+                guild.broadcast_raw(op, message, skip_users)
         except Exception as e:
             LOGGER.error("Something wrong while broadcast to the bot.", e)
     
@@ -313,24 +436,196 @@ class BotPool:
         for bot in cls._bots.values():
             await bot.send(data)
             
+class MemorySessionClient:
+    """An in-process stand-in for the Redis client used by `SessionBackend`.
+
+    Implements only `get`, `set(..., ex=...)` and `delete`, expiring keys the way
+    Redis does. Sessions are not shared across processes, so it is meant for
+    local testing of several pools within one process.
+    """
+    def __init__(self):
+        self._data: Dict[str, Tuple[str, Optional[float]]] = {}  # key -> (value, expires at)
+
+    async def get(self, key: str) -> Optional[str]:
+        if (entry := self._data.get(key)) is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: str, ex: Optional[float] = None) -> bool:
+        self._data[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+class SessionBackend:
+    """Shares dashboard sessions between workers through a Redis compatible client.
+
+    Only `get`, `set(..., ex=...)` and `delete` are used, so any client exposing
+    those coroutines (redis.asyncio, `MemorySessionClient`) can be passed in.
+    Sessions are keyed by a hash of the access token and expire after `ttl` seconds.
+    """
+    def __init__(self, client: Any, *, prefix: str = "vocard:session:", ttl: float = 3600.0):
+        self.client: Any = client
+        self.prefix: str = prefix
+        self.ttl: int = int(ttl)
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> Optional["SessionBackend"]:
+        try:
+            from redis import asyncio as aioredis
+        except ImportError:
+            LOGGER.error("The redis package is required to share sessions between workers, falling back to in-memory sessions.")
+            return None
+
+        return cls(aioredis.from_url(url, decode_responses=True), **kwargs)
+
+    def _key(self, token: str) -> str:
+        return self.prefix + hashlib.sha256(token.encode()).hexdigest()
+
+    async def load(self, token: str) -> Optional[Dict]:
+        try:
+            data = await self.client.get(self._key(token))
+        except Exception as e:
+            LOGGER.warning(f"Failed to load a session from the backend: {e}")
+            return None
+        return json.loads(data) if data else None
+
+    async def save(self, token: str, data: Dict) -> None:
+        try:
+            await self.client.set(self._key(token), json.dumps(data), ex=self.ttl)
+        except Exception as e:
+            LOGGER.warning(f"Failed to save a session to the backend: {e}")
+
+    async def delete(self, token: str) -> None:
+        try:
+            await self.client.delete(self._key(token))
+        except Exception as e:
+            LOGGER.warning(f"Failed to delete a session from the backend: {e}")
+
 class UserPool:
-    _users: Dict[str, User] = {}
-    
+    # Users kept in memory; only disconnected users are ever evicted
+    MAX_USERS: int = 1000
+    # Seconds a disconnected user stays in memory after their last activity
+    IDLE_TIMEOUT: float = 3600.0
+    PRUNE_INTERVAL: float = 60.0
+
+    _users: OrderedDict[str, User] = OrderedDict()
+    _tokens: Dict[str, str] = {}
+    _backend: Optional[SessionBackend] = None
+    _last_prune: float = 0.0
+
+    @classmethod
+    def configure(cls, settings: Dict[str, Any]) -> None:
+        cls.MAX_USERS = settings.get("max_users", cls.MAX_USERS)
+        cls.IDLE_TIMEOUT = settings.get("idle_timeout", cls.IDLE_TIMEOUT)
+
+        if redis_url := settings.get("redis_url"):
+            cls._backend = SessionBackend.from_url(redis_url, ttl=cls.IDLE_TIMEOUT)
+
+    @classmethod
+    def set_backend(cls, backend: Optional[SessionBackend]) -> None:
+        cls._backend = backend
+
     @classmethod
-    def add(cls, data: Dict) -> User:
-        user = User(cls, data)
-        cls._users[user.id] = user
+    async def add(cls, data: Dict) -> User:
+        if user := cls._users.get(data.get("id")):
+            cls._tokens.pop(user.access_token, None)
+            user.update(data)
+            cls._users.move_to_end(user.id)
+        else:
+            user = cls._users[data.get("id")] = User(cls, data)
+
+        cls._tokens[user.access_token] = user.id
+        user.touch()
+        cls.prune()
+
+        if cls._backend:
+            await cls._backend.save(user.access_token, user.to_session())
+            user.synced_at = time.monotonic()
         return user
     
     @classmethod
     def get(cls, *, user_id: str = None, token: str = None) -> Optional[User]:
+        if token:
+            user_id = cls._tokens.get(token)
+
         if user_id:
             return cls._users.get(user_id)
-        
-        if token:
-            for user in cls._users.values():
-                if user.access_token == token:
-                    return user
+
+    @classmethod
+    async def fetch(cls, token: str) -> Optional[User]:
+        """Resolves a user by access token, falling back to the shared backend when it is configured."""
+        if user := cls.get(token=token):
+            user.touch()
+            cls._users.move_to_end(user.id)
+
+            # Keep the shared session alive while the user is active on this worker
+            if cls._backend and time.monotonic() - user.synced_at > cls._backend.ttl / 2:
+                await cls._backend.save(token, user.to_session())
+                user.synced_at = time.monotonic()
+            return user
+
+        if cls._backend and (data := await cls._backend.load(token)):
+            return await cls.add(data)
+
+    @classmethod
+    async def remove(cls, user: User) -> None:
+        if user.is_connected:
+            await user.disconnect()
+
+        cls._evict(user)
+        if cls._backend:
+            await cls._backend.delete(user.access_token)
+
+    @classmethod
+    def _evict(cls, user: User) -> None:
+        cls._users.pop(user.id, None)
+        if cls._tokens.get(user.access_token) == user.id:
+            del cls._tokens[user.access_token]
+
+        if user.bot:
+            user.bot._users.pop(user.id, None)
+            user.bot = None
+        if user.guild:
+            user.guild._users.pop(user.id, None)
+            user.guild = None
+
+    @classmethod
+    def prune(cls, force: bool = False) -> None:
+        """Evicts disconnected users that have been idle for too long, then the least recently used ones over the limit."""
+        now = time.monotonic()
+        if not force and len(cls._users) <= cls.MAX_USERS and now - cls._last_prune < cls.PRUNE_INTERVAL:
+            return
+        cls._last_prune = now
+
+        overflow = len(cls._users) - cls.MAX_USERS
+        for user in list(cls._users.values()):
+            if user.is_connected:
+                continue
+
+            if overflow > 0 or now - user.last_active > cls.IDLE_TIMEOUT:
+                cls._evict(user)
+                overflow -= 1
+
+    @classmethod
+    def metrics(cls) -> Dict[str, Dict[str, Any]]:
+        return {user.id: user.metrics for user in cls._users.values() if user.is_connected}
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {
+            "users": len(cls._users),
+            "connected": sum(1 for user in cls._users.values() if user.is_connected),
+            "maxUsers": cls.MAX_USERS,
+            "idleTimeout": cls.IDLE_TIMEOUT,
+            "sharedBackend": cls._backend is not None
+        }
 
 class Settings:
     def __init__(self, settings_file: str = "settings.json"):
@@ -346,6 +641,9 @@ class Settings:
         self.redirect_url: str = self.get_setting("redirect_url") or os.getenv("REDIRECT_URL")
 
         self.logging: Dict[str, Any] = self.get_setting("logging")
+        self.sessions: Dict[str, Any] = self.get_setting("sessions") or {}
+        if redis_url := os.getenv("REDIS_URL"):
+            self.sessions.setdefault("redis_url", redis_url)
 
     def get_setting(self, key: str, default: Optional[str] = None) -> Optional[str]:
         return self.settings.get(key, default)
@@ -1,10 +1,24 @@
 import aiohttp
 import asyncio
+import gzip
+import hashlib
+import mimetypes
+import quart
 import logging
+import json
+import re
 import sass
+import time
+import threading
 import os
 import objects
 
+from urllib.parse import urlparse
+
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from concurrent.futures import ProcessPoolExecutor
 from logging.handlers import TimedRotatingFileHandler
 
 from geoip2 import (
@@ -12,13 +26,23 @@ from geoip2 import (
     database,
     errors
 )
+from maxminddb import MODE_MMAP
 
-from quart import session
+from quart import session, url_for, request
+from werkzeug.utils import safe_join
 from jsmin import jsmin
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 from typing import (
     Optional,
+    Callable,
     Dict,
+    List,
+    Tuple,
     Any
 )
 
@@ -39,6 +63,16 @@ CSS_DIR = os.path.join(ROOT_DIR, "static", "css")
 JS_SOURCE_DIR = os.path.join(ASSETS_DIR, "js")
 JS_OUTPUT_DIR = os.path.join(ROOT_DIR, "static", "js")
 
+# Content-hashed build outputs and the manifest used to skip unchanged entry points
+STATIC_DIR = os.path.join(ROOT_DIR, "static")
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+BUILD_MANIFEST_PATH = os.path.join(DIST_DIR, "manifest.json")
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".svg", ".json", ".txt")
+SCSS_IMPORT_RE = re.compile(r'@(?:import|use|forward)\s+["\']([^"\']+)["\']')
+
+# Maps a logical asset name (e.g. "js/utils.min.js") to its hashed file in the static folder
+ASSET_MANIFEST: Dict[str, str] = {}
+
 # Supported Languages
 LANGUAGES: Dict[str, Dict[str, str]] = {}
 
@@ -110,58 +144,277 @@ def get_locale() -> str:
 
     return language or list(LANGUAGES.keys())[0]
 
-def process_js_files() -> None:
+def _minify_js(input_path: str, output_paths: List[str]) -> None:
+    """Compress a JavaScript file. Runs in the build process pool."""
+    with open(input_path, "r", encoding="utf-8") as source_file:
+        compressed_js = jsmin(source_file.read(), quote_chars="'\"`")
+
+    for output_path in output_paths:
+        with open(output_path, "w", encoding="utf-8") as js_file:
+            js_file.write(compressed_js)
+
+def _compile_scss(input_path: str, output_paths: List[str]) -> None:
+    """Compile an entry-point SCSS file into compressed CSS. Runs in the build process pool."""
+    compiled_css = sass.compile(filename=input_path, include_paths=[SCSS_DIR], output_style="compressed")
+
+    for output_path in output_paths:
+        with open(output_path, "w", encoding="utf-8") as css_file:
+            css_file.write(compiled_css)
+
+def _precompress(path: str) -> None:
+    """Write gzip and (when available) brotli variants next to a static file. Runs in the build process pool."""
+    with open(path, "rb") as file:
+        content = file.read()
+
+    variants = {".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli:
+        variants[".br"] = lambda data: brotli.compress(data, quality=11)
+
+    for suffix, compress in variants.items():
+        with open(f"{path}{suffix}", "wb") as file:
+            file.write(compress(content))
+
+def _scss_imports(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8") as file:
+        names = SCSS_IMPORT_RE.findall(file.read())
+
+    imports = []
+    for name in names:
+        directory, base = os.path.split(name)
+        for candidate in (f"{base}.scss", f"_{base}.scss", base):
+            if os.path.isfile(candidate_path := os.path.join(SCSS_DIR, directory, candidate)):
+                imports.append(candidate_path)
+                break
+    return imports
+
+def _hash_file(path: str, file_hashes: Dict[str, str]) -> str:
+    if path not in file_hashes:
+        with open(path, "rb") as file:
+            file_hashes[path] = hashlib.sha256(file.read()).hexdigest()
+    return file_hashes[path]
+
+def _hash_scss(path: str, file_hashes: Dict[str, str], seen: Optional[set] = None) -> str:
+    """Hashes an SCSS entry point together with every partial it imports."""
+    seen = seen if seen is not None else set()
+    seen.add(path)
+
+    digest = hashlib.sha256(_hash_file(path, file_hashes).encode())
+    for imported in _scss_imports(path):
+        if imported not in seen:
+            digest.update(_hash_scss(imported, file_hashes, seen).encode())
+    return digest.hexdigest()
+
+def _load_manifest() -> Dict[str, Dict[str, str]]:
+    try:
+        with open(BUILD_MANIFEST_PATH, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+async def build_assets() -> None:
     """
-    Compress and obfuscate JavaScript files from the source directory
-    and save them to the output directory.
+    Minify JavaScript and compile SCSS entry points into the static directory.
+    Only entry points whose content hash (including imported partials) changed since
+    the last build are rebuilt, and the work runs in a process pool off the event loop.
+    Each output is also written under a content-hashed filename for long-lived caching,
+    and text assets get gzip/brotli variants for the static file handler.
     """
     os.makedirs(JS_OUTPUT_DIR, exist_ok=True)
+    os.makedirs(CSS_DIR, exist_ok=True)
+    os.makedirs(DIST_DIR, exist_ok=True)
 
+    file_hashes: Dict[str, str] = {}
+    entries: Dict[str, Tuple[str, str, str, Callable]] = {}
     for js_file in os.listdir(JS_SOURCE_DIR):
         if js_file.endswith(".js"):
             input_path = os.path.join(JS_SOURCE_DIR, js_file)
-            output_path = os.path.join(JS_OUTPUT_DIR, js_file.replace(".js", ".min.js"))
-            
-            try:
-                # Compress the JS file
-                with open(input_path, "r", encoding="utf-8") as source_file:
-                    compressed_js = jsmin(source_file.read(), quote_chars="'\"`")
-                
-                # Write compiled JS to the JS directory
-                with open(output_path, "w", encoding="utf-8") as js_file:
-                    js_file.write(compressed_js)
-                
-                LOGGER.debug(f"Successfully processed {js_file}.")
-            except Exception as e:
-                LOGGER.error(f"Error processing {js_file}: {e}")
-
-    LOGGER.info("Finished processing JavaScript files.")
-
-def compile_scss() -> None:
-    """
-    Compile SCSS files from the SCSS directory into CSS, 
-    handling imports properly by compiling only entry-point SCSS files.
-    """
-    os.makedirs(CSS_DIR, exist_ok=True)
+            name = f"js/{js_file.replace('.js', '.min.js')}"
+            entries[name] = (input_path, os.path.join(JS_OUTPUT_DIR, os.path.basename(name)), _hash_file(input_path, file_hashes), _minify_js)
 
     for scss_file in os.listdir(SCSS_DIR):
         if scss_file.endswith(".scss") and not scss_file.startswith("_"):
-            scss_path = os.path.join(SCSS_DIR, scss_file)
-            css_path = os.path.join(CSS_DIR, scss_file.replace(".scss", ".css"))
-            
+            input_path = os.path.join(SCSS_DIR, scss_file)
+            name = f"css/{scss_file.replace('.scss', '.css')}"
+            entries[name] = (input_path, os.path.join(CSS_DIR, os.path.basename(name)), _hash_scss(input_path, file_hashes), _compile_scss)
+
+    old_manifest = _load_manifest()
+    new_manifest: Dict[str, Dict[str, str]] = {}
+    jobs: Dict[str, asyncio.Future] = {}
+
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=min(4, os.cpu_count() or 1)) as pool:
+        for name, (input_path, output_path, digest, builder) in entries.items():
+            stem, ext = os.path.basename(name).split(".", 1)
+            hashed_name = f"dist/{stem}.{digest[:12]}.{ext}"
+            new_manifest[name] = {"hash": digest, "file": hashed_name}
+
+            cached = old_manifest.get(name, {})
+            if cached.get("hash") == digest and os.path.exists(output_path) and os.path.exists(os.path.join(STATIC_DIR, hashed_name)):
+                continue
+
+            jobs[name] = loop.run_in_executor(pool, builder, input_path, [output_path, os.path.join(STATIC_DIR, hashed_name)])
+
+        for name, result in zip(jobs.keys(), await asyncio.gather(*jobs.values(), return_exceptions=True)):
+            if isinstance(result, Exception):
+                LOGGER.error(f"Error building {name}: {result}")
+                if name in old_manifest:
+                    new_manifest[name] = old_manifest[name]
+                else:
+                    del new_manifest[name]
+            else:
+                LOGGER.debug(f"Successfully built {name}.")
+
+        # Remove hashed outputs (and their compressed variants) that are no longer referenced
+        active_files = {entry["file"] for entry in new_manifest.values()}
+        for entry in old_manifest.values():
+            if (file := entry.get("file")) and file not in active_files:
+                for suffix in ("", ".gz", ".br"):
+                    try:
+                        os.remove(os.path.join(STATIC_DIR, f"{file}{suffix}"))
+                    except FileNotFoundError:
+                        pass
+
+        # Precompress text assets whose variants are missing or older than the source
+        compress_jobs = []
+        for path in _iter_static_files():
+            if not path.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+
+            mtime = os.path.getmtime(path)
+            suffixes = (".gz", ".br") if brotli else (".gz",)
+            if any(not os.path.exists(variant := f"{path}{suffix}") or os.path.getmtime(variant) < mtime for suffix in suffixes):
+                compress_jobs.append(loop.run_in_executor(pool, _precompress, path))
+
+        for result in await asyncio.gather(*compress_jobs, return_exceptions=True):
+            if isinstance(result, Exception):
+                LOGGER.error(f"Error precompressing asset: {result}")
+
+    with open(BUILD_MANIFEST_PATH, "w", encoding="utf-8") as file:
+        json.dump(new_manifest, file, indent=4)
+
+    ASSET_MANIFEST.clear()
+    ASSET_MANIFEST.update({name: entry["file"] for name, entry in new_manifest.items()})
+
+    STATIC_ASSETS.clear()
+    for path in _iter_static_files():
+        StaticAsset.load(path)
+
+    LOGGER.info(f"Finished building assets ({len(jobs)} rebuilt, {len(entries) - len(jobs)} cached, {len(compress_jobs)} precompressed).")
+
+def _iter_static_files():
+    for directory, _, files in os.walk(STATIC_DIR):
+        for file in files:
+            if not file.endswith((".gz", ".br")) and file != os.path.basename(BUILD_MANIFEST_PATH):
+                yield os.path.join(directory, file)
+
+class StaticAsset:
+    """A static file together with its precompressed variants and validators, kept in memory."""
+    # Upper bound on file bytes kept in memory across every asset, larger sets are read from disk
+    MAX_MEMORY: int = 32 * 1024 * 1024
+    _memory_used: int = 0
+
+    def __init__(self, path: str, name: str) -> None:
+        stat = os.stat(path)
+        self.path: str = path
+        self.name: str = name
+        self.mimetype: str = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.last_modified: datetime = datetime.fromtimestamp(int(stat.st_mtime), timezone.utc)
+        self.is_immutable: bool = name.startswith("dist/")
+
+        with open(path, "rb") as file:
+            content = file.read()
+        self.etag: str = hashlib.sha1(content).hexdigest()[:20]
+
+        # Encoding -> file path of the variant, identity is always available
+        self.variants: Dict[str, str] = {"identity": path}
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if os.path.exists(variant := f"{path}{suffix}") and os.path.getmtime(variant) >= stat.st_mtime:
+                self.variants[encoding] = variant
+
+        self._contents: Dict[str, bytes] = {}
+
+    @classmethod
+    def load(cls, path: str) -> Optional["StaticAsset"]:
+        name = os.path.relpath(path, STATIC_DIR).replace(os.sep, "/")
+        try:
+            asset = STATIC_ASSETS[name] = cls(path, name)
+        except OSError:
+            return None
+        return asset
+
+    def choose_encoding(self, accept_encoding: str) -> str:
+        accepted = set()
+        for part in accept_encoding.split(","):
+            coding, _, params = part.strip().partition(";")
+            if params.strip().replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                accepted.add(coding.strip().lower())
+
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and (encoding in accepted or "*" in accepted):
+                return encoding
+        return "identity"
+
+    def read(self, encoding: str) -> bytes:
+        if content := self._contents.get(encoding):
+            return content
+
+        with open(self.variants[encoding], "rb") as file:
+            content = file.read()
+
+        if StaticAsset._memory_used + len(content) <= self.MAX_MEMORY:
+            self._contents[encoding] = content
+            StaticAsset._memory_used += len(content)
+        return content
+
+    def is_not_modified(self, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+        if if_none_match:
+            tags = {tag.strip().removeprefix("W/").strip('"').split("-", 1)[0] for tag in if_none_match.split(",")}
+            return "*" in tags or self.etag in tags
+
+        if if_modified_since:
             try:
-                # Compile SCSS file
-                compiled_css = sass.compile(filename=scss_path, include_paths=[SCSS_DIR], output_style="compressed")
-                
-                # Write compiled CSS to the CSS directory
-                with open(css_path, "w", encoding="utf-8") as css_file:
-                    css_file.write(compiled_css)
-
-                LOGGER.debug(f"Successfully compiled {scss_file}.")
-            except Exception as e:
-                LOGGER.error(f"Error compiling {scss_file}: {e}")
-
-    LOGGER.info("Finished compiling SCSS files.")
+                return parsedate_to_datetime(if_modified_since) >= self.last_modified
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def headers(self, encoding: str) -> Dict[str, str]:
+        headers = {
+            "ETag": f'"{self.etag}"' if encoding == "identity" else f'"{self.etag}-{encoding}"',
+            "Last-Modified": format_datetime(self.last_modified, usegmt=True),
+            "Vary": "Accept-Encoding",
+            # Hashed build outputs never change, everything else is revalidated with the ETag
+            "Cache-Control": "public, max-age=31536000, immutable" if self.is_immutable else "public, no-cache"
+        }
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return headers
+
+# Maps a path relative to the static folder to its indexed asset
+STATIC_ASSETS: Dict[str, StaticAsset] = {}
+
+async def serve_static(filename: str) -> quart.Response:
+    """Serves a static file, preferring a precompressed variant and answering conditional requests with 304."""
+    asset = STATIC_ASSETS.get(filename)
+    if not asset:
+        if not (path := safe_join(STATIC_DIR, filename)) or not os.path.isfile(path):
+            quart.abort(404)
+        asset = await asyncio.to_thread(StaticAsset.load, path)
+        if not asset:
+            quart.abort(404)
+
+    encoding = asset.choose_encoding(request.headers.get("Accept-Encoding", ""))
+    headers = asset.headers(encoding)
+
+    if asset.is_not_modified(request.headers.get("If-None-Match"), request.headers.get("If-Modified-Since")):
+        return quart.Response(b"", status=304, headers=headers)
+
+    content = asset._contents.get(encoding) or await asyncio.to_thread(asset.read, encoding)
+    return quart.Response(content, mimetype=asset.mimetype, headers=headers)
+
+def asset_url(filename: str) -> str:
+    """Returns the static URL of an asset, preferring its content-hashed build output."""
+    return url_for("static", filename=ASSET_MANIFEST.get(filename, filename))
 
 def check_version(current_version: str) -> bool:
     current_version = current_version.replace("v", "")
@@ -174,40 +427,262 @@ def check_version(current_version: str) -> bool:
 
     return current_version_tuple >= target_version_tuple
 
-def _check_country_with_ip_sync(address: str) -> Optional[records.Country]:
-    with database.Reader(GEODB_PATH) as reader:
+class GeoIPLookup:
+    """A process-wide, memory-mapped GeoIP reader with an LRU cache of lookups.
+
+    The database file is re-checked at most every `RELOAD_CHECK_INTERVAL` seconds
+    and reopened when it has been replaced on disk.
+    """
+    MAX_CACHE_SIZE: int = 10_000
+    CACHE_TTL: float = 3600
+    RELOAD_CHECK_INTERVAL: float = 60
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self._reader: Optional[database.Reader] = None
+        self._file_id: Optional[Tuple[int, int, float]] = None
+        self._next_check: float = 0.0
+        self._cache: OrderedDict[str, Tuple[float, Optional[records.Country]]] = OrderedDict()
+        # Misses are looked up in worker threads while hits are served from the event loop
+        self._lock: threading.Lock = threading.Lock()
+
+    def _ensure_reader(self) -> Optional[database.Reader]:
+        """Returns the current reader, reopening the database if it was replaced. Must hold `_lock`."""
+        now = time.monotonic()
+        if self._reader and now < self._next_check:
+            return self._reader
+
+        self._next_check = now + self.RELOAD_CHECK_INTERVAL
         try:
-            response = reader.country(address)
-            return response.country
-        except errors.AddressNotFoundError:
-            return None
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return self._reader
 
-async def requests_api(url: str, method: str = 'GET', data: dict = None, headers: dict = None) -> dict:
-    LOGGER.debug(f"Making {method} request to {url} with data: {data} and headers: {headers}")
-    async with aiohttp.ClientSession() as session:
+        file_id = (stat.st_ino, stat.st_size, stat.st_mtime)
+        if file_id != self._file_id:
+            try:
+                reader = database.Reader(self.path, mode=MODE_MMAP)
+            except Exception as e:
+                LOGGER.error(f"Unable to open the GeoIP database: {e}")
+                return self._reader
+
+            if self._reader:
+                self._reader.close()
+                LOGGER.info("GeoIP database has been reloaded.")
+
+            self._reader, self._file_id = reader, file_id
+            self._cache.clear()
+
+        return self._reader
+
+    def get_cached(self, address: str) -> Tuple[bool, Optional[records.Country]]:
+        with self._lock:
+            if (cached := self._cache.get(address)) and cached[0] > time.monotonic():
+                self._cache.move_to_end(address)
+                return True, cached[1]
+        return False, None
+
+    def lookup(self, address: str) -> Optional[records.Country]:
+        country = None
+        with self._lock:
+            reader = self._ensure_reader()
+            if reader:
+                try:
+                    country = reader.country(address).country
+                except (errors.AddressNotFoundError, ValueError):
+                    pass
+
+            self._cache[address] = (time.monotonic() + self.CACHE_TTL, country)
+            self._cache.move_to_end(address)
+            while len(self._cache) > self.MAX_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+        return country
+
+GEOIP = GeoIPLookup(GEODB_PATH)
+
+class RateLimitBucket:
+    def __init__(self) -> None:
+        self.remaining: Optional[int] = None
+        self.reset_at: float = 0.0
+        self.lock: asyncio.Lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            if self.remaining == 0 and (delay := self.reset_at - time.monotonic()) > 0:
+                LOGGER.debug(f"Discord rate limit bucket exhausted, waiting {delay:.2f}s")
+                await asyncio.sleep(delay)
+                self.remaining = None
+
+            if self.remaining:
+                self.remaining -= 1
+
+    def update(self, headers) -> None:
+        if (remaining := headers.get("X-RateLimit-Remaining")) is not None:
+            self.remaining = int(remaining)
+        if (reset_after := headers.get("X-RateLimit-Reset-After")) is not None:
+            self.reset_at = time.monotonic() + float(reset_after)
+
+class DiscordAPIClient:
+    """A long-lived, keep-alive HTTP client for the Discord API.
+
+    GET responses for per-user routes are cached per access token, identical
+    concurrent requests share a single upstream call, and Discord's rate-limit
+    headers are honoured per bucket before a request is sent.
+    """
+    # Seconds a successful GET response is reused for the same access token
+    CACHE_TTLS: Dict[str, float] = {
+        "/users/@me": 300,
+        "/users/@me/guilds": 60
+    }
+    MAX_CACHE_SIZE: int = 5000
+    MAX_RETRIES: int = 2
+
+    def __init__(self) -> None:
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._cache: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self._route_buckets: Dict[str, str] = {}
+        self._buckets: Dict[Tuple[str, str], RateLimitBucket] = {}
+
+        self.cache_hits: int = 0
+        self.cache_misses: int = 0
+        self.upstream_requests: int = 0
+        self.upstream_errors: int = 0
+        self.upstream_latency: float = 0.0
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if not self._session or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=100, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=15)
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    def _get_bucket(self, route: str, token: str) -> RateLimitBucket:
+        # User-token limits are tracked per token, so one busy user never blocks another
+        key = (self._route_buckets.get(route, route), token)
+        if key not in self._buckets:
+            if len(self._buckets) >= self.MAX_CACHE_SIZE:
+                now = time.monotonic()
+                for expired in [k for k, v in self._buckets.items() if v.reset_at <= now and not v.lock.locked()]:
+                    del self._buckets[expired]
+            self._buckets[key] = RateLimitBucket()
+        return self._buckets[key]
+
+    def _cache_get(self, key: Tuple[str, str]) -> Any:
+        if (cached := self._cache.get(key)) and cached[0] > time.monotonic():
+            return cached[1]
+        return None
+
+    def _cache_set(self, key: Tuple[str, str], ttl: float, value: Any) -> None:
+        now = time.monotonic()
+        if len(self._cache) >= self.MAX_CACHE_SIZE:
+            for expired in [k for k, v in self._cache.items() if v[0] <= now] or list(self._cache)[:self.MAX_CACHE_SIZE // 10]:
+                del self._cache[expired]
+        self._cache[key] = (now + ttl, value)
+
+    def invalidate(self, token: str) -> None:
+        """Drops every cached response for an access token."""
+        for key in [key for key in self._cache if key[1] == token]:
+            del self._cache[key]
+
+    async def request(self, url: str, method: str = 'GET', data: dict = None, headers: dict = None) -> Any:
+        route = f"{method} {urlparse(url).path.removeprefix('/api')}"
+        token = (headers or {}).get("Authorization", "")
+        ttl = self.CACHE_TTLS.get(route.split(" ", 1)[1]) if method == 'GET' else None
+
+        if ttl:
+            if (cached := self._cache_get((route, token))) is not None:
+                self.cache_hits += 1
+                return cached
+            self.cache_misses += 1
+
+        # Share one upstream call between identical concurrent requests
+        key = (route, token, tuple(sorted((data or {}).items())))
+        if inflight := self._inflight.get(key):
+            return await asyncio.shield(inflight)
+
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
         try:
-            if method == 'GET':
-                resp = await session.get(url, headers=headers)
-            elif method == 'POST':
-                resp = await session.post(url, data=data, headers=headers)
-            else:
-                raise ValueError(f"Unsupported method: {method}")
-            
-            if resp.status != 200:
-                error_text = await resp.text()
-                print(f"[DEBUG] API Error {resp.status}: {error_text}", flush=True)
-                LOGGER.debug(f"Received non-200 response: {resp.status} for URL: {url}")
+            result = await self._request(route, token, url, method, data, headers)
+            if ttl and result is not None:
+                self._cache_set((route, token), ttl, result)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _request(self, route: str, token: str, url: str, method: str, data: Optional[dict], headers: Optional[dict]) -> Any:
+        LOGGER.debug(f"Making {method} request to {url}")
+        for attempt in range(self.MAX_RETRIES + 1):
+            bucket = self._get_bucket(route, token)
+            await bucket.acquire()
+
+            started_at = time.monotonic()
+            try:
+                async with self.session.request(method, url, data=data, headers=headers) as resp:
+                    self.upstream_requests += 1
+                    self.upstream_latency += time.monotonic() - started_at
+
+                    if bucket_id := resp.headers.get("X-RateLimit-Bucket"):
+                        self._route_buckets[route] = bucket_id
+                        bucket = self._buckets.setdefault((bucket_id, token), bucket)
+                    bucket.update(resp.headers)
+
+                    if resp.status == 429 and attempt < self.MAX_RETRIES:
+                        retry_after = float(resp.headers.get("Retry-After", 1))
+                        LOGGER.warning(f"Rate limited by Discord on {route}, retrying in {retry_after}s")
+                        await asyncio.sleep(retry_after)
+                        continue
+
+                    if resp.status != 200:
+                        self.upstream_errors += 1
+                        LOGGER.debug(f"Received non-200 response: {resp.status} for URL: {url} - {await resp.text()}")
+                        return None
+
+                    return await resp.json(encoding="utf-8")
+
+            except Exception as e:
+                self.upstream_errors += 1
+                LOGGER.error(f"Error during API request to {url}: {e}")
                 return None
-            
-            json_response = await resp.json(encoding="utf-8")
-            LOGGER.debug(f"Received response: {json_response}")
-            return json_response
-        except Exception as e:
-            LOGGER.error(f"Error during API request to {url}: {e}")
-            return None
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "cacheHits": self.cache_hits,
+            "cacheMisses": self.cache_misses,
+            "cacheHitRate": round(self.cache_hits / lookups, 3) if lookups else 0.0,
+            "cacheSize": len(self._cache),
+            "upstreamRequests": self.upstream_requests,
+            "upstreamErrors": self.upstream_errors,
+            "upstreamAvgLatency": round(self.upstream_latency / self.upstream_requests, 3) if self.upstream_requests else 0.0
+        }
+
+DISCORD_API = DiscordAPIClient()
+
+async def requests_api(url: str, method: str = 'GET', data: dict = None, headers: dict = None) -> dict:
+    if method not in ('GET', 'POST'):
+        raise ValueError(f"Unsupported method: {method}")
+
+    return await DISCORD_API.request(url, method, data=data, headers=headers)
 
 async def check_country_with_ip(address: str) -> Optional[records.Country]:
-    return await asyncio.to_thread(_check_country_with_ip_sync, address)
+    is_cached, country = GEOIP.get_cached(address)
+    if is_cached:
+        return country
+
+    return await asyncio.to_thread(GEOIP.lookup, address)
 
 async def download_geoip_db() -> None:
     # Create directory if it doesn't exist
@@ -221,8 +696,10 @@ async def download_geoip_db() -> None:
         LOGGER.info("Downloading GeoIP database...")
         async with session.get(GEODB_URL) as response:
             if response.status == 200:
-                with open(GEODB_PATH, 'wb') as f:
+                # Write to a temporary file first so a running reader never sees a partial database
+                with open(temp_path := f"{GEODB_PATH}.tmp", 'wb') as f:
                     f.write(await response.read())
+                os.replace(temp_path, GEODB_PATH)
                 LOGGER.info("GeoIP database downloaded successfully.")
             else:
                 LOGGER.error(f"Failed to download database: {response.status}")
\ No newline at end of file
@@ -21,11 +21,14 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-import discord, json, os, copy, logging, re, random
+import discord, json, os, copy, logging, re, random, asyncio
 
 from discord.ext import commands
 from time import strptime
-from addons import Settings
+from addons import Settings, BotStats
+from addons.assets import AssetCache
+from addons.renderer import ImageRenderer
+from addons.lyrics import LyricsResolver
 
 from typing import (
     Optional,
@@ -38,6 +41,8 @@ from motor.motor_asyncio import (
     AsyncIOMotorClient,
     AsyncIOMotorCollection,
 )
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -56,8 +61,14 @@ LANGS: dict[str, dict[str, str]] = {} #Stores all the languages in ./langs
 LOCAL_LANGS: dict[str, dict[str, str]] = {} #Stores all the localization languages in ./local_langs
 SETTINGS_BUFFER: dict[int, dict[str, Any]] = {} #Cache guild language
 USERS_BUFFER: dict[str, dict] = {}
+SHARED_INBOX: Optional[list[dict]] = None #Merged inbox of every bot_access_user, built on first use
+SHARED_INBOX_IDS: set[str] = set()
 
 MISSING_TRANSLATOR: dict[str, list[str]] = {}
+BOT_STATS: BotStats = BotStats() #Bot-wide counters served to the dashboard and presence
+RENDERER: ImageRenderer = None #Process pool for rank, welcome and bonk images, created in setup_hook
+ASSETS: AssetCache = AssetCache(os.path.join(ROOT_DIR, "cache", "images")) #Downloaded avatars and backgrounds
+LYRICS: LyricsResolver = None #Parallel lookup across the lyrics providers, created in setup_hook
 
 USER_BASE: dict[str, Any] = {
     'playlist': {
@@ -382,7 +393,8 @@ async def send(
 
     return message
 
-async def update_db(db: AsyncIOMotorCollection, tempStore: dict, filter: dict, data: dict) -> bool:
+def apply_update(tempStore: dict, data: dict) -> bool:
+    """Mirrors a MongoDB update document onto an in-memory copy of the document."""
     for mode, action in data.items():
         for key, value in action.items():
             cursors = key.split(".")
@@ -419,6 +431,12 @@ async def update_db(db: AsyncIOMotorCollection, tempStore: dict, filter: dict, d
             else:
                 return False
 
+    return True
+
+async def update_db(db: AsyncIOMotorCollection, tempStore: dict, filter: dict, data: dict) -> bool:
+    if not apply_update(tempStore, data):
+        return False
+
     try:
         result = await db.update_one(filter, data)
         return result.modified_count > 0
@@ -457,4 +475,100 @@ async def get_user(user_id: int, d_type: Optional[str] = None, need_copy: bool =
 
 async def update_user(user_id:int, data:dict) -> bool:
     playlist = await get_user(user_id, need_copy=False)
-    return await update_db(USERS_DB, playlist, {"_id": user_id}, data)
\ No newline at end of file
+    if updated := await update_db(USERS_DB, playlist, {"_id": user_id}, data):
+        # Only mirrored once Mongo has the change, so the shared inbox never shows a failed write
+        _update_shared_inbox(user_id, data)
+    return updated
+
+async def bulk_update_users(updates: dict[int, dict]) -> set[int]:
+    """Applies one update per user in a single bulk write and returns the ids whose update failed.
+
+    Users that are not buffered are not loaded first; their document is created on
+    demand instead. Buffered users are updated in memory like update_user does, but
+    only once Mongo has accepted their update, so a retry never counts a change twice.
+    """
+    if not updates:
+        return set()
+
+    user_ids = list(updates)
+    operations = [
+        UpdateOne({"_id": user_id}, {**updates[user_id], "$setOnInsert": copy.deepcopy(USER_BASE)}, upsert=True)
+        for user_id in user_ids
+    ]
+
+    try:
+        await USERS_DB.bulk_write(operations, ordered=False)
+        failed = set()
+    except BulkWriteError as e:
+        # Unordered writes go on past errors, only the reported operations did not apply
+        failed = {user_ids[error["index"]] for error in e.details.get("writeErrors", [])}
+        logger.error(f"MongoDB bulk update failed for {len(failed)} of {len(user_ids)} user(s): {e}")
+    except Exception as e:
+        logger.error(f"MongoDB bulk update error: {e}")
+        return set(user_ids)
+
+    for user_id in user_ids:
+        if user_id not in failed and (user := USERS_BUFFER.get(user_id)) is not None:
+            apply_update(user, updates[user_id])
+    return failed
+
+def inbox_mail_id(mail: dict) -> str:
+    return f"{mail.get('time', '')}-{mail.get('title', '')}-{mail.get('type', '')}"
+
+def _add_shared_mail(mail: dict) -> bool:
+    if (mail_id := inbox_mail_id(mail)) in SHARED_INBOX_IDS:
+        return False
+
+    SHARED_INBOX_IDS.add(mail_id)
+    SHARED_INBOX.append(copy.deepcopy(mail))
+    return True
+
+def _update_shared_inbox(user_id: int, data: dict) -> None:
+    """Keeps the materialized shared inbox in step with changes to an admin's inbox."""
+    global SHARED_INBOX
+
+    if SHARED_INBOX is None or user_id not in settings.bot_access_user:
+        return
+
+    if not any(key.split(".")[0] == "inbox" for action in data.values() for key in action):
+        return
+
+    # Mails pushed on their own are merged in place, anything else ($set, $pull,
+    # a $slice that may drop mails, other fields in the same update) is rebuilt on the next read
+    push = data.get("$push", {})
+    value = push.get("inbox")
+    if list(data) == ["$push"] and list(push) == ["inbox"] and isinstance(value, dict):
+        if "$each" not in value:
+            mails = [value]
+        elif list(value) == ["$each"] and isinstance(value["$each"], list):
+            mails = value["$each"]
+        else:
+            mails = None
+    else:
+        mails = None
+
+    if mails is None:
+        SHARED_INBOX = None
+    elif sum(_add_shared_mail(mail) for mail in mails if isinstance(mail, dict)):
+        SHARED_INBOX.sort(key=lambda x: x.get("time", "0"), reverse=True)
+
+async def get_shared_inbox() -> list[dict]:
+    """Returns the merged, de-duplicated inbox of every bot_access_user, newest first."""
+    global SHARED_INBOX
+
+    if SHARED_INBOX is None:
+        users = await asyncio.gather(*[get_user(admin_id, need_copy=False) for admin_id in settings.bot_access_user], return_exceptions=True)
+
+        SHARED_INBOX = []
+        SHARED_INBOX_IDS.clear()
+        for user in users:
+            if isinstance(user, Exception):
+                logger.debug(f"Could not load inbox for an admin: {user}")
+                continue
+
+            for mail in user.get("inbox", []):
+                _add_shared_mail(mail)
+
+        SHARED_INBOX.sort(key=lambda x: x.get("time", "0"), reverse=True)
+
+    return copy.deepcopy(SHARED_INBOX)
\ No newline at end of file
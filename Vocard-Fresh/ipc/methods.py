@@ -1,14 +1,20 @@
-import time, re
+import time, re, asyncio
 import function as func
 
-from typing import List, Dict, Union, Optional
+from typing import List, Dict, Union, Optional, Tuple
 
-from discord import User, Member, VoiceChannel
+from discord import User, Member, VoiceChannel, NotFound
 from discord.ext import commands
 from voicelink import Player, Track, Playlist, NodePool, decode, LoopType, Filters
-from addons import LYRICS_PLATFORMS
+from addons import LYRICS_PLATFORMS, RateLimiter
 
-RATELIMIT_COUNTER: Dict[int, Dict[str, float]] = {}
+from .voice_index import VOICE_INDEX
+
+USER_RATELIMIT = RateLimiter(100, 300)
+GUILD_RATELIMIT = RateLimiter(300, 300)
+SENDER_CACHE: Dict[int, Tuple[float, Optional[Dict]]] = {}
+SENDER_CACHE_SIZE = 1000
+SENDER_CACHE_TTL = 600
 SCOPES = {
     "prefix": str,
     "lang": str,
@@ -84,13 +90,8 @@ async def initBot(bot: commands.Bot, data: Dict) -> Dict:
         is_owner = await bot.is_owner(user)
         is_admin = is_owner or user_id in bot_access_users
         
-        # Calculate bot stats
-        server_count = len(bot.guilds)
-        user_count = sum(g.member_count or 0 for g in bot.guilds)
-        command_count = len([c for c in bot.tree.walk_commands()])
-        
-        # Count active music players
-        active_players = sum(1 for g in bot.guilds if g.voice_client and g.voice_client.is_playing)
+        # Bot stats are maintained incrementally by func.BOT_STATS
+        stats = func.BOT_STATS.snapshot()
         
         # Calculate uptime
         import time
@@ -112,13 +113,36 @@ async def initBot(bot: commands.Bot, data: Dict) -> Dict:
             "botId": str(bot.user.id),
             "isAdmin": is_admin,
             # Bot stats
-            "serverCount": server_count,
-            "userCount": user_count,
-            "commandCount": command_count,
-            "activePlayers": active_players,
+            **stats,
             "uptime": uptime_str
         }
     
+async def _get_sender(bot: commands.Bot, sender_id: int, semaphore: asyncio.Semaphore) -> Optional[Dict]:
+    """Resolves a mail sender's display info, caching the result (including deleted users) for a while."""
+    now = time.time()
+    if (cached := SENDER_CACHE.get(sender_id)) and cached[0] > now:
+        return cached[1]
+
+    sender = bot.get_user(sender_id)
+    if not sender:
+        async with semaphore:
+            try:
+                sender = await bot.fetch_user(sender_id)
+            except NotFound:
+                sender = None
+            except Exception as e:
+                # Rate limits, 5xx and timeouts say nothing about the sender, try again on the next request
+                func.logger.debug(f"Failed to fetch mail sender {sender_id}: {e}")
+                return None
+
+    info = {"avatarUrl": sender.display_avatar.url, "name": sender.display_name, "id": str(sender.id)} if sender else None
+    if len(SENDER_CACHE) >= SENDER_CACHE_SIZE:
+        for key in [key for key, value in SENDER_CACHE.items() if value[0] <= now] or list(SENDER_CACHE)[:SENDER_CACHE_SIZE // 10]:
+            del SENDER_CACHE[key]
+
+    SENDER_CACHE[sender_id] = (now + SENDER_CACHE_TTL, info)
+    return info
+
 async def initUser(bot: commands.Bot, data: Dict) -> Dict:
     user_id = int(data.get("userId"))
     user_data = await func.get_user(user_id)
@@ -130,35 +154,28 @@ async def initUser(bot: commands.Bot, data: Dict) -> Dict:
     
     # For admins, load SHARED inbox from all bot_access_users
     if is_admin:
-        all_inbox = []
-        seen_ids = set()  # Avoid duplicates
-        
-        for admin_id in bot_access_users:
-            try:
-                admin_data = await func.get_user(admin_id)
-                for mail in admin_data.get("inbox", []):
-                    # Create unique ID for deduplication
-                    mail_id = f"{mail.get('time', '')}-{mail.get('title', '')}-{mail.get('type', '')}"
-                    if mail_id not in seen_ids:
-                        seen_ids.add(mail_id)
-                        all_inbox.append(mail)
-            except Exception as e:
-                func.logger.debug(f"Could not load inbox for admin {admin_id}: {e}")
+        all_inbox = await func.get_shared_inbox()
         
         # Also include owner's inbox if different
         if is_owner and user_id not in bot_access_users:
+            seen_ids = {func.inbox_mail_id(mail) for mail in all_inbox}
             for mail in user_data.get("inbox", []):
-                mail_id = f"{mail.get('time', '')}-{mail.get('title', '')}-{mail.get('type', '')}"
-                if mail_id not in seen_ids:
-                    seen_ids.add(mail_id)
+                if func.inbox_mail_id(mail) not in seen_ids:
                     all_inbox.append(mail)
+            all_inbox.sort(key=lambda x: x.get("time", "0"), reverse=True)
         
-        # Sort by time (newest first)
-        all_inbox.sort(key=lambda x: x.get("time", "0"), reverse=True)
         user_data["inbox"] = all_inbox
     
-    # Process inbox messages (add sender info)
-    for mail in user_data.get("inbox", [])[:]:  # Use slice copy to safely modify
+    # Resolve every sender concurrently (add sender info)
+    inbox = user_data.get("inbox", [])
+    semaphore = asyncio.Semaphore(5)
+    sender_ids = {
+        mail.get("sender") for mail in inbox
+        if mail.get("type", "") != "suggestion" and mail.get("sender") is not None
+    }
+    senders = dict(zip(sender_ids, await asyncio.gather(*[_get_sender(bot, sender_id, semaphore) for sender_id in sender_ids])))
+
+    for mail in inbox[:]:  # Use slice copy to safely modify
         sender_id = mail.get("sender")
         mail_type = mail.get("type", "")
         
@@ -182,19 +199,11 @@ async def initUser(bot: commands.Bot, data: Dict) -> Dict:
             continue
         
         # Handle normal inbox messages with sender ID
-        try:
-            sender = bot.get_user(sender_id)
-            if not sender:
-                sender = await bot.fetch_user(sender_id)
-            
-            if sender:
-                mail["sender"] = {"avatarUrl": sender.display_avatar.url, "name": sender.display_name, "id": str(sender.id)}
-            else:
-                # Sender not found, remove this mail
-                user_data.get("inbox").remove(mail)
-        except:
-            # Invalid sender ID, remove this mail
-            user_data.get("inbox").remove(mail)
+        if sender := senders.get(sender_id):
+            mail["sender"] = sender
+        else:
+            # Sender not found or invalid sender ID, remove this mail
+            inbox.remove(mail)
 
     return {
         "op": "initUser",
@@ -407,6 +416,7 @@ async def toggleAutoplay(player: Player, member: Member, data: Dict) -> Dict:
 
     check = data.get("status", False)
     player.settings['autoplay'] = check
+    player.mark_dirty()
 
     if not player.is_playing:
         await player.do_next()
@@ -774,50 +784,28 @@ async def getLyrics(bot: commands.Bot, data: Dict) -> Dict:
     if not platform or platform not in LYRICS_PLATFORMS:
         platform = func.settings.lyrics_platform
     
-    # Try multiple platforms with fallback
-    fallback_order = ["lrclib", "genius", "lyrist", "musixmatch", "a_zlyrics"]
-    lyrics = None
-    used_platform = platform
-    
-    # Try primary platform first
-    lyrics_platform = LYRICS_PLATFORMS.get(platform)
-    if lyrics_platform:
-        try:
-            lyrics = await lyrics_platform().get_lyrics(title, artist)
-        except:
-            pass
-    
-    # Fallback to other platforms if needed
-    if not lyrics:
-        for p in fallback_order:
-            if p == platform:
-                continue
-            try:
-                lyrics_platform = LYRICS_PLATFORMS.get(p)
-                if lyrics_platform:
-                    lyrics = await lyrics_platform().get_lyrics(title, artist)
-                    if lyrics:
-                        used_platform = p
-                        break
-            except:
-                continue
-    
-    if lyrics:
+    # The requested platform goes first, the others race behind it
+    resolved = await func.LYRICS.resolve(title, artist, isrc=data.get("isrc"), preferred=platform)
+
+    if resolved:
         # Return full lyrics for dashboard, chunked for Discord
         if full_lyrics:
-            lyrics_data = lyrics  # Full lyrics for dashboard
+            lyrics_data = resolved.lyrics  # Full lyrics for dashboard
         else:
-            lyrics_data = {_: re.findall(r'.*\n(?:.*\n){,22}', v or "") for _, v in lyrics.items()}
-        
-        return {
+            lyrics_data = {_: re.findall(r'.*\n(?:.*\n){,22}', v or "") for _, v in resolved.lyrics.items()}
+
+        payload = {
             "op": "getLyrics",
             "userId": data.get("userId"),
             "title": title,
             "artist": artist,
-            "platform": used_platform,
+            "platform": resolved.platform,
             "lyrics": lyrics_data,
             "callback": data.get("callback")
         }
+        if full_lyrics and resolved.synced:
+            payload["synced"] = resolved.synced  # LRC text for time-synced display
+        return payload
     
     return {
         "op": "getLyrics",
@@ -1369,12 +1357,8 @@ async def process_methods(ipc_client, bot: commands.Bot, data: Dict) -> None:
         return
 
     # Ratelimit check
-    if user_id not in RATELIMIT_COUNTER or (time.time() - RATELIMIT_COUNTER[user_id]["time"]) >= 300:
-        RATELIMIT_COUNTER[user_id] = {"time": time.time(), "count": 0}
-    else:
-        if RATELIMIT_COUNTER[user_id]["count"] >= 100:
-            return await ipc_client.send({"op": "rateLimited", "userId": str(user_id)})
-        RATELIMIT_COUNTER[user_id]["count"] += method.credit
+    if retry_after := USER_RATELIMIT.hit(user_id, method.credit):
+        return await ipc_client.send({"op": "rateLimited", "userId": str(user_id), "retryAfter": round(retry_after, 1)})
 
     try:
         env: Dict = {"bot": bot, "data": data}
@@ -1388,49 +1372,23 @@ async def process_methods(ipc_client, bot: commands.Bot, data: Dict) -> None:
                 guild = bot.get_guild(int(guild_id_str))
                 if guild:
                     env["guild"] = guild
-                    env["member"] = guild.get_member(user_id) or await guild.fetch_member(user_id)
-            else:
-                user = bot.get_user(user_id)
-                if not user:
-                    try:
-                        user = await bot.fetch_user(user_id)
-                    except Exception:
-                        return await ipc_client.send(error_msg("Could not locate user. Try sending a message in a server first.", user_id=user_id))
-                
-                # Find the user in mutual guilds to get a member object
-                found_mutual = False
-                for guild in user.mutual_guilds:
-                    member = guild.get_member(user_id)
-                    if member and member.voice and member.voice.channel:
-                        env["guild"] = guild
+                    if member := await VOICE_INDEX.get_member(guild, user_id):
                         env["member"] = member
-                        found_mutual = True
-                        break
-                
-                if not found_mutual:
-                    # Fallback: Search all guilds manually (robust voice state check)
-                    for guild in bot.guilds:
-                        if user_id in guild.voice_states:
-                             member = guild.get_member(user_id)
-                             if not member:
-                                 try: 
-                                     member = await guild.fetch_member(user_id)
-                                 except: 
-                                     continue
-                             
-                             if member and member.voice and member.voice.channel:
-                                 env["guild"] = guild
-                                 env["member"] = member
-                                 break
+            else:
+                # Resolve the user's voice channel from the index maintained by voice state updates
+                if entry := VOICE_INDEX.get(user_id):
+                    if guild := bot.get_guild(entry[0]):
+                        member = await VOICE_INDEX.get_member(guild, user_id)
+                        if member and member.voice and member.voice.channel:
+                            env["guild"] = guild
+                            env["member"] = member
             
             # Final check for required parameters
             if "member" in params and "member" not in env:
                 # If we have a guild but no member (e.g. guildId provided but user not found/not in voice)
                 if guild := env.get("guild"):
-                    try:
-                        env["member"] = guild.get_member(user_id) or await guild.fetch_member(user_id)
-                    except:
-                        pass
+                    if member := await VOICE_INDEX.get_member(guild, user_id):
+                        env["member"] = member
                 
                 if "member" not in env:
                     return await ipc_client.send(error_msg("You need to be in a voice channel or specify a valid guild!", user_id=user_id))
@@ -1441,6 +1399,9 @@ async def process_methods(ipc_client, bot: commands.Bot, data: Dict) -> None:
                 
                 if not guild:
                     return await ipc_client.send(error_msg("Could not determine the server context for this player command.", user_id=user_id))
+
+                if retry_after := GUILD_RATELIMIT.hit(guild.id, method.credit):
+                    return await ipc_client.send({"op": "rateLimited", "userId": str(user_id), "retryAfter": round(retry_after, 1)})
                 
                 player = guild.voice_client
                 if not player:
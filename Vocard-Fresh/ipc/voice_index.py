@@ -0,0 +1,93 @@
+import time
+
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from discord import Guild, Member, VoiceChannel
+
+class VoiceIndex:
+    """Keeps track of which voice channel each user is connected to.
+
+    The index is fed by voice state updates, so resolving the guild of a dashboard
+    user is a single dict lookup instead of a scan over every guild the bot is in.
+    Members resolved for dashboard users are kept in a small LRU cache to avoid
+    repeated `fetch_member` calls when the member cache is not chunked.
+    """
+    def __init__(self, max_members: int = 1000, member_ttl: float = 300.0) -> None:
+        self._channels: Dict[int, Tuple[int, int]] = {}
+        self._members: OrderedDict[Tuple[int, int], Tuple[Member, float]] = OrderedDict()
+        self._max_members: int = max_members
+        self._member_ttl: float = member_ttl
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def update(self, member: Member, channel: Optional[VoiceChannel]) -> None:
+        """Records the channel a member has moved into, or drops them if they left voice."""
+        if member.bot:
+            return
+
+        if channel:
+            self._channels[member.id] = (channel.guild.id, channel.id)
+        else:
+            entry = self._channels.get(member.id)
+            if entry and entry[0] == member.guild.id:
+                del self._channels[member.id]
+
+    def populate(self, guild: Guild) -> None:
+        """Seeds the index from the voice states already cached for a guild."""
+        self.remove_guild(guild.id)
+        for user_id, state in guild.voice_states.items():
+            if state.channel and user_id != guild.me.id:
+                self._channels[user_id] = (guild.id, state.channel.id)
+
+    def remove_guild(self, guild_id: int) -> None:
+        """Drops every entry that belongs to the given guild."""
+        for user_id in [user_id for user_id, entry in self._channels.items() if entry[0] == guild_id]:
+            del self._channels[user_id]
+
+        for key in [key for key in self._members if key[0] == guild_id]:
+            del self._members[key]
+
+    def get(self, user_id: int) -> Optional[Tuple[int, int]]:
+        """Returns the `(guild_id, channel_id)` pair of the user's current voice channel."""
+        return self._channels.get(user_id)
+
+    def cache_member(self, member: Member) -> None:
+        key = (member.guild.id, member.id)
+        self._members[key] = (member, time.time() + self._member_ttl)
+        self._members.move_to_end(key)
+
+        while len(self._members) > self._max_members:
+            self._members.popitem(last=False)
+
+    def get_cached_member(self, guild_id: int, user_id: int) -> Optional[Member]:
+        key = (guild_id, user_id)
+        if not (cached := self._members.get(key)):
+            return None
+
+        member, expires_at = cached
+        if expires_at < time.time():
+            del self._members[key]
+            return None
+
+        self._members.move_to_end(key)
+        return member
+
+    async def get_member(self, guild: Guild, user_id: int) -> Optional[Member]:
+        """Resolves a member from the gateway cache, the LRU cache or the API, in that order."""
+        if member := guild.get_member(user_id):
+            return member
+
+        if member := self.get_cached_member(guild.id, user_id):
+            return member
+
+        try:
+            member = await guild.fetch_member(user_id)
+        except Exception:
+            return None
+
+        self.cache_member(member)
+        return member
+
+VOICE_INDEX = VoiceIndex()
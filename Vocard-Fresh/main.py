@@ -35,6 +35,9 @@ from ipc import IPCClient
 from motor.motor_asyncio import AsyncIOMotorClient
 from logging.handlers import TimedRotatingFileHandler
 from addons import Settings
+from addons.migrations import ensure_indexes
+from addons.renderer import ImageRenderer
+from addons.lyrics import LyricsCache, LyricsResolver
 
 class Translator(discord.app_commands.Translator):
     async def load(self):
@@ -64,6 +67,13 @@ class Vocard(commands.Bot):
 
         self.ipc: IPCClient
 
+    async def close(self) -> None:
+        await super().close()
+        if func.RENDERER:
+            func.RENDERER.shutdown()
+        if func.LYRICS:
+            await func.LYRICS.close()
+
     async def on_message(self, message: discord.Message, /) -> None:
         # Ignore messages from bots or DMs
         if message.author.bot or not message.guild:
@@ -114,11 +124,24 @@ class Vocard(commands.Bot):
         func.SETTINGS_DB = func.MONGO_DB[db_name]["Settings"]
         func.USERS_DB = func.MONGO_DB[db_name]["Users"]
 
+        # Declared indexes are created once, later starts only confirm they exist
+        created = await ensure_indexes(func.MONGO_DB[db_name])
+        func.logger.info(f"MongoDB indexes ready: {sum(len(names) for names in created.values())} checked across {len(created)} collection(s).")
+
     async def setup_hook(self) -> None:
         func.langs_setup()
+        func.BOT_STATS.attach(self)
+
+        # Workers are forked before the database and IPC clients start their threads
+        func.RENDERER = ImageRenderer(**func.settings.image_renderer)
+        func.RENDERER.start()
 
         # Connecting to MongoDB
         await self.connect_db()
+        func.LYRICS = LyricsResolver(
+            cache=LyricsCache(func.MONGO_DB[func.settings.mongodb_name]["lyrics_cache"]),
+            **func.settings.lyrics_resolver
+        )
 
         # Set translator
         await self.tree.set_translator(Translator())
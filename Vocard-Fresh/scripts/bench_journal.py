@@ -0,0 +1,128 @@
+"""
+Player journal benchmark.
+
+Simulates a bot with many active players writing session changes to the
+append-only journal, then measures how long recovery takes from a snapshot plus
+log tail, and how much data each tick writes compared with rewriting every
+session in full.
+
+Usage:
+    python scripts/bench_journal.py --players 500 --tracks 200 --ticks 60
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from addons.journal import PlayerJournal
+
+def make_track(index: int) -> dict:
+    return {
+        "track_id": f"QAAA{index:08d}" + "x" * 180,
+        "title": f"Track {index}",
+        "author": "Artist",
+        "uri": f"https://www.youtube.com/watch?v={index:011d}",
+        "length": 180_000 + index,
+        "requester_id": 100000000000000000 + index % 50
+    }
+
+def make_session(guild_id: int, tracks: int) -> dict:
+    return {
+        "_id": guild_id,
+        "guild_id": guild_id,
+        "voice_channel_id": guild_id + 1,
+        "text_channel_id": guild_id + 2,
+        "current_track": make_track(0),
+        "volume": 100,
+        "loop_mode": "OFF",
+        "autoplay": False,
+        "is_paused": False,
+        "position": 0,
+        "queue": [make_track(index) for index in range(1, tracks + 1)],
+        "timestamp": int(time.time())
+    }
+
+def disk_size(journal: PlayerJournal) -> float:
+    """Snapshot plus log size in MiB."""
+    return sum(os.path.getsize(path) for path in (journal.snapshot_path, journal.log_path) if os.path.exists(path)) / 1024 / 1024
+
+async def run_ticks(journal: PlayerJournal, args: argparse.Namespace, ticks: int) -> tuple:
+    """Writes `ticks` save ticks for every player, returns the bytes written, the time of each tick and the compactions."""
+    written, tick_times, compactions = 0, [], 0
+    for tick in range(ticks):
+        started_at = time.perf_counter()
+        for guild_id in range(args.players):
+            changes = {"position": tick * 5000, "timestamp": int(time.time())}
+            if random.random() < args.queue_change_rate:
+                changes["queue"] = [make_track(random.randint(1, 10_000)) for _ in range(args.tracks)]
+            journal.update(guild_id, changes)
+        written += sum(len(line.encode()) for line in journal._pending)
+        await journal.flush()
+        tick_times.append(time.perf_counter() - started_at)
+        compactions += journal._log_records == 0
+    return written, tick_times, compactions
+
+async def main(args: argparse.Namespace) -> None:
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as directory:
+        compact_bytes = int(args.compact_mb * 1024 * 1024)
+        journal = PlayerJournal(
+            directory, flush_interval=3600,
+            compact_records=args.compact_records, compact_ratio=args.compact_ratio, compact_bytes=compact_bytes
+        )
+        await journal.start()
+
+        started_at = time.perf_counter()
+        for guild_id in range(args.players):
+            journal.put(guild_id, make_session(guild_id, args.tracks))
+        await journal.flush()
+        print(f"initial puts      {time.perf_counter() - started_at:8.3f}s  on disk {disk_size(journal):.2f} MiB")
+
+        full_rewrite = len(json.dumps(list(journal.sessions.values())).encode())
+        written, tick_times, compactions = await run_ticks(journal, args, args.ticks)
+
+        print(f"ticks             {sum(tick_times):8.3f}s  avg {sum(tick_times) / len(tick_times) * 1000:8.2f} ms/tick")
+        print(f"bytes per tick    {written / args.ticks / 1024:8.1f} KiB  (full rewrite {full_rewrite / 1024:8.1f} KiB)")
+        print(f"compactions       {compactions:8d}   over {args.ticks} ticks")
+        await journal.close()
+
+        # Compactions during the ticks above may have emptied the log, so write a
+        # fresh tail with compaction disabled and replay snapshot plus that tail
+        journal = PlayerJournal(directory, flush_interval=3600, compact_records=sys.maxsize, compact_bytes=sys.maxsize)
+        await journal.start()
+        await run_ticks(journal, args, args.tail_ticks)
+        await journal.close()
+
+        tail_size = os.path.getsize(journal.log_path)
+        started_at = time.perf_counter()
+        restored = PlayerJournal(directory).load()
+        print(f"restore (tail)    {time.perf_counter() - started_at:8.3f}s  {len(restored)} sessions, tail {tail_size / 1024 / 1024:.2f} MiB ({args.tail_ticks} ticks)")
+
+        journal = PlayerJournal(directory)
+        await journal.start()
+        started_at = time.perf_counter()
+        await journal.compact()
+        print(f"compaction        {time.perf_counter() - started_at:8.3f}s  snapshot {os.path.getsize(journal.snapshot_path) / 1024 / 1024:.2f} MiB")
+        await journal.close()
+
+        started_at = time.perf_counter()
+        restored = PlayerJournal(directory).load()
+        print(f"restore (snapshot){time.perf_counter() - started_at:8.3f}s  {len(restored)} sessions")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the player session journal.")
+    parser.add_argument("--players", type=int, default=500)
+    parser.add_argument("--tracks", type=int, default=200)
+    parser.add_argument("--ticks", type=int, default=60, help="Save ticks to simulate, one every 5 seconds in the bot.")
+    parser.add_argument("--tail-ticks", type=int, default=12, help="Ticks left in the log for the tail restore, a minute of saves by default.")
+    parser.add_argument("--compact-records", type=int, default=10_000, help="Log records before a compaction is considered.")
+    parser.add_argument("--compact-ratio", type=float, default=2.0, help="How many times the snapshot size the log must reach to compact.")
+    parser.add_argument("--compact-mb", type=float, default=8, help="Log size that always triggers a compaction.")
+    parser.add_argument("--queue-change-rate", type=float, default=0.05, help="Chance that a player's queue changes in a tick.")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,119 @@
+"""
+Image renderer benchmark.
+
+Renders a burst of rank and welcome cards the way the bot used to (inline on
+the event loop) and through the shared renderer pool, and reports render
+latency alongside event loop lag measured by a ticker running next to them.
+The join burst runs compare welcome cards in one guild with and without the
+pre-rendered background layer.
+
+Usage:
+    python scripts/bench_renderer.py --cards 200 --guilds 4 --workers 2
+"""
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+from addons.renderer import ImageRenderer, RendererBusy, render_rank_card, render_welcome_card
+
+TICK = 0.005
+
+def make_png(size: tuple, color: tuple) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGBA", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def percentile(values: list, pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))] * 1000 if values else 0.0
+
+async def measure_lag(stop: asyncio.Event, lags: list) -> None:
+    while not stop.is_set():
+        started_at = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - started_at - TICK)
+
+def jobs(args: argparse.Namespace, avatar: bytes, background: bytes) -> list:
+    if args.scenario != "mixed":
+        base_key = (0, "settings") if args.scenario == "burst-base" else None
+        return [
+            (0, render_welcome_card, (background, avatar, f"user{index}", f"Member #{index} of Guild", base_key))
+            for index in range(args.cards)
+        ]
+
+    result = []
+    for index in range(args.cards):
+        guild_id = index % args.guilds
+        if index % 2:
+            result.append((guild_id, render_rank_card, (avatar, f"user{index}", 12345, 12, index, 345, 1000)))
+        else:
+            result.append((guild_id, render_welcome_card, (background, avatar, f"user{index}", f"Member #{index} of Guild")))
+    return result
+
+async def run(name: str, args: argparse.Namespace, render) -> None:
+    avatar, background = make_png((128, 128), (200, 120, 40, 255)), make_png((1920, 1080), (40, 80, 160, 255))
+    latencies, lags, rejected = [], [], 0
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(measure_lag(stop, lags))
+
+    async def one(guild_id, function, job_args) -> None:
+        nonlocal rejected
+        started_at = time.perf_counter()
+        try:
+            await render(guild_id, function, *job_args)
+        except RendererBusy:
+            rejected += 1
+            return
+        latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*[one(*job) for job in jobs(args, avatar, background)])
+    elapsed = time.perf_counter() - started_at
+    stop.set()
+    await ticker
+
+    print(f"{name:<10} total {elapsed:7.2f}s  render p50 {percentile(latencies, 0.5):8.1f} ms  p95 {percentile(latencies, 0.95):8.1f} ms  "
+          f"loop lag max {max(lags, default=0) * 1000:8.1f} ms  mean {statistics.fmean(lags or [0]) * 1000:6.2f} ms  rejected {rejected}")
+
+async def main(args: argparse.Namespace) -> None:
+    async def inline(guild_id, function, *job_args):
+        # Yield first so every job is queued, like a burst of events
+        await asyncio.sleep(0)
+        return function(*job_args)
+
+    await run("inline", args, inline)
+
+    renderer = ImageRenderer(workers=args.workers, max_pending=args.cards, max_per_guild=args.cards)
+    renderer.start()
+    await asyncio.sleep(1)  # let the workers finish starting
+    await run("pool", args, renderer.render)
+
+    if args.scenario == "mixed":
+        for scenario in ("burst", "burst-base"):
+            args.scenario = scenario
+            await run(scenario, args, renderer.render)
+        args.scenario = "mixed"
+
+    bounded = ImageRenderer(workers=args.workers)
+    bounded.start()
+    await asyncio.sleep(1)
+    await run("bounded", args, bounded.render)
+
+    renderer.shutdown()
+    bounded.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the image renderer pool against inline rendering.")
+    parser.add_argument("--cards", type=int, default=200)
+    parser.add_argument("--guilds", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--scenario", choices=("mixed", "burst", "burst-base"), default="mixed",
+                        help="mixed rank/welcome cards across guilds, or a join burst in one guild without/with the cached base layer.")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,61 @@
+"""
+MongoDB index check.
+
+Creates the declared indexes (see addons/migrations.py) and then runs `explain`
+on every registered query shape, reporting the ones that still scan a whole
+collection or sort in memory.
+
+Usage:
+    python scripts/check_indexes.py
+    python scripts/check_indexes.py --url mongodb://localhost:27017 --db Vocard --explain-only
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from addons.migrations import ensure_indexes, explain_queries
+
+def load_settings() -> dict:
+    path = os.path.join(ROOT_DIR, "settings.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf8") as f:
+        return json.load(f)
+
+async def main(args: argparse.Namespace) -> int:
+    settings = load_settings()
+    url = args.url or settings.get("mongodb_url") or os.getenv("MONGODB_URL")
+    name = args.db or settings.get("mongodb_name") or os.getenv("MONGODB_NAME")
+    if not (url and name):
+        print("No MongoDB url or database name, pass --url and --db.")
+        return 2
+
+    db = AsyncIOMotorClient(host=url)[name]
+    if not args.explain_only:
+        for collection, names in (await ensure_indexes(db)).items():
+            print(f"{collection:<16} {', '.join(names)}")
+        print()
+
+    risky = 0
+    for result in await explain_queries(db):
+        shape = json.dumps({key: result[key] for key in ("filter", "sort") if key in result})
+        status = ", ".join(result["risks"]) or "ok"
+        risky += bool(result["risks"])
+        print(f"{result['collection']:<16} {shape}")
+        print(f"{'':<16} {' > '.join(result['stages'])}  keys {result['keys_examined']}  docs {result['docs_examined']}  returned {result['returned']}  {result['time_ms']} ms  [{status}]")
+
+    print(f"\n{risky} risky query shape(s).")
+    return 1 if risky else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the MongoDB indexes and explain the registered query shapes.")
+    parser.add_argument("--url", help="MongoDB connection string, defaults to settings.json or MONGODB_URL.")
+    parser.add_argument("--db", help="Database name, defaults to settings.json or MONGODB_NAME.")
+    parser.add_argument("--explain-only", action="store_true", help="Skip index creation and only explain the queries.")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,175 @@
+"""
+Akinator stats concurrency check.
+
+Records many games for the same user at once using the update pipeline from
+cogs/games.py against a scratch collection, then checks that no update was lost
+and that every achievement was unlocked exactly once. Needs a local MongoDB 4.2+
+(e.g. `docker run -p 27017:27017 mongo`), or `--memory` to apply the pipeline
+with an in-process stand-in that evaluates the stages the way the server does.
+
+Usage:
+    python scripts/stress_game_stats.py --games 500 --concurrency 50
+    python scripts/stress_game_stats.py --memory
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing import Any, Dict, List, Optional
+
+from cogs.games import ACHIEVEMENT_COUNTERS, build_stats_update
+
+def evaluate(expression: Any, document: Dict[str, Any]) -> Any:
+    """Evaluates an aggregation expression against a document, missing fields are None."""
+    if isinstance(expression, str) and expression.startswith("$"):
+        return document.get(expression[1:])
+    if isinstance(expression, list):
+        return [evaluate(item, document) for item in expression]
+    if not isinstance(expression, dict):
+        return expression
+
+    if len(expression) != 1 or not next(iter(expression)).startswith("$"):
+        return {key: evaluate(value, document) for key, value in expression.items()}
+
+    operator, operands = next(iter(expression.items()))
+    if operator == "$cond":
+        condition, then, otherwise = operands
+        return evaluate(then if truthy(evaluate(condition, document)) else otherwise, document)
+
+    values = evaluate(operands, document)
+    if operator == "$add":
+        return None if None in values else sum(values)
+    if operator == "$ifNull":
+        return next((value for value in values if value is not None), None)
+    if operator == "$max":
+        return max((value for value in values if value is not None), default=None)
+    if operator == "$concatArrays":
+        return None if None in values else [item for value in values for item in value]
+    if operator == "$and":
+        return all(truthy(value) for value in values)
+    if operator == "$not":
+        return not truthy(values[0])
+    if operator == "$in":
+        return values[0] in values[1]
+    if operator == "$gte":
+        # The server sorts null before numbers
+        left, right = values
+        return right is None if left is None else right is None or left >= right
+    raise ValueError(f"The stand-in does not support {operator}")
+
+def truthy(value: Any) -> bool:
+    return value not in (None, False, 0)
+
+class MemoryCollection:
+    """Applies update pipelines in process, each update atomic on its document like on the server."""
+    def __init__(self) -> None:
+        self._documents: List[Dict[str, Any]] = []
+
+    async def drop(self) -> None:
+        self._documents.clear()
+
+    async def find_one(self, filter: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        await asyncio.sleep(0)
+        return next((dict(document) for document in self._documents if filter.items() <= document.items()), None)
+
+    async def find_one_and_update(self, filter, update, *, projection=None, upsert=False, return_document=False):
+        # Yield first so concurrent games interleave the way they would waiting on the server
+        await asyncio.sleep(0)
+        document = next((document for document in self._documents if filter.items() <= document.items()), None)
+        if document is None:
+            if not upsert:
+                return None
+            document = {"_id": len(self._documents) + 1, **filter}
+            self._documents.append(document)
+
+        before = dict(document)
+        for stage in update:
+            (name, fields), = stage.items()
+            if name != "$set":
+                raise ValueError(f"The stand-in does not support {name}")
+            document.update({field: evaluate(value, document) for field, value in fields.items()})
+
+        result = document if return_document else before
+        if projection:
+            return {key: value for key, value in result.items() if key == "_id" or projection.get(key)}
+        return dict(result)
+
+async def main(args: argparse.Namespace) -> int:
+    random.seed(0)
+    if args.memory:
+        collection, after = MemoryCollection(), True
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from pymongo import ReturnDocument
+
+        client = AsyncIOMotorClient(host=args.url)
+        collection, after = client[args.db]["game_stats_stress"], ReturnDocument.AFTER
+    await collection.drop()
+
+    games = [(random.random() < 0.5, random.randint(5, 40)) for _ in range(args.games)]
+    results = [won for won, _ in games]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    unlocked = []
+
+    async def play(won: bool, questions: int) -> None:
+        async with semaphore:
+            stats = await collection.find_one_and_update(
+                {"guild_id": "1", "user_id": "1"},
+                build_stats_update(won, questions=questions),
+                projection={"last_unlocked": 1},
+                upsert=True,
+                return_document=after
+            )
+            unlocked.extend(stats.get("last_unlocked", []))
+
+    # Create the document first, concurrent upserts without a unique index could insert it twice
+    await play(*games[0])
+    started_at = time.perf_counter()
+    await asyncio.gather(*[play(won, questions) for won, questions in games[1:]])
+    elapsed = time.perf_counter() - started_at
+
+    stats = await collection.find_one({"guild_id": "1", "user_id": "1"})
+    await collection.drop()
+
+    errors = []
+    if stats["akinator_games"] != len(results):
+        errors.append(f"akinator_games is {stats['akinator_games']}, expected {len(results)}")
+    if stats.get("akinator_wins", 0) != sum(results):
+        errors.append(f"akinator_wins is {stats.get('akinator_wins', 0)}, expected {sum(results)}")
+    if stats.get("akinator_losses", 0) != len(results) - sum(results):
+        errors.append(f"akinator_losses is {stats.get('akinator_losses', 0)}, expected {len(results) - sum(results)}")
+    if sorted(unlocked) != sorted(stats["achievements"]) or len(set(unlocked)) != len(unlocked):
+        errors.append(f"achievements reported {sorted(unlocked)} but stored {sorted(stats['achievements'])}")
+    if unknown := set(stats["achievements"]) - set(ACHIEVEMENT_COUNTERS):
+        errors.append(f"unknown achievements {unknown}")
+
+    # Whatever order the games ran in, the final counters decide which achievements must be there
+    reached = {"current_streak": stats["best_streak"]}
+    expected = {
+        key for key, counter in ACHIEVEMENT_COUNTERS.items()
+        if counter is None and any(not won and questions < 10 for won, questions in games)
+        or counter is not None and reached.get(counter[0], stats.get(counter[0], 0)) >= counter[1]
+    }
+    if expected != set(stats["achievements"]):
+        errors.append(f"achievements {sorted(stats['achievements'])} do not match the counters, expected {sorted(expected)}")
+
+    print(f"{len(results)} games, {args.concurrency} at a time, in {elapsed:.2f}s")
+    print(f"wins {stats.get('akinator_wins', 0)}  losses {stats.get('akinator_losses', 0)}  best streak {stats['best_streak']}  achievements {len(stats['achievements'])}")
+    for error in errors:
+        print(f"FAIL: {error}")
+    print("OK" if not errors else f"{len(errors)} check(s) failed")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that concurrent Akinator stat updates are not lost.")
+    parser.add_argument("--url", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="vocard_stress")
+    parser.add_argument("--games", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--memory", action="store_true", help="Apply the pipeline with an in-process stand-in instead of MongoDB.")
+    sys.exit(asyncio.run(main(parser.parse_args())))
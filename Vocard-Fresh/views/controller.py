@@ -31,7 +31,6 @@ import addons
 import views
 import function as func
 
-from discord.ext import commands
 from typing import Optional, Dict, Type, Union, Any
 
 # Try to import yt-dlp for download feature
@@ -41,8 +40,8 @@ try:
 except ImportError:
     YT_DLP_AVAILABLE = False
 
-def key(interaction: discord.Interaction):
-    return interaction.user
+# Shared across controller instances, the view is rebuilt on every track change
+BUTTON_RATELIMIT = addons.RateLimiter(2, 10)
     
 class ControlButton(discord.ui.Button):
     def __init__(
@@ -288,6 +287,7 @@ class AutoPlay(ControlButton):
 
         check = not self.player.settings.get("autoplay", False)
         self.player.settings['autoplay'] = check
+        self.player.mark_dirty()
         await self.send(interaction, 'autoplay', await func.get_lang(interaction.guild_id, 'enabled' if check else "disabled"))
 
         if not self.player.is_playing:
@@ -369,31 +369,11 @@ class Lyrics(ControlButton):
         # Extract ISRC from track info if available (from Lavalink response)
         isrc = self.player.current.info.get("isrc") if hasattr(self.player.current, 'info') else None
         
-        # Try all lyrics platforms with fallback
-        fallback_order = ["lrclib", "genius", "lyrist", "musixmatch", "a_zlyrics"]
-        lyrics_result = None
-        successful_platform = None
-        
-        for platform_name in fallback_order:
-            try:
-                lyrics_platform = addons.LYRICS_PLATFORMS.get(platform_name)
-                if not lyrics_platform:
-                    continue
-                
-                # Pass ISRC to MusixMatch for more accurate lookup on famous songs
-                if platform_name == "musixmatch" and isrc:
-                    lyrics_result = await lyrics_platform().get_lyrics(title, artist, isrc=isrc)
-                else:
-                    lyrics_result = await lyrics_platform().get_lyrics(title, artist)
-                    
-                if lyrics_result:
-                    successful_platform = platform_name
-                    break
-            except:
-                continue
-        
+        # Ask every source in parallel, the best one that has lyrics wins
+        resolved = await func.LYRICS.resolve(title, artist, isrc=isrc)
+
         # If all platforms failed, send sad Cheems GIF
-        if not lyrics_result:
+        if not resolved:
             import aiohttp
             tenor_api_key = getattr(func.settings, 'tenor_key', None)
             
@@ -421,8 +401,8 @@ class Lyrics(ControlButton):
             return await self.send(interaction, "lyricsNotFound", ephemeral=True)
 
         view = views.LyricsView(
-            name=f"{title} (via {successful_platform.title()})", 
-            source={_: re.findall(r'.*\n(?:.*\n){,22}', v or "") for _, v in lyrics_result.items()}, 
+            name=f"{title} (via {resolved.platform.title()})",
+            source={_: re.findall(r'.*\n(?:.*\n){,22}', v or "") for _, v in resolved.lyrics.items()},
             author=interaction.user
         )
         view.response = await interaction.followup.send(embed=view.build_embed(), view=view, ephemeral=True)
@@ -707,9 +687,6 @@ class InteractiveController(discord.ui.View):
                     self.add_item(btn_class(player=player, btn_data=btn_data, row=row_num))
                 except ValueError:
                     pass
-                
-        self.cooldown = commands.CooldownMapping.from_cooldown(2.0, 10.0, key)
-
             
     async def interaction_check(self, interaction: discord.Interaction):
         if not self.player.node._available:
@@ -720,8 +697,7 @@ class InteractiveController(discord.ui.View):
             return True
             
         if self.player.channel and self.player.is_user_join(interaction.user):
-            retry_after = self.cooldown.update_rate_limit(interaction)
-            if retry_after:
+            if retry_after := BUTTON_RATELIMIT.hit(interaction.user.id):
                 raise views.ButtonOnCooldown(retry_after)
             return True
         else:
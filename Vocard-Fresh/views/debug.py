@@ -161,6 +161,8 @@ class CogsDropdown(discord.ui.Select):
                     await interaction.response.send_message(f"Loaded `{selected}` successfully! 🎉", ephemeral=True)
         except Exception as e:
             return await interaction.response.send_message(f"Failed: {e}", ephemeral=True)
+        finally:
+            func.BOT_STATS.invalidate_commands()
 
 class NodesDropdown(discord.ui.Select):
     def __init__(self, bot: commands.Bot):
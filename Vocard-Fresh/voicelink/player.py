@@ -138,6 +138,7 @@ class Player(VoiceProtocol):
         self.controller: Union[Message, PartialMessage] = None
         self._updating: bool = False
         self._progress_task = None  # Background task for live progress bar
+        self.session_dirty: bool = True  # Whether the saved session needs more than a position update
 
         self.pause_votes = set()
         self.resume_votes = set()
@@ -255,6 +256,10 @@ class Player(VoiceProtocol):
         """Indicates whether the Inter-Process Communication (IPC) connection is active."""
         return self._ipc._is_connected and self._ipc_connection
         
+    def mark_dirty(self) -> None:
+        """Flags the queue, track or settings as changed for the next session snapshot."""
+        self.session_dirty = True
+
     def get_msg(self, *keys) -> Union[list[str], str]:
         """Retrieves a localized message or list of messages based on the given keys
            for the guild associated with this player.
@@ -374,6 +379,8 @@ class Player(VoiceProtocol):
 
         if isinstance(event, TrackEndEvent) and event.reason != "replaced":
             self._current = None
+            func.BOT_STATS.set_player_active(self.guild.id, False)
+            self.mark_dirty()
         
         if isinstance(event, TrackExceptionEvent) and event.exception["message"] == "This content isn’t available.":
             if self._node.yt_ratelimit:
@@ -595,6 +602,8 @@ class Player(VoiceProtocol):
     async def stop(self):
         """Stops the currently playing track."""
         self._current = None
+        func.BOT_STATS.set_player_active(self.guild.id, False)
+        self.mark_dirty()
         await self.send(method=RequestMethod.PATCH, data={'encodedTrack': None})
 
     async def disconnect(self, *, force: bool = False):
@@ -619,6 +628,7 @@ class Player(VoiceProtocol):
             assert self.channel is None and not self.is_connected
         
         self._node._players.pop(self.guild.id)
+        func.BOT_STATS.set_player_active(self.guild.id, False)
         await self.send(method=RequestMethod.DELETE)
     
     async def play(
@@ -646,6 +656,8 @@ class Player(VoiceProtocol):
             await self._node.yt_ratelimit.handle_request()
 
         self._current = track
+        func.BOT_STATS.set_player_active(self.guild.id, True)
+        self.mark_dirty()
 
         self._logger.debug(f"Player in {self.guild.name}({self.guild.id}) playing {track.title} from uri {track.uri} with a length of {track.length}")
         return self._current
@@ -694,6 +706,7 @@ class Player(VoiceProtocol):
                 
         finally:
             if tracks:
+                self.mark_dirty()
                 if self.is_ipc_connected:
                     await self.send_ws({"op": "addTrack", "tracks": [track.track_id for track in tracks], "position": -1 if is_list else position}, tracks[0].requester)
 
@@ -703,6 +716,7 @@ class Player(VoiceProtocol):
     async def remove_track(self, index: int, index2: int = None, remove_target: Member = None, requester: Member = None) -> Dict[int, Track]:
         """Removes one or more tracks from the queue."""
         removed_tracks = self.queue.remove(index, index2, remove_target)
+        self.mark_dirty()
         if removed_tracks and self.is_ipc_connected:
             await self.send_ws({
                 "op": "removeTrack",
@@ -731,8 +745,10 @@ class Player(VoiceProtocol):
         """Sets the pause state of the currently playing track."""
 
         self._paused = pause
+        self.mark_dirty()
         self.pause_votes.clear() if pause else self.resume_votes.clear()
         await self.send(method=RequestMethod.PATCH, data={"paused": pause})
+        self._bot.dispatch("voicelink_player_pause", self, pause)
 
         if self.is_ipc_connected:
             await self.send_ws({"op": "updatePause", "pause": pause}, requester)
@@ -744,6 +760,7 @@ class Player(VoiceProtocol):
         """Sets the volume of the player as an integer. Lavalink accepts values from 0 to 500."""
         await self.send(method=RequestMethod.PATCH, data={"volume": volume})
         self._volume = volume
+        self.mark_dirty()
         
         await func.update_settings(self.guild.id, {"$set": {"volume": volume}})
 
@@ -762,6 +779,7 @@ class Player(VoiceProtocol):
         shuffle(replacement)
         self.queue.replace(queue_type, replacement)
         self.shuffle_votes.clear()
+        self.mark_dirty()
         if self.is_ipc_connected:
             await self.send_ws({
                 "op": "shuffleTrack",
@@ -774,6 +792,7 @@ class Player(VoiceProtocol):
     async def swap_track(self, index1: int, index2: int, requester: Member = None) -> Tuple[Track, Track]:
        """Swaps two tracks in the queue at the specified indices."""
        track1, track2 = self.queue.swap(index1, index2)
+       self.mark_dirty()
        if self.is_ipc_connected:
            await self.send_ws({
                 "op": "swapTrack",
@@ -785,6 +804,7 @@ class Player(VoiceProtocol):
     async def move_track(self, index: int, new_index: int, requester: Member = None) -> Optional[Track]:
         """Moves a track from its current position to a new position in the queue."""
         moved_track = self.queue.move(index, new_index)
+        self.mark_dirty()
 
         if self.is_ipc_connected:
             await self.send_ws({"op": "moveTrack", "movedTrack": {"index": index, "trackId": moved_track.track_id}, "newIndex": new_index}, requester)
@@ -800,6 +820,7 @@ class Player(VoiceProtocol):
             raise VoicelinkException("Invalid repeat mode.")
         
         self.queue._repeat.set_mode(mode)
+        self.mark_dirty()
         
         if self.is_ipc_connected:
             await self.send_ws({"op": "repeatTrack", "repeatMode": mode.name.lower()}, requester)
@@ -836,6 +857,7 @@ class Player(VoiceProtocol):
             self.queue.history_clear(self.is_playing)
         elif queue_type == "queue":
             self.queue.clear()
+        self.mark_dirty()
         
         if self.is_ipc_connected:
             await self.send_ws({
@@ -965,10 +987,7 @@ class Player(VoiceProtocol):
         if not self.bot.ipc.is_connected:
             return
         
-        # Count active music players
-        active_players = sum(1 for g in self.bot.guilds if g.voice_client and g.voice_client.is_playing)
-        
         await self.bot.ipc.send({
             "op": "statsUpdate",
-            "activePlayers": active_players
+            "activePlayers": func.BOT_STATS.active_players
         })
\ No newline at end of file